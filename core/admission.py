@@ -0,0 +1,179 @@
+# core/admission.py
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from core.process_local import ProcessSingleton
+
+# =====================================================
+# Admission control for the analysis path
+# =====================================================
+#
+# At most MAX_CONCURRENT analyses run at once; up to MAX_QUEUE more
+# wait (FIFO) for at most QUEUE_TIMEOUT seconds. Anything beyond that
+# is rejected straight away with a BUSY verdict, so the worst-case
+# latency of an admitted request is bounded by the queue deadline.
+#
+# Before rejecting, load is shed by tier, chosen when a request is
+# admitted from how full the wait queue is:
+#
+#   FULL       everything
+#   REDUCED    no Google Sheets row (academic logging, not essential)
+#   ESSENTIAL  also no chat history row and no explanation text;
+#              the audit log is always written
+
+MAX_CONCURRENT = 4
+MAX_QUEUE = 64
+QUEUE_TIMEOUT = 2.0          # seconds a request may wait for a slot
+RETRY_AFTER = 1.0            # hint returned with BUSY
+
+# Queue occupancy (0..1) at which each tier starts
+REDUCED_AT = 0.25
+ESSENTIAL_AT = 0.75
+
+FULL, REDUCED, ESSENTIAL = range(3)
+TIER_NAMES = ("FULL", "REDUCED", "ESSENTIAL")
+
+# Optional work and the highest tier that still does it
+SHEETS = "sink.google_sheets"
+CHAT_HISTORY = "sink.chat_history"
+EXPLANATIONS = "explanations"
+
+FEATURE_MAX_TIER = {
+    SHEETS: FULL,
+    CHAT_HISTORY: REDUCED,
+    EXPLANATIONS: REDUCED,
+}
+
+BUSY = "BUSY"
+
+
+def allows(tier: int, feature: str) -> bool:
+    return tier <= FEATURE_MAX_TIER.get(feature, ESSENTIAL)
+
+
+class Busy(Exception):
+    """
+    Raised when a request is not admitted.
+    """
+
+    def __init__(self, reason: str, retry_after: float = RETRY_AFTER):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(reason)
+
+    def verdict(self) -> dict:
+        return {
+            "verdict_type": BUSY,
+            "reason": self.reason,
+            "retry_after_s": self.retry_after,
+        }
+
+
+@dataclass(frozen=True)
+class Ticket:
+    tier: int
+    waited: float             # seconds spent in the wait queue
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT,
+        max_queue: int = MAX_QUEUE,
+        queue_timeout: float = QUEUE_TIMEOUT,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+
+        self.admitted = [0] * len(TIER_NAMES)
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_waited = 0.0
+
+    def _tier(self) -> int:
+        if not self.max_queue:
+            return FULL
+        occupancy = self.waiting / self.max_queue
+        if occupancy >= ESSENTIAL_AT:
+            return ESSENTIAL
+        if occupancy >= REDUCED_AT:
+            return REDUCED
+        return FULL
+
+    def acquire(self) -> Ticket:
+        """
+        Take a slot, waiting up to queue_timeout. Raises Busy.
+        """
+        with self._cond:
+            # Nobody queued: no barging past waiters
+            if self.active < self.max_concurrent and not self.waiting:
+                self.active += 1
+                tier = self._tier()
+                self.admitted[tier] += 1
+                return Ticket(tier, 0.0)
+
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise Busy("QUEUE_FULL")
+
+            # Tier is decided on arrival, while the queue depth
+            # reflects the load this request is part of
+            tier = self._tier()
+            start = time.monotonic()
+            deadline = start + self.queue_timeout
+            self.waiting += 1
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise Busy("QUEUE_TIMEOUT")
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.active += 1
+            waited = time.monotonic() - start
+            self.max_waited = max(self.max_waited, waited)
+            self.admitted[tier] += 1
+            return Ticket(tier, waited)
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self):
+        ticket = self.acquire()
+        try:
+            yield ticket
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": dict(zip(TIER_NAMES, self.admitted)),
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+                "max_waited_s": round(self.max_waited, 3),
+            }
+
+
+# Slot counts are per process: a forked child starts with a fresh one
+_controller = ProcessSingleton(AdmissionController)
+
+
+def get_controller() -> AdmissionController:
+    return _controller.get()
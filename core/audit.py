@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Tuple
+
+from core.refusal import Refusal
 
 @dataclass(frozen=True)
 class AuditTrail:
@@ -8,4 +10,6 @@ class AuditTrail:
     rules_evaluated: List[str]
     verdict_status: str
     proof_ids: List[str]
-    refusal: Refusal | None
+    refusal: Optional[Refusal]
+    # (stage, seconds) in execution order, from core.spans.SpanRecorder
+    timings: Tuple[Tuple[str, float], ...] = ()
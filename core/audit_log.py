@@ -0,0 +1,298 @@
+# core/audit_log.py
+
+import glob
+import gzip
+import json
+import os
+import threading
+import traceback
+import zlib
+from typing import Iterator, Optional
+
+# =====================================================
+# Segment layout
+# =====================================================
+#
+#   logs/audit.log                    active segment (plain JSONL)
+#   logs/audit.<start_ts>.log         closed, waiting to be sealed
+#   logs/audit.<start_ts>.log.gz      sealed segment
+#   logs/audit.<start_ts>.log.idx     sidecar offset index
+#
+# A sealed segment is a sequence of independent gzip members of about
+# BLOCK_BYTES each (still a valid .gz file for zcat). The index maps
+# every record to (timestamp, event_type, member offset, offset inside
+# the member), so a reader decompresses only the members it needs.
+
+BLOCK_BYTES = 64 * 1024
+INDEX_VERSION = 1
+
+ACTIVE_SEGMENT = "audit.log"
+SEGMENT_PREFIX = "audit."
+SEGMENT_SUFFIX = ".log"
+
+
+def closed_segment_path(log_dir: str, start_ts: int) -> str:
+    """
+    Free path for a closed segment that started at start_ts.
+    """
+    name = f"{SEGMENT_PREFIX}{start_ts}"
+    candidate = os.path.join(log_dir, name + SEGMENT_SUFFIX)
+    n = 1
+    while (
+        os.path.exists(candidate)
+        or os.path.exists(candidate + ".gz")
+    ):
+        candidate = os.path.join(log_dir, f"{name}-{n}{SEGMENT_SUFFIX}")
+        n += 1
+    return candidate
+
+
+def _segment_sort_key(path: str):
+    base = os.path.basename(path)[len(SEGMENT_PREFIX):]
+    base = base.split(SEGMENT_SUFFIX, 1)[0]
+    start, _, seq = base.partition("-")
+    try:
+        return (int(start), int(seq or 0))
+    except ValueError:
+        return (0, 0)
+
+
+def record_key(line: bytes):
+    try:
+        entry = json.loads(line)
+        return int(entry.get("timestamp", 0)), str(entry.get("event_type", ""))
+    except (ValueError, AttributeError):
+        return None
+
+
+# =====================================================
+# Sealing (compression + index)
+# =====================================================
+
+def seal_segment(path: str):
+    """
+    Compress a closed plain segment into gzip members and write
+    its offset index. The plain file is removed only after both
+    outputs are complete.
+
+    Safe to run concurrently from several processes (pre-fork workers
+    recovering the same leftovers): temp files are per process and the
+    outputs are identical, so the last rename wins harmlessly.
+    """
+    gz_path = path + ".gz"
+    idx_path = path + ".idx"
+    tmp_suffix = f".{os.getpid()}.tmp"
+
+    event_types = {}
+    members = []
+    records = []
+    first_ts = None
+    last_ts = None
+
+    try:
+        src = open(path, "rb")
+    except FileNotFoundError:
+        return      # already sealed by another process
+
+    with src, open(gz_path + tmp_suffix, "wb") as dst:
+        block = []
+        block_size = 0
+
+        def write_member():
+            members.append(dst.tell())
+            dst.write(gzip.compress(b"".join(block)))
+
+        for line in src:
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            key = record_key(line)
+            if key is None:
+                continue
+            ts, event_type = key
+
+            if block_size + len(line) > BLOCK_BYTES and block:
+                write_member()
+                block = []
+                block_size = 0
+
+            type_idx = event_types.setdefault(event_type, len(event_types))
+            records.append([ts, type_idx, len(members), block_size])
+            block.append(line)
+            block_size += len(line)
+
+            first_ts = ts if first_ts is None else min(first_ts, ts)
+            last_ts = ts if last_ts is None else max(last_ts, ts)
+
+        if block:
+            write_member()
+
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    index = {
+        "version": INDEX_VERSION,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+        "event_types": list(event_types),
+        "members": members,
+        "records": records,
+    }
+    with open(idx_path + tmp_suffix, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    os.replace(gz_path + tmp_suffix, gz_path)
+    os.replace(idx_path + tmp_suffix, idx_path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def seal_segment_async(path: str) -> threading.Thread:
+    def _seal():
+        try:
+            seal_segment(path)
+        except Exception:
+            traceback.print_exc()
+
+    thread = threading.Thread(target=_seal, name="audit-log-sealer", daemon=True)
+    thread.start()
+    return thread
+
+
+def closed_segments(log_dir: str):
+    """
+    Closed segments that have not been sealed yet (oldest first).
+    """
+    paths = glob.glob(os.path.join(log_dir, f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+    return sorted(paths, key=_segment_sort_key)
+
+
+def sealed_segments(log_dir: str):
+    paths = glob.glob(os.path.join(log_dir, f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}.gz"))
+    return sorted(paths, key=_segment_sort_key)
+
+
+# =====================================================
+# Reader API
+# =====================================================
+
+def _matches(ts, event_type, event_types, since, until):
+    if since is not None and ts < since:
+        return False
+    if until is not None and ts >= until:
+        return False
+    if event_types is not None and event_type not in event_types:
+        return False
+    return True
+
+
+def _read_member(f, offset: int) -> bytes:
+    f.seek(offset)
+    decoder = zlib.decompressobj(wbits=31)
+    chunks = []
+    while not decoder.eof:
+        data = f.read(16 * 1024)
+        if not data:
+            break
+        chunks.append(decoder.decompress(data))
+    return b"".join(chunks)
+
+
+def _read_sealed(gz_path, event_types, since, until):
+    try:
+        with open(gz_path[:-len(".gz")] + ".idx") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    if index["first_ts"] is None:
+        return
+    if since is not None and index["last_ts"] < since:
+        return
+    if until is not None and index["first_ts"] >= until:
+        return
+
+    wanted_types = None
+    if event_types is not None:
+        wanted_types = {
+            i for i, name in enumerate(index["event_types"]) if name in event_types
+        }
+        if not wanted_types:
+            return
+
+    members = index["members"]
+    with open(gz_path, "rb") as f:
+        current_member = None
+        block = b""
+        for ts, type_idx, member, offset in index["records"]:
+            if wanted_types is not None and type_idx not in wanted_types:
+                continue
+            if since is not None and ts < since:
+                continue
+            if until is not None and ts >= until:
+                continue
+
+            if member != current_member:
+                block = _read_member(f, members[member])
+                current_member = member
+
+            end = block.index(b"\n", offset)
+            yield json.loads(block[offset:end])
+
+
+def _read_plain(path, event_types, since, until):
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                ts = int(entry.get("timestamp", 0))
+                event_type = str(entry.get("event_type", ""))
+            except (ValueError, AttributeError):
+                continue
+            if _matches(ts, event_type, event_types, since, until):
+                yield entry
+
+
+def read_events(
+    event_type=None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    log_dir: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Stream audit events oldest first.
+
+    event_type: a single event type or an iterable of them
+    since / until: unix timestamps, half-open range [since, until)
+
+    Sealed segments are filtered through their index and only the
+    gzip members holding matching records are decompressed.
+    """
+    if log_dir is None:
+        from core.logger import LOG_DIR
+        log_dir = LOG_DIR
+
+    if isinstance(event_type, str):
+        event_types = {event_type}
+    elif event_type is not None:
+        event_types = set(event_type)
+    else:
+        event_types = None
+
+    for gz_path in sealed_segments(log_dir):
+        # A plain copy still present means sealing did not finish
+        if os.path.exists(gz_path[:-len(".gz")]):
+            continue
+        yield from _read_sealed(gz_path, event_types, since, until)
+
+    for path in closed_segments(log_dir):
+        yield from _read_plain(path, event_types, since, until)
+
+    yield from _read_plain(
+        os.path.join(log_dir, ACTIVE_SEGMENT), event_types, since, until
+    )
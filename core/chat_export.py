@@ -0,0 +1,282 @@
+# core/chat_export.py
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from core import chat_history, fact_codec
+from core.chat_query import get_read_pool, _as_timestamp
+from core.redaction import redact_text
+
+# =====================================================
+# Export
+# =====================================================
+
+BATCH_SIZE = 1000                 # rows per fetchmany()
+READ_CHUNK = 64 * 1024            # chars per read() when importing
+
+CSV_COLUMNS = [
+    "id", "timestamp", "user_input", "verdict_type", "extracted_facts", "verdict",
+]
+
+
+def _iter_rows(since, until, verdict_type, after_id, batch_size, db_path):
+    """
+    Stream (id, timestamp, user_input, verdict_type, facts, verdict_json)
+    in id order through a cursor, batch_size rows at a time.
+    """
+    sql = [
+        "SELECT c.id, c.timestamp, c.user_input, c.verdict_type, c.facts, s.verdict",
+        "FROM chat_history AS c",
+        "JOIN verdict_signature AS s ON s.id = c.signature_id",
+        "WHERE c.id > ?",
+    ]
+    params = [after_id or 0]
+    if verdict_type is not None:
+        sql.append("AND c.verdict_type = ?")
+        params.append(verdict_type)
+    if since is not None:
+        sql.append("AND c.timestamp >= ?")
+        params.append(_as_timestamp(since))
+    if until is not None:
+        sql.append("AND c.timestamp < ?")
+        params.append(_as_timestamp(until))
+    sql.append("ORDER BY c.id")
+
+    cursor = get_read_pool(db_path).connection().execute("\n".join(sql), params)
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            for chat_id, timestamp, user_input, vtype, facts, verdict in batch:
+                # Rows stored before redaction existed are masked on the way out
+                yield (
+                    chat_id, timestamp, redact_text(user_input), vtype,
+                    fact_codec.decode(facts), verdict,
+                )
+    finally:
+        cursor.close()
+
+
+def export_chats(
+    out,
+    fmt: str = "ndjson",
+    since=None,
+    until=None,
+    verdict_type: str = None,
+    after_id: int = 0,
+    batch_size: int = BATCH_SIZE,
+    db_path=None,
+    header: bool = None,
+) -> int:
+    """
+    Write matching interactions to the text stream out as NDJSON or CSV,
+    oldest first. Memory use is bounded by batch_size, whatever the
+    history size. Returns the last exported id (the next watermark),
+    or after_id if nothing matched.
+
+    The CSV header is written when header is true; by default only for
+    a full export (after_id 0), not when appending to an earlier one.
+    """
+    if fmt not in ("ndjson", "csv"):
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    last_id = after_id or 0
+    rows = _iter_rows(since, until, verdict_type, after_id, batch_size, db_path)
+
+    if fmt == "csv":
+        writer = csv.writer(out)
+        if header if header is not None else not after_id:
+            writer.writerow(CSV_COLUMNS)
+        for chat_id, timestamp, user_input, vtype, facts, verdict in rows:
+            writer.writerow([
+                chat_id, timestamp, user_input, vtype,
+                json.dumps(facts, ensure_ascii=False), verdict,
+            ])
+            last_id = chat_id
+        return last_id
+
+    for chat_id, timestamp, user_input, vtype, facts, verdict in rows:
+        # verdict is already JSON text: splice it in instead of re-encoding
+        out.write(
+            '{"id": %d, "timestamp": %s, "user_input": %s, "verdict_type": %s, '
+            '"extracted_facts": %s, "verdict": %s}\n' % (
+                chat_id,
+                json.dumps(timestamp),
+                json.dumps(user_input, ensure_ascii=False),
+                json.dumps(vtype),
+                json.dumps(facts, ensure_ascii=False),
+                verdict,
+            )
+        )
+        last_id = chat_id
+    return last_id
+
+
+def read_watermark(path) -> int:
+    try:
+        with open(path) as f:
+            return int(json.load(f)["last_id"])
+    except FileNotFoundError:
+        return 0
+
+
+def write_watermark(path, last_id: int):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"last_id": last_id}, f)
+    os.replace(tmp, path)
+
+
+# =====================================================
+# Legacy chat_history.json import
+# =====================================================
+
+def iter_json_array(f, chunk_size: int = READ_CHUNK):
+    """
+    Yield the elements of a top-level JSON array from a text stream,
+    holding only the current element (plus one chunk) in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = buf[pos:] + f.read(chunk_size), 0
+            eof = len(buf) == 0
+
+        if pos >= len(buf):
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            more = f.read(chunk_size)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+
+        yield item
+        buf, pos = buf[end:], 0
+
+
+def import_legacy_json(path, db_path=None) -> int:
+    """
+    Import a legacy logs/chat_history.json array into SQLite, keeping
+    the original timestamps. Rows already present (same timestamp and
+    input) are skipped, so re-running an import is harmless.
+    Returns the number of rows imported; raises RuntimeError if the
+    writer failed to commit any of them.
+    """
+    own_writer = db_path is not None and str(db_path) != str(chat_history.DB_PATH)
+    if own_writer:
+        writer = chat_history.ChatHistoryWriter(db_path)
+    else:
+        writer = chat_history.get_writer()
+    conn = get_read_pool(db_path).connection()
+
+    failed_before = writer.failed
+    imported = 0
+    with open(path, encoding="utf-8") as f:
+        for entry in iter_json_array(f):
+            timestamp = entry["timestamp"]
+            user_input = redact_text(entry["user_input"].strip())
+            exists = conn.execute(
+                "SELECT 1 FROM chat_history WHERE timestamp = ? AND user_input = ?",
+                (timestamp, user_input)
+            ).fetchone()
+            if exists:
+                continue
+            verdict = entry.get("verdict", entry.get("system_verdict", {}))
+            writer.save(chat_history.ChatRow(timestamp, user_input, entry["extracted_facts"], verdict))
+            imported += 1
+
+    writer.flush()
+    failed = writer.failed - failed_before
+    if own_writer:
+        writer.close()
+    if failed:
+        raise RuntimeError(f"{failed} of {imported} imported interactions were not written")
+    return imported
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chat history export / import")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="stream interactions to NDJSON or CSV")
+    exp.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    exp.add_argument("--out", default="-", help="output file (default: stdout)")
+    exp.add_argument("--since", help="ISO timestamp, inclusive")
+    exp.add_argument("--until", help="ISO timestamp, exclusive")
+    exp.add_argument("--verdict-type")
+    exp.add_argument("--watermark", help="file holding the last exported id")
+    exp.add_argument("--db", default=None)
+
+    imp = sub.add_parser("import-legacy", help="import a chat_history.json array")
+    imp.add_argument("path")
+    imp.add_argument("--db", default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import-legacy":
+        count = import_legacy_json(args.path, args.db)
+        print(f"Imported {count} interactions", file=sys.stderr)
+        return
+
+    after_id = read_watermark(args.watermark) if args.watermark else 0
+    if args.out == "-":
+        out = sys.stdout
+    else:
+        # Incremental exports append to the same file
+        out = open(args.out, "a" if after_id else "w", newline="", encoding="utf-8")
+    # A new (or empty) file gets the CSV header even on an incremental run
+    header = not after_id or (out is not sys.stdout and out.tell() == 0)
+    try:
+        last_id = export_chats(
+            out,
+            fmt=args.format,
+            since=args.since,
+            until=args.until,
+            verdict_type=args.verdict_type,
+            after_id=after_id,
+            db_path=args.db,
+            header=header,
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.watermark:
+        write_watermark(args.watermark, last_id)
+
+
+if __name__ == "__main__":
+    main()
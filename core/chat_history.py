@@ -1,59 +1,691 @@
 # core/chat_history.py
 
+import hashlib
+import queue
 import sqlite3
 import json
+import threading
+import time
+import traceback
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple, Optional
+
+from core import fact_codec, similar_cases, verdict_json
+from core.process_local import STOP, FlushRequest, ProcessSingleton
+from core.redaction import redact_text
 
 # =====================================================
 # Database setup
 # =====================================================
 
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
 
 DB_PATH = LOG_DIR / "chat_history.db"
 
-# Single shared connection (safe for Streamlit)
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+# Write-behind tuning
+QUEUE_SIZE = 10_000       # interactions buffered in memory
+BATCH_SIZE = 200          # rows per grouped transaction
+MAX_LATENCY = 0.25        # max seconds a saved chat waits for its commit
+
+# WAL + NORMAL: commits survive an application crash; only the last
+# transactions can be lost on power failure. No fsync per commit.
+SYNCHRONOUS = "NORMAL"
+
+
+def connect(db_path=DB_PATH) -> sqlite3.Connection:
+    """
+    Open a writer connection and make sure the schema exists.
+    """
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    _init_db(conn)
+    return conn
+
+
+# =====================================================
+# Schema migrations (tracked in PRAGMA user_version)
+# =====================================================
+
+# Daily rollups of verdict types and fired items, recomputed from
+# history. Also run by rebuild_rollups(); RowEncoder.insert keeps them
+# current afterwards.
+ROLLUP_REBUILD = """
+    DELETE FROM rollup_verdict_daily;
+    DELETE FROM rollup_item_daily;
+
+    INSERT INTO rollup_verdict_daily (day, verdict_type, count)
+        SELECT substr(timestamp, 1, 10), COALESCE(verdict_type, 'UNKNOWN'), COUNT(*)
+        FROM chat_history
+        GROUP BY 1, 2;
+
+    INSERT INTO rollup_item_daily (day, item_code, verdict_type, count)
+        SELECT substr(f.timestamp, 1, 10), f.item_code,
+               COALESCE(c.verdict_type, 'UNKNOWN'), COUNT(*)
+        FROM chat_fired AS f
+        JOIN chat_history AS c ON c.id = f.chat_id
+        GROUP BY 1, 2, 3;
+"""
+
+# Migrations are append-only: never edit one that has shipped.
+MIGRATIONS = [
+    # 1 — original table
+    """
+    CREATE TABLE IF NOT EXISTS chat_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        user_input TEXT NOT NULL,
+        extracted_facts TEXT NOT NULL,
+        verdict TEXT NOT NULL
+    );
+    """,
+
+    # 2 — verdict_type column, side table of fired rights / duties
+    #     (kind: RIGHT | DUTY | PROCEDURAL), query indexes
+    """
+    ALTER TABLE chat_history ADD COLUMN verdict_type TEXT;
+
+    UPDATE chat_history
+    SET verdict_type = json_extract(verdict, '$.verdict_type');
+
+    CREATE TABLE chat_fired (
+        chat_id INTEGER NOT NULL REFERENCES chat_history (id),
+        timestamp TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        item_id TEXT NOT NULL
+    );
+
+    INSERT INTO chat_fired (chat_id, timestamp, kind, item_id)
+        SELECT c.id, c.timestamp, 'RIGHT', json_extract(j.value, '$.id')
+        FROM chat_history AS c, json_each(c.verdict, '$.primary_violations') AS j
+        UNION ALL
+        SELECT c.id, c.timestamp, 'DUTY', json_extract(j.value, '$.id')
+        FROM chat_history AS c, json_each(c.verdict, '$.imc_duties') AS j
+        UNION ALL
+        SELECT c.id, c.timestamp, 'PROCEDURAL', json_extract(j.value, '$.id')
+        FROM chat_history AS c, json_each(c.verdict, '$.procedural_remedies') AS j;
+
+    CREATE TRIGGER chat_history_fired AFTER INSERT ON chat_history
+    BEGIN
+        INSERT INTO chat_fired (chat_id, timestamp, kind, item_id)
+            SELECT NEW.id, NEW.timestamp, 'RIGHT', json_extract(value, '$.id')
+            FROM json_each(NEW.verdict, '$.primary_violations')
+            UNION ALL
+            SELECT NEW.id, NEW.timestamp, 'DUTY', json_extract(value, '$.id')
+            FROM json_each(NEW.verdict, '$.imc_duties')
+            UNION ALL
+            SELECT NEW.id, NEW.timestamp, 'PROCEDURAL', json_extract(value, '$.id')
+            FROM json_each(NEW.verdict, '$.procedural_remedies');
+    END;
+
+    CREATE INDEX chat_history_timestamp
+        ON chat_history (timestamp);
+    CREATE INDEX chat_history_verdict_type
+        ON chat_history (verdict_type, timestamp);
+    CREATE INDEX chat_fired_item
+        ON chat_fired (item_id, timestamp, chat_id);
+    """,
+
+    # 3 — compact storage (see _migrate_compact_storage)
+    lambda conn: _migrate_compact_storage(conn),
+
+    # 4 — per-day counters for dashboards, backfilled from history
+    """
+    CREATE TABLE rollup_verdict_daily (
+        day TEXT NOT NULL,
+        verdict_type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, verdict_type)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE rollup_item_daily (
+        day TEXT NOT NULL,
+        item_code INTEGER NOT NULL,
+        verdict_type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, item_code, verdict_type)
+    ) WITHOUT ROWID;
+    """ + ROLLUP_REBUILD,
+
+    # 5 — fact-pattern LSH index (see core/similar_cases.py)
+    lambda conn: _migrate_similar_cases(conn),
+
+    # 6 — link to the interaction's AUDIT_TRAIL event in the audit log
+    """
+    ALTER TABLE chat_history ADD COLUMN query_id TEXT;
+
+    CREATE INDEX chat_history_query_id
+        ON chat_history (query_id) WHERE query_id IS NOT NULL;
+    """,
+]
+
+
+# =====================================================
+# Compact row encoding
+# =====================================================
+#
+# Facts are stored as a packed bitmask (core/fact_codec.py). A verdict
+# is stored once in verdict_signature and referenced by id; the fired
+# rights / duties of a signature live in signature_item. chat_fired
+# keeps one (item_code, timestamp, chat_id) key per fired item for
+# indexed "which chats fired X" queries.
+
+COMPACT_SCHEMA = """
+    CREATE TABLE verdict_signature (
+        id INTEGER PRIMARY KEY,
+        digest BLOB NOT NULL UNIQUE,
+        verdict_type TEXT,
+        verdict TEXT NOT NULL
+    );
+
+    CREATE TABLE fired_item (
+        code INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        item_id TEXT NOT NULL UNIQUE
+    );
+
+    CREATE TABLE signature_item (
+        signature_id INTEGER NOT NULL,
+        item_code INTEGER NOT NULL,
+        PRIMARY KEY (signature_id, item_code)
+    ) WITHOUT ROWID;
+"""
+
+# verdict section -> fired_item.kind
+FIRED_SECTIONS = {
+    "primary_violations": "RIGHT",
+    "imc_duties": "DUTY",
+    "procedural_remedies": "PROCEDURAL",
+}
+
+SIGNATURE_CACHE_SIZE = 100_000
+
+# Rollup key for rows without a verdict_type
+UNKNOWN_VERDICT = "UNKNOWN"
+
+
+class RowEncoder:
+    """
+    Turns (timestamp, user_input, facts, verdict) into compact rows.
+    Owned by one thread; caches verdict signatures and item codes.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._signatures = {}       # digest -> (signature_id, item codes)
+        self._item_codes = {}       # item_id -> code
+        self._known_masks = set()   # fact patterns already in the LSH index
+
+    def reset(self):
+        """
+        Forget cached ids; call after a rolled-back insert, whose new
+        signatures, items and patterns were never committed.
+        """
+        self._signatures.clear()
+        self._item_codes.clear()
+        self._known_masks.clear()
+
+    def _item_code(self, kind, item_id):
+        code = self._item_codes.get(item_id)
+        if code is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO fired_item (kind, item_id) VALUES (?, ?)",
+                (kind, item_id)
+            )
+            code = self.conn.execute(
+                "SELECT code FROM fired_item WHERE item_id = ?", (item_id,)
+            ).fetchone()[0]
+            self._item_codes[item_id] = code
+        return code
+
+    def signature(self, verdict_json: str, verdict):
+        digest = hashlib.blake2b(verdict_json.encode("utf-8"), digest_size=16).digest()
+        cached = self._signatures.get(digest)
+        if cached is not None:
+            return cached
+
+        verdict_type = verdict.get("verdict_type") if isinstance(verdict, dict) else None
+        self.conn.execute(
+            """
+            INSERT OR IGNORE INTO verdict_signature (digest, verdict_type, verdict)
+            VALUES (?, ?, ?)
+            """,
+            (digest, verdict_type, verdict_json)
+        )
+        signature_id = self.conn.execute(
+            "SELECT id FROM verdict_signature WHERE digest = ?", (digest,)
+        ).fetchone()[0]
+
+        codes = []
+        if isinstance(verdict, dict):
+            for section, kind in FIRED_SECTIONS.items():
+                for item in verdict.get(section) or []:
+                    if isinstance(item, dict) and item.get("id"):
+                        codes.append(self._item_code(kind, item["id"]))
+        codes = tuple(dict.fromkeys(codes))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO signature_item (signature_id, item_code) VALUES (?, ?)",
+            [(signature_id, code) for code in codes]
+        )
+
+        if len(self._signatures) >= SIGNATURE_CACHE_SIZE:
+            self._signatures.clear()
+        self._signatures[digest] = (signature_id, codes)
+        return signature_id, codes
+
+    def insert(self, rows):
+        """
+        Insert [(timestamp, user_input, facts, verdict, verdict_json, query_id)]
+        inside the caller's transaction. Ids are assigned here (single
+        writer) so chat_fired keys can be written with executemany.
+        """
+        next_id = self.conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'chat_history'"
+        ).fetchone()[0] + 1
+        next_id = max(next_id, self.conn.execute(
+            "SELECT COALESCE(MAX(id), 0) + 1 FROM chat_history"
+        ).fetchone()[0])
+
+        chats = []
+        fired = []
+        patterns = []
+        verdict_counts = Counter()
+        item_counts = Counter()
+        for offset, row in enumerate(rows):
+            timestamp, user_input, facts, verdict, verdict_json, query_id = row
+            chat_id = next_id + offset
+            signature_id, codes = self.signature(verdict_json, verdict)
+            verdict_type = verdict.get("verdict_type") if isinstance(verdict, dict) else None
+            chats.append((
+                chat_id, timestamp, user_input,
+                fact_codec.encode(facts), signature_id, verdict_type, query_id,
+            ))
+            fired.extend((code, timestamp, chat_id) for code in codes)
+            patterns.append((chat_id, similar_cases.pattern_mask(facts)))
+
+            day = timestamp[:10]
+            rollup_type = verdict_type or UNKNOWN_VERDICT
+            verdict_counts[day, rollup_type] += 1
+            for code in codes:
+                item_counts[day, code, rollup_type] += 1
+
+        self.conn.executemany(
+            """
+            INSERT INTO chat_history (
+                id, timestamp, user_input, facts, signature_id, verdict_type, query_id
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            chats
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO chat_fired (item_code, timestamp, chat_id) VALUES (?, ?, ?)",
+            fired
+        )
+
+        # Rollups commit (or roll back) together with the rows above
+        self.conn.executemany(
+            """
+            INSERT INTO rollup_verdict_daily (day, verdict_type, count)
+            VALUES (?, ?, ?)
+            ON CONFLICT (day, verdict_type)
+            DO UPDATE SET count = count + excluded.count
+            """,
+            [(day, vtype, n) for (day, vtype), n in verdict_counts.items()]
+        )
+        self.conn.executemany(
+            """
+            INSERT INTO rollup_item_daily (day, item_code, verdict_type, count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (day, item_code, verdict_type)
+            DO UPDATE SET count = count + excluded.count
+            """,
+            [(day, code, vtype, n) for (day, code, vtype), n in item_counts.items()]
+        )
+
+        if len(self._known_masks) >= SIGNATURE_CACHE_SIZE:
+            self._known_masks.clear()
+        similar_cases.index_chats(self.conn, patterns, self._known_masks)
+        return chats
+
 
-def _init_db():
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS chat_history (
+def _migrate_compact_storage(conn):
+    """
+    Rebuild chat_history with packed facts and verdict signatures.
+    Ids and timestamps are preserved.
+    """
+    _execute_script(conn, COMPACT_SCHEMA)
+    _execute_script(conn, """
+        CREATE TABLE chat_history_compact (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             timestamp TEXT NOT NULL,
             user_input TEXT NOT NULL,
-            extracted_facts TEXT NOT NULL,
-            verdict TEXT NOT NULL
+            facts BLOB NOT NULL,
+            signature_id INTEGER NOT NULL REFERENCES verdict_signature (id),
+            verdict_type TEXT
+        );
+
+        CREATE TABLE chat_fired_compact (
+            item_code INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            PRIMARY KEY (item_code, timestamp, chat_id)
+        ) WITHOUT ROWID;
+    """)
+
+    encoder = RowEncoder(conn)
+    cursor = conn.execute(
+        "SELECT id, timestamp, user_input, extracted_facts, verdict "
+        "FROM chat_history ORDER BY id"
+    )
+    while True:
+        batch = cursor.fetchmany(1000)
+        if not batch:
+            break
+        chats = []
+        fired = []
+        for chat_id, timestamp, user_input, facts_json, verdict_json in batch:
+            verdict = json.loads(verdict_json)
+            signature_id, codes = encoder.signature(verdict_json, verdict)
+            chats.append((
+                chat_id, timestamp, user_input,
+                fact_codec.encode(json.loads(facts_json)), signature_id,
+                verdict.get("verdict_type") if isinstance(verdict, dict) else None,
+            ))
+            fired.extend((code, timestamp, chat_id) for code in codes)
+        conn.executemany(
+            "INSERT INTO chat_history_compact VALUES (?, ?, ?, ?, ?, ?)", chats
         )
+        conn.executemany(
+            "INSERT OR IGNORE INTO chat_fired_compact VALUES (?, ?, ?)", fired
+        )
+
+    _execute_script(conn, """
+        DROP TRIGGER chat_history_fired;
+        DROP TABLE chat_fired;
+        DROP TABLE chat_history;
+        ALTER TABLE chat_history_compact RENAME TO chat_history;
+        ALTER TABLE chat_fired_compact RENAME TO chat_fired;
+
+        CREATE INDEX chat_history_timestamp
+            ON chat_history (timestamp);
+        CREATE INDEX chat_history_verdict_type
+            ON chat_history (verdict_type, timestamp);
     """)
-    conn.commit()
 
-_init_db()
+
+def _migrate_similar_cases(conn):
+    """
+    Create the LSH index tables and index every stored chat.
+    """
+    _execute_script(conn, similar_cases.SCHEMA)
+    known_masks = set()
+    cursor = conn.execute("SELECT id, facts FROM chat_history ORDER BY id")
+    while True:
+        batch = cursor.fetchmany(1000)
+        if not batch:
+            break
+        similar_cases.index_chats(
+            conn,
+            [(chat_id, similar_cases.pattern_mask(fact_codec.decode(facts)))
+             for chat_id, facts in batch],
+            known_masks,
+        )
+
+
+def _execute_script(conn, script: str):
+    """
+    Run a multi-statement script inside the current transaction
+    (executescript() would commit it first).
+    """
+    statement = ""
+    for piece in script.split(";"):
+        statement += piece + ";"
+        # A ";" inside a trigger body or a literal does not end the statement
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \n;"):
+                conn.execute(statement)
+            statement = ""
+
+
+def _init_db(conn):
+    """
+    Apply pending migrations, each in its own transaction.
+    A migration is either an SQL script or a function of the connection.
+
+    Several processes may open the database at once (pre-fork workers),
+    so each step takes the write lock and re-reads user_version first.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+
+    rebuilt = False
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                break
+            migration = MIGRATIONS[version]
+            if callable(migration):
+                migration(conn)
+                rebuilt = True
+            else:
+                _execute_script(conn, migration)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    if rebuilt:
+        # Give the space of the rebuilt tables back to the filesystem
+        conn.execute("VACUUM")
+
+
+class ChatRow(NamedTuple):
+    """
+    One queued interaction. Every producer (save_chat, the legacy
+    importer) builds this, so the writer's field list cannot drift.
+    """
+    timestamp: str
+    user_input: str
+    facts: dict
+    verdict: dict
+    query_id: Optional[str] = None
+    payload: Optional[bytes] = None     # canonical verdict JSON, if assembled
+
+
+class ChatHistoryWriter:
+    """
+    Single writer thread that owns the SQLite connection.
+
+    save() only enqueues. The thread groups queued rows into one
+    transaction (executemany + one commit) when BATCH_SIZE rows are
+    waiting or the oldest has waited MAX_LATENCY seconds.
+    """
+
+    def __init__(
+        self,
+        db_path=DB_PATH,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        max_latency: float = MAX_LATENCY,
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+
+        self.written = 0
+        self.failed = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._ready = threading.Event()
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="chat-history-writer", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def save(self, row: ChatRow):
+        self._queue.put(row)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Block until every row saved before this call is committed.
+        """
+        if self._closed:
+            return True
+        request = FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+    def _run(self):
+        try:
+            conn = connect(self.db_path)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        encoder = RowEncoder(conn)
+        self._ready.set()
+
+        while True:
+            rows = []
+            flush_requests = []
+            stop = False
+
+            item = self._queue.get()
+            deadline = time.monotonic() + self.max_latency
+
+            while True:
+                if item is STOP:
+                    stop = True
+                elif isinstance(item, FlushRequest):
+                    flush_requests.append(item)
+                else:
+                    rows.append(item)
+
+                if stop or flush_requests or len(rows) >= self.batch_size:
+                    break
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+
+            if rows:
+                self._write(encoder, rows)
+            for request in flush_requests:
+                request.done.set()
+            if stop:
+                conn.close()
+                return
+
+    def _write(self, encoder, rows):
+        conn = encoder.conn
+        try:
+            # IMMEDIATE: take the write lock before insert() reads the
+            # next id, so writers in other processes cannot interleave
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Canonical bytes, usually assembled once upstream
+                # and shared with the other sinks (core/verdict_json.py)
+                encoder.insert([
+                    (row.timestamp, row.user_input, row.facts, row.verdict,
+                     (row.payload or verdict_json.verdict(row.verdict)).decode("utf-8"),
+                     row.query_id)
+                    for row in rows
+                ])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            self.written += len(rows)
+        except Exception:
+            traceback.print_exc()
+            encoder.reset()
+            self.failed += len(rows)
+
+
+_writer = ProcessSingleton(ChatHistoryWriter, close_at_exit=True)
+
+
+def get_writer() -> ChatHistoryWriter:
+    return _writer.get()
+
 
 # =====================================================
 # Public logging API (USED BY UI)
 # =====================================================
 
-def save_chat(user_input: str, facts: dict, verdict: dict):
+def save_chat(
+    user_input: str,
+    facts: dict,
+    verdict: dict,
+    query_id: str = None,
+    payload: bytes = None,
+):
     """
-    Persist a single user interaction to SQLite.
+    Queue a single user interaction for persistence to SQLite.
+    Returns immediately; the row is committed within MAX_LATENCY.
+    PII in user_input is masked before it is queued. query_id links
+    the row to the interaction's AUDIT_TRAIL event; payload is the
+    verdict's canonical JSON if already assembled.
     """
-    conn.execute(
-        """
-        INSERT INTO chat_history (
-            timestamp,
-            user_input,
-            extracted_facts,
-            verdict
-        )
-        VALUES (?, ?, ?, ?)
-        """,
-        (
-            datetime.utcnow().isoformat(),
-            user_input.strip(),
-            json.dumps(facts, ensure_ascii=False),
-            json.dumps(verdict, ensure_ascii=False),
-        )
-    )
-    conn.commit()
+    get_writer().save(ChatRow(
+        datetime.utcnow().isoformat(),
+        redact_text(user_input.strip()),
+        facts,
+        verdict,
+        query_id,
+        payload,
+    ))
+
+
+def rebuild_rollups(db_path=DB_PATH):
+    """
+    Recompute the daily rollup tables from the full history. Only
+    needed after editing rows by hand; inserts keep them current.
+    Runs in one transaction, so concurrent writer batches are counted
+    exactly once (before the rebuild, or upserted after it).
+    """
+    conn = connect(db_path)
+    try:
+        conn.executescript(f"BEGIN;\n{ROLLUP_REBUILD}\nCOMMIT;")
+    finally:
+        conn.close()
+
+
+def flush_chats(timeout: float = None) -> bool:
+    """
+    Wait until every queued interaction is committed.
+    """
+    writer = _writer.peek()
+    if writer is None:
+        return True
+    return writer.flush(timeout)
@@ -0,0 +1,438 @@
+# core/chat_query.py
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core import chat_history, fact_codec, similar_cases
+from core.process_local import ProcessSingleton
+
+# =====================================================
+# Result types
+# =====================================================
+
+@dataclass(frozen=True)
+class ChatRecord:
+    id: int
+    timestamp: str
+    user_input: str
+    facts: dict
+    verdict: dict
+    verdict_type: Optional[str]
+    query_id: Optional[str] = None      # AUDIT_TRAIL event of the interaction
+
+
+# Keyset cursor: (timestamp, id) of the last record on a page
+Cursor = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class ChatPage:
+    records: List[ChatRecord]
+    next_cursor: Optional[Cursor]     # None on the last page
+
+
+# =====================================================
+# Read-only connection pool
+# =====================================================
+
+MAX_READ_CONNECTIONS = 8
+HEALTH_CHECK_INTERVAL = 30.0     # seconds between liveness checks
+ACQUIRE_TIMEOUT = 10.0           # seconds to wait for a free slot
+
+
+class ReadPool:
+    """
+    Read-only connections to the chat history database, one per thread.
+
+    Connections are opened with a mode=ro URI and PRAGMA query_only, so
+    reporting code cannot write. With the database in WAL mode readers
+    never block the single writer (core.chat_history) and vice versa.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        max_connections: int = MAX_READ_CONNECTIONS,
+        health_check_interval: float = HEALTH_CHECK_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+
+        self._local = threading.local()
+        self._lock = threading.Condition()
+        self._connections = {}          # thread ident -> connection
+        self._migrated = False
+
+    def _open(self) -> sqlite3.Connection:
+        if not self._migrated:
+            # Bring the schema up to date through the writer-side
+            # migration path once, before going read-only.
+            chat_history.connect(self.db_path).close()
+            self._migrated = True
+
+        # Only the owning thread queries it; other threads may close it
+        conn = sqlite3.connect(
+            f"file:{Path(self.db_path).as_posix()}?mode=ro",
+            uri=True,
+            timeout=30,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    def _reap_dead_threads(self):
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._connections if i not in alive]:
+            self._connections.pop(ident).close()
+
+    def _acquire_slot(self):
+        with self._lock:
+            deadline = time.monotonic() + ACQUIRE_TIMEOUT
+            while len(self._connections) >= self.max_connections:
+                self._reap_dead_threads()
+                if len(self._connections) < self.max_connections:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError("Chat history read pool exhausted")
+                self._lock.wait(min(remaining, 0.1))
+
+            conn = self._open()
+            self._connections[threading.get_ident()] = conn
+            return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        This thread's connection, opened or health-checked as needed.
+        """
+        conn = getattr(self._local, "conn", None)
+        now = time.monotonic()
+
+        if conn is not None and now - self._local.checked >= self.health_check_interval:
+            try:
+                conn.execute("SELECT 1").fetchone()
+                self._local.checked = now
+            except sqlite3.Error:
+                self.release()
+                conn = None
+
+        if conn is None:
+            conn = self._acquire_slot()
+            self._local.conn = conn
+            self._local.checked = now
+        return conn
+
+    def release(self):
+        """
+        Close this thread's connection and free its slot.
+        """
+        with self._lock:
+            conn = self._connections.pop(threading.get_ident(), None)
+            self._lock.notify()
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+            self._lock.notify_all()
+        self._local = threading.local()
+
+    def stats(self) -> dict:
+        return {
+            "open": len(self._connections),
+            "max": self.max_connections,
+        }
+
+
+# db_path -> ReadPool; SQLite connections must not cross a fork
+_pools = ProcessSingleton(dict)
+
+
+def get_read_pool(db_path=None) -> ReadPool:
+    db_path = str(db_path or chat_history.DB_PATH)
+    pools = _pools.get()
+    pool = pools.get(db_path)
+    if pool is None:
+        # ReadPool() opens nothing; setdefault keeps the first one
+        pool = pools.setdefault(db_path, ReadPool(db_path))
+    return pool
+
+
+def _as_day(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    raise TypeError(f"Expected date or ISO string, got {type(value).__name__}")
+
+
+def _as_timestamp(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Expected datetime or ISO string, got {type(value).__name__}")
+
+
+# =====================================================
+# Query API
+# =====================================================
+
+def query_chats(
+    verdict_type: str = None,
+    item_id: str = None,
+    since=None,
+    until=None,
+    after: Cursor = None,
+    limit: int = 100,
+    db_path=None,
+) -> ChatPage:
+    """
+    One page of interactions, oldest first.
+
+    verdict_type: e.g. "PROVABLE"
+    item_id:      a fired right / duty id, e.g. "RIGHT_TO_EMERGENCY_MEDICAL_CARE"
+    since/until:  datetime or ISO string, half-open range [since, until)
+    after:        next_cursor of the previous page
+
+    Every filter combination is served from an index ordered by
+    (timestamp, id), so a page costs O(limit) at any table size.
+    Records sharing a verdict signature share one verdict dict; treat
+    it as read-only.
+    """
+    since = _as_timestamp(since)
+    until = _as_timestamp(until)
+
+    if item_id is not None:
+        # Driven by the chat_fired primary key (item_code, timestamp, chat_id)
+        sql = [
+            "SELECT c.id, c.timestamp, c.user_input, c.facts,",
+            "       c.signature_id, s.verdict, c.verdict_type, c.query_id",
+            "FROM chat_fired AS f",
+            "JOIN chat_history AS c ON c.id = f.chat_id",
+            "JOIN verdict_signature AS s ON s.id = c.signature_id",
+            "WHERE f.item_code = (SELECT code FROM fired_item WHERE item_id = ?)",
+        ]
+        params = [item_id]
+        ts, row_id = "f.timestamp", "f.chat_id"
+        if verdict_type is not None:
+            sql.append("AND c.verdict_type = ?")
+            params.append(verdict_type)
+    else:
+        sql = [
+            "SELECT c.id, c.timestamp, c.user_input, c.facts,",
+            "       c.signature_id, s.verdict, c.verdict_type, c.query_id",
+            "FROM chat_history AS c",
+            "JOIN verdict_signature AS s ON s.id = c.signature_id",
+            "WHERE 1 = 1",
+        ]
+        params = []
+        ts, row_id = "c.timestamp", "c.id"
+        if verdict_type is not None:
+            sql.append("AND c.verdict_type = ?")
+            params.append(verdict_type)
+
+    if since is not None:
+        sql.append(f"AND {ts} >= ?")
+        params.append(since)
+    if until is not None:
+        sql.append(f"AND {ts} < ?")
+        params.append(until)
+    if after is not None:
+        sql.append(f"AND ({ts}, {row_id}) > (?, ?)")
+        params.extend(after)
+
+    sql.append(f"ORDER BY {ts}, {row_id} LIMIT ?")
+    params.append(limit)
+
+    conn = get_read_pool(db_path).connection()
+    rows = conn.execute("\n".join(sql), params).fetchall()
+
+    # Rows sharing a verdict signature share one parsed verdict dict
+    verdicts = {}
+    records = []
+    for chat_id, timestamp, user_input, facts, signature_id, verdict, vtype, query_id in rows:
+        if signature_id not in verdicts:
+            verdicts[signature_id] = json.loads(verdict)
+        records.append(ChatRecord(
+            id=chat_id,
+            timestamp=timestamp,
+            user_input=user_input,
+            facts=fact_codec.decode(facts),
+            verdict=verdicts[signature_id],
+            verdict_type=vtype,
+            query_id=query_id,
+        ))
+    next_cursor = None
+    if len(records) == limit:
+        next_cursor = (records[-1].timestamp, records[-1].id)
+    return ChatPage(records, next_cursor)
+
+
+def _load_records(conn, ids) -> List[ChatRecord]:
+    """
+    ChatRecords for ids, in the order given.
+    """
+    if not ids:
+        return []
+    placeholders = ", ".join("?" for _ in ids)
+    rows = conn.execute(
+        f"""
+        SELECT c.id, c.timestamp, c.user_input, c.facts,
+               c.signature_id, s.verdict, c.verdict_type, c.query_id
+        FROM chat_history AS c
+        JOIN verdict_signature AS s ON s.id = c.signature_id
+        WHERE c.id IN ({placeholders})
+        """,
+        list(ids)
+    ).fetchall()
+
+    verdicts = {}
+    by_id = {}
+    for chat_id, timestamp, user_input, facts, signature_id, verdict, vtype, query_id in rows:
+        if signature_id not in verdicts:
+            verdicts[signature_id] = json.loads(verdict)
+        by_id[chat_id] = ChatRecord(
+            id=chat_id,
+            timestamp=timestamp,
+            user_input=user_input,
+            facts=fact_codec.decode(facts),
+            verdict=verdicts[signature_id],
+            verdict_type=vtype,
+            query_id=query_id,
+        )
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def similar_chats(
+    facts: dict,
+    k: int = 10,
+    min_similarity: float = 0.0,
+    exclude_id: int = None,
+    db_path=None,
+) -> List[Tuple[float, ChatRecord]]:
+    """
+    Top-k past interactions whose "yes" facts are most similar to
+    facts, as (Jaccard similarity, record), best first; among equally
+    similar chats the most recent come first.
+
+    Candidates come from the LSH index (core/similar_cases.py), so
+    patterns below ~0.3 similarity may be missed.
+    """
+    conn = get_read_pool(db_path).connection()
+    mask = similar_cases.pattern_mask(facts)
+
+    picked = []
+    for similarity, pattern in similar_cases.ranked_patterns(conn, mask, min_similarity):
+        ids = conn.execute(
+            "SELECT chat_id FROM pattern_chat WHERE mask = ? AND chat_id != ? "
+            "ORDER BY chat_id DESC LIMIT ?",
+            (pattern, exclude_id if exclude_id is not None else -1, k - len(picked))
+        ).fetchall()
+        picked.extend((similarity, chat_id) for (chat_id,) in ids)
+        if len(picked) >= k:
+            break
+
+    records = _load_records(conn, [chat_id for _, chat_id in picked])
+    similarity_of = dict((chat_id, sim) for sim, chat_id in picked)
+    return [(similarity_of[r.id], r) for r in records]
+
+
+def iter_chats(page_size: int = 500, **filters) -> Iterator[ChatRecord]:
+    """
+    Walk every matching interaction page by page.
+    """
+    after = None
+    while True:
+        page = query_chats(after=after, limit=page_size, **filters)
+        yield from page.records
+        if page.next_cursor is None:
+            return
+        after = page.next_cursor
+
+
+# =====================================================
+# Dashboard time series (served from daily rollups)
+# =====================================================
+
+# One point per day that had at least one matching interaction
+Series = List[Tuple[str, int]]
+
+
+def verdict_series(since=None, until=None, db_path=None) -> Dict[str, Series]:
+    """
+    Daily interaction counts per verdict type over days [since, until).
+    """
+    sql = ["SELECT day, verdict_type, count FROM rollup_verdict_daily WHERE 1 = 1"]
+    params = []
+    if since is not None:
+        sql.append("AND day >= ?")
+        params.append(_as_day(since))
+    if until is not None:
+        sql.append("AND day < ?")
+        params.append(_as_day(until))
+    sql.append("ORDER BY day")
+
+    series = {}
+    conn = get_read_pool(db_path).connection()
+    for day, verdict_type, count in conn.execute("\n".join(sql), params):
+        series.setdefault(verdict_type, []).append((day, count))
+    return series
+
+
+def item_series(
+    kind: str = None,
+    verdict_type: str = None,
+    since=None,
+    until=None,
+    db_path=None,
+) -> Dict[str, Series]:
+    """
+    Daily firing counts per right / duty id over days [since, until).
+
+    kind:         RIGHT | DUTY | PROCEDURAL, or None for all
+    verdict_type: count only interactions with this verdict type;
+                  None sums over all verdict types
+    """
+    sql = [
+        "SELECT r.day, i.item_id, SUM(r.count)",
+        "FROM rollup_item_daily AS r",
+        "JOIN fired_item AS i ON i.code = r.item_code",
+        "WHERE 1 = 1",
+    ]
+    params = []
+    if kind is not None:
+        sql.append("AND i.kind = ?")
+        params.append(kind)
+    if verdict_type is not None:
+        sql.append("AND r.verdict_type = ?")
+        params.append(verdict_type)
+    if since is not None:
+        sql.append("AND r.day >= ?")
+        params.append(_as_day(since))
+    if until is not None:
+        sql.append("AND r.day < ?")
+        params.append(_as_day(until))
+    sql.append("GROUP BY r.day, r.item_code ORDER BY r.day")
+
+    series = {}
+    conn = get_read_pool(db_path).connection()
+    for day, item_id, count in conn.execute("\n".join(sql), params):
+        series.setdefault(item_id, []).append((day, count))
+    return series
@@ -0,0 +1,174 @@
+# core/dedup.py
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from core.fact_extractor import FactExtractor
+from core.minhash import estimate_jaccard, one_permutation_signature
+
+# =====================================================
+# Near-duplicate clustering for batch re-analysis
+# =====================================================
+#
+# Archived complaints repeat heavily (forwarded templates, pasted
+# narratives with small edits). Texts are grouped before analysis:
+#
+#   1. exact:  identical after lower-casing (FactExtractor's first
+#              step), so they are guaranteed the same facts
+#   2. near:   word 3-gram shingles of the text with punctuation
+#              collapsed, one-permutation MinHash sketch, LSH buckets
+#              over bands, then estimated Jaccard against each
+#              candidate cluster's representative
+#
+# Exact duplicates reuse the first copy's result. A near-duplicate can
+# differ in the one sentence that decides the verdict ("refused
+# admission" / "gave admission"), so by default each member is still
+# extracted (the cheap step) and only reuses the representative's
+# verdict when its facts are identical. verify=False skips that and
+# trusts the clustering; use it only for rough statistics.
+#
+# Shingles are hashed with hash(), which is salted per process:
+# sketches are only comparable within one batch, never persist them.
+
+THRESHOLD = 0.85         # min estimated Jaccard to join a cluster
+SHINGLE_WORDS = 3
+NUM_BINS = 64
+BANDS = 16
+ROWS = 4                 # 0.85 similarity -> ~100% candidate recall
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class BatchStats:
+    total: int
+    clusters: int             # texts actually analyzed
+    exact_duplicates: int
+    near_duplicates: int
+    verified: int             # near-duplicate members re-extracted
+    mismatches: int           # verified members whose facts differed
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def shingle_signature(normalized: str) -> Optional[tuple]:
+    words = normalized.split()
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {hash(normalized)} if normalized else ()
+    else:
+        shingles = {
+            hash(" ".join(words[i:i + SHINGLE_WORDS]))
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+    return one_permutation_signature(shingles, NUM_BINS)
+
+
+def _cluster(texts, threshold: float):
+    """
+    For each text the index of its first exact copy and its cluster
+    representative, plus exact / near counts. A text joins the first
+    cluster whose representative it matches.
+    """
+    exact = {}                # lower-cased text -> first index
+    buckets = {}              # (band, key) -> [representative]
+    signatures = {}           # representative -> signature
+    firsts = []
+    representatives = []
+    exact_count = near_count = 0
+
+    for index, text in enumerate(texts):
+        first = exact.setdefault(text.lower(), index)
+        firsts.append(first)
+        if first != index:
+            representatives.append(representatives[first])
+            exact_count += 1
+            continue
+
+        rep = None
+        signature = shingle_signature(normalize(text))
+        keys = []
+        if signature is not None:
+            for band in range(BANDS):
+                keys.append((band, signature[band * ROWS:(band + 1) * ROWS]))
+                for candidate in buckets.get(keys[-1], ()):
+                    if estimate_jaccard(signature, signatures[candidate]) >= threshold:
+                        rep = candidate
+                        break
+                if rep is not None:
+                    break
+
+        if rep is not None:
+            near_count += 1
+        else:
+            rep = index
+            signatures[index] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(index)
+        representatives.append(rep)
+
+    return firsts, representatives, exact_count, near_count
+
+
+def cluster_texts(texts, threshold: float = THRESHOLD) -> List[int]:
+    """
+    For each text, the index of its cluster's representative (its own
+    index if it starts a cluster).
+    """
+    return _cluster(list(texts), threshold)[1]
+
+
+def analyze_batch(
+    texts,
+    extractor: FactExtractor = None,
+    evaluator=None,
+    threshold: float = THRESHOLD,
+    verify: bool = True,
+) -> Tuple[List[Tuple[dict, Optional[dict]]], BatchStats]:
+    """
+    Extract facts (and, with an evaluator, verdicts) for every text,
+    evaluating once per near-duplicate cluster.
+
+    Returns [(facts, verdict or None)] aligned with texts. Texts with
+    equal results share the same dicts; treat them as read-only. Every
+    near-duplicate member is re-extracted and keeps its own result if
+    its facts differ from the representative's; verify=False reuses
+    the representative's result unchecked.
+    """
+    texts = list(texts)
+    extractor = extractor or FactExtractor()
+    firsts, representatives, exact_count, near_count = _cluster(texts, threshold)
+
+    analyzed = {}
+    results = []
+    verified = mismatches = 0
+    for index, rep in enumerate(representatives):
+        if firsts[index] != index:
+            results.append(results[firsts[index]])
+            continue
+        if rep not in analyzed:
+            facts = extractor.extract(texts[rep])
+            verdict = evaluator.evaluate(facts) if evaluator is not None else None
+            analyzed[rep] = (facts, verdict)
+        result = analyzed[rep]
+
+        if verify and rep != index:
+            verified += 1
+            facts = extractor.extract(texts[index])
+            if facts != result[0]:
+                mismatches += 1
+                verdict = evaluator.evaluate(facts) if evaluator is not None else None
+                result = (facts, verdict)
+        results.append(result)
+
+    stats = BatchStats(
+        total=len(texts),
+        clusters=len(analyzed),
+        exact_duplicates=exact_count,
+        near_duplicates=near_count,
+        verified=verified,
+        mismatches=mismatches,
+    )
+    return results, stats
@@ -0,0 +1,161 @@
+# core/engine.py
+
+import argparse
+import importlib
+import time
+
+from core import chat_history, fact_codec, fact_extractor, logger, rights_evaluator, sinks
+from core.fact_extractor import FactExtractor
+from core.knowledge_store import KnowledgeStore, load_knowledge_store
+from core.outbox import start_dispatcher
+from core.process_local import ProcessSingleton
+from core.redaction import redact
+from core.rights_evaluator import RightsEvaluator
+from core.sheets_logger import SHEETS_SINK, deliver_outbox_rows
+
+# =====================================================
+# Process-wide engine
+# =====================================================
+#
+# The extractor, evaluator and knowledge store are stateless after
+# construction, so one instance per process is shared by every
+# session and thread. Each is built lazily on first use; warm_up()
+# builds them all and primes their caches ahead of the first request.
+# Streamlit has no server-start hook, so ui_chat.py warms its process
+# on the first page load; start.sh runs main() before serving to apply
+# the chat history migrations and fail fast on broken rules.
+# Forked workers inherit them; sink threads are started per process.
+#
+# The rules are Python code, so reload() re-imports RULE_MODULES; the
+# factories look the classes up on the module for that reason.
+
+RULE_MODULES = (fact_extractor, rights_evaluator)
+
+_extractor = ProcessSingleton(lambda: fact_extractor.FactExtractor(), inherited=True)
+_evaluator = ProcessSingleton(lambda: rights_evaluator.RightsEvaluator(), inherited=True)
+_knowledge = ProcessSingleton(load_knowledge_store, inherited=True)
+
+# Inputs that reach every pattern in FactExtractor (including the
+# second half of compound conditions), so re's compile cache is full.
+WARM_UP_INPUTS = (
+    "The hospital refused admission in an emergency after a road accident "
+    "and asked for full payment first. The doctor was drunk.",
+    "They denied my records, report and discharge summary even after asking; "
+    "still waiting. Surgery was done without consent and not explained.",
+    "Another doctor for a second opinion was not allowed. The bill had hidden "
+    "charges. I was discriminated because of caste, shouted at, insulted and "
+    "mistreated; the conduct was unethical. They shared my medical condition "
+    "in front of others.",
+    "Nothing happened.",
+)
+
+
+def get_extractor() -> FactExtractor:
+    return _extractor.get()
+
+
+def get_evaluator() -> RightsEvaluator:
+    return _evaluator.get()
+
+
+def get_knowledge() -> KnowledgeStore:
+    return _knowledge.get()
+
+
+def _start_sinks() -> bool:
+    logger.get_writer()
+    chat_history.get_writer()
+    start_dispatcher({SHEETS_SINK: deliver_outbox_rows})
+    sinks.get_dispatcher()
+    return True
+
+
+_sinks_started = ProcessSingleton(_start_sinks)
+
+
+def start_sinks():
+    """
+    Start the background writers, the outbox dispatcher and the sink
+    fan-out pool (once per process).
+    """
+    _sinks_started.get()
+
+
+def _run_inputs(extractor, evaluator):
+    for text in WARM_UP_INPUTS:
+        facts = extractor.extract(text)
+        evaluator.evaluate(facts)
+        fact_codec.encode(facts)
+        redact(text)
+
+
+def reload():
+    """
+    Re-import the rule modules and the knowledge base and swap in
+    engines built from them. The new engines run the warm-up inputs
+    before they are installed: if anything fails, the error is raised
+    and the current engines stay. Requests already holding the old
+    ones finish with them. Changes to any other module need a restart.
+    """
+    for module in RULE_MODULES:
+        importlib.reload(module)
+    extractor = fact_extractor.FactExtractor()
+    evaluator = rights_evaluator.RightsEvaluator()
+    knowledge = load_knowledge_store()
+    _run_inputs(extractor, evaluator)
+
+    _extractor.replace(extractor)
+    _evaluator.replace(evaluator)
+    _knowledge.replace(knowledge)
+
+
+def warm_up(with_sinks: bool = True) -> dict:
+    """
+    Build every singleton and run the warm-up inputs through the
+    request path. Returns seconds spent per step.
+
+    A pre-fork parent passes with_sinks=False: writer threads do not
+    survive fork(), so each worker starts its own.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    extractor = get_extractor()
+    evaluator = get_evaluator()
+    get_knowledge()
+    timings["construct"] = time.perf_counter() - start
+
+    if with_sinks:
+        start = time.perf_counter()
+        start_sinks()
+        timings["sinks"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _run_inputs(extractor, evaluator)
+    timings["requests"] = time.perf_counter() - start
+
+    return timings
+
+
+# =====================================================
+# Pre-start
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply chat history migrations and warm up the engine before serving"
+    )
+    parser.add_argument("--db", default=chat_history.DB_PATH)
+    args = parser.parse_args(argv)
+
+    chat_history.connect(args.db).close()
+
+    # This process exits before serving, so no writer threads
+    timings = warm_up(with_sinks=False)
+    print("Engine ready: " + ", ".join(
+        f"{step} {seconds * 1000:.1f} ms" for step, seconds in timings.items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
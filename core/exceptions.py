@@ -6,3 +6,14 @@ class PhaseLockedError(Exception):
 
 class IllegalExecutionError(Exception):
     pass
+
+# Transient sink failure (quota, rate limit, 5xx): safe to retry
+class SinkRetryableError(Exception):
+    pass
+
+# Sink failure after the first `sent` items of a batch were delivered;
+# the original error is the __cause__
+class PartialDeliveryError(Exception):
+    def __init__(self, sent: int):
+        self.sent = sent
+        super().__init__(f"failed after {sent} delivered")
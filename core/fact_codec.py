@@ -0,0 +1,162 @@
+# core/fact_codec.py
+
+import json
+
+# =====================================================
+# Packed fact encoding
+# =====================================================
+#
+# FactExtractor output is ~56 keys whose values come from tiny fixed
+# vocabularies ("unknown" / "yes" / "no", plus the discrimination
+# basis). Each key is packed into a few bits, 0 meaning "key absent",
+# so a facts dict becomes ~20 bytes instead of ~2 KB of JSON.
+#
+#   byte 0      codec version (0 = raw JSON fallback)
+#   bytes 1..   little-endian integer of all slot codes
+#
+# A slot table is append-only per version: never reorder or edit it,
+# add a new version instead so stored rows stay decodable.
+
+RAW_JSON = 0
+VERSION = 1
+
+TRISTATE = ("unknown", "yes", "no")
+DISCRIMINATION_BASIS = (
+    "unknown", "religion", "caste", "gender", "age",
+    "economic_status", "illness", "disability",
+)
+
+_V1_FLAT = (
+    "emergency_case", "emergency_claimed", "admission_denied",
+    "payment_demanded", "treatment_refused", "doctor_involved",
+    "hospital_involved", "consent_issue", "privacy_breached",
+    "second_opinion_denied", "billing_issue", "discrimination_claimed",
+    "information_denied", "billing_not_explained",
+    "doctor_identity_not_disclosed", "doctor_under_influence",
+    "mistreatment_claimed", "abuse_claimed", "unethical_behavior_claimed",
+    "rates_not_disclosed", "overcharging_claimed", "forced_payment_claimed",
+    "billing_coercion_claimed", "discrimination_basis", "discharge_denied",
+    "patient_detained_for_payment", "body_withheld_for_payment",
+    "unsafe_conditions_claimed", "hygiene_failure_claimed",
+    "infection_due_to_care_claimed", "negligence_claimed",
+    "substandard_care_claimed", "pressure_against_second_opinion",
+    "records_withheld_for_second_opinion", "forced_pharmacy_claimed",
+    "forced_diagnostic_lab_claimed", "penalty_for_external_source_claimed",
+    "treatment_choice_denied", "forced_treatment_claimed",
+    "refusal_not_allowed_claimed", "coercion_for_treatment_claimed",
+    "penalty_for_refusal_claimed", "referral_denied_claimed",
+    "transfer_without_explanation_claimed", "unsafe_transfer_claimed",
+    "commercial_referral_claimed", "lack_of_continuity_of_care_claimed",
+    "grievance_denied_claimed", "complaint_ignored_claimed",
+    "retaliation_for_complaint_claimed", "no_grievance_mechanism_claimed",
+    "patient_education_denied_claimed", "language_barrier_claimed",
+    "rights_not_explained_claimed", "information_not_understandable_claimed",
+)
+
+# Nested dict keys, kept in extractor order after the flat keys
+NESTED = {
+    "records_issue": ("requested", "denied", "by_doctor", "by_hospital"),
+}
+
+
+class _Slot:
+    __slots__ = ("key", "parent", "values", "codes", "shift", "width")
+
+    def __init__(self, key, parent, values, shift):
+        self.key = key
+        self.parent = parent
+        self.values = values
+        self.codes = {v: i + 1 for i, v in enumerate(values)}
+        self.shift = shift
+        self.width = len(values).bit_length()   # + 1 code for "absent"
+
+
+def _build_slots():
+    slots = []
+    shift = 0
+    for key in _V1_FLAT:
+        values = DISCRIMINATION_BASIS if key == "discrimination_basis" else TRISTATE
+        slots.append(_Slot(key, None, values, shift))
+        shift += slots[-1].width
+    for parent, keys in NESTED.items():
+        for key in keys:
+            slots.append(_Slot(key, parent, TRISTATE, shift))
+            shift += slots[-1].width
+    return tuple(slots), (shift + 7) // 8
+
+
+SLOTS, PACKED_BYTES = _build_slots()
+_FLAT_KEYS = frozenset(_V1_FLAT)
+
+# Bit position of each tri-state slot in yes_mask()
+FEATURES = tuple(
+    f"{s.parent}.{s.key}" if s.parent else s.key
+    for s in SLOTS if s.values is TRISTATE
+)
+
+
+def _raw(facts) -> bytes:
+    return bytes([RAW_JSON]) + json.dumps(facts, ensure_ascii=False).encode("utf-8")
+
+
+def encode(facts) -> bytes:
+    """
+    Pack a facts dict. Anything outside the slot table (new keys,
+    unexpected values) falls back to raw JSON, so encoding is lossless.
+    """
+    if not isinstance(facts, dict):
+        return _raw(facts)
+
+    for key, value in facts.items():
+        if key in NESTED:
+            if not isinstance(value, dict) or not set(value) <= set(NESTED[key]):
+                return _raw(facts)
+        elif key not in _FLAT_KEYS:
+            return _raw(facts)
+
+    packed = 0
+    for slot in SLOTS:
+        container = facts if slot.parent is None else facts.get(slot.parent)
+        if container is None or slot.key not in container:
+            continue
+        code = slot.codes.get(container[slot.key])
+        if code is None:
+            return _raw(facts)
+        packed |= code << slot.shift
+
+    return bytes([VERSION]) + packed.to_bytes(PACKED_BYTES, "little")
+
+
+def decode(blob: bytes) -> dict:
+    if blob[0] == RAW_JSON:
+        return json.loads(blob[1:].decode("utf-8"))
+    if blob[0] != VERSION:
+        raise ValueError(f"Unknown fact codec version: {blob[0]}")
+
+    packed = int.from_bytes(blob[1:], "little")
+    facts = {}
+    for slot in SLOTS:
+        code = (packed >> slot.shift) & ((1 << slot.width) - 1)
+        if not code:
+            continue
+        if slot.parent is None:
+            facts[slot.key] = slot.values[code - 1]
+        else:
+            facts.setdefault(slot.parent, {})[slot.key] = slot.values[code - 1]
+    return facts
+
+
+def yes_mask(facts: dict) -> int:
+    """
+    Bitmask of tri-state facts equal to "yes" (bit i = FEATURES[i]).
+    """
+    mask = 0
+    bit = 0
+    for slot in SLOTS:
+        if slot.values is not TRISTATE:
+            continue
+        container = facts if slot.parent is None else facts.get(slot.parent) or {}
+        if container.get(slot.key) == "yes":
+            mask |= 1 << bit
+        bit += 1
+    return mask
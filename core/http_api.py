@@ -0,0 +1,349 @@
+# core/http_api.py
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+
+from core import engine, verdict_json
+from core.interaction import validate_input
+from core.refusal import Refusal
+
+# =====================================================
+# Headless HTTP API (stdlib asyncio, HTTP/1.1)
+# =====================================================
+#
+#   POST /analyze          {"text": "..."}       -> {"facts", "verdict"}
+#   POST /analyze/batch    {"texts": ["...", ...]} -> {"results": [...]}
+#   GET  /health
+#
+# Connections are keep-alive by default and requests may be pipelined:
+# every complete request in a read is answered in order, and the
+# responses go out in a single write. Analysis is CPU-bound and takes
+# well under a millisecond, so it runs inline on the event loop.
+
+HOST = "0.0.0.0"
+PORT = 8080
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_TEXTS = 1000
+GRACE_SECONDS = 10.0      # drain time for open connections on shutdown
+
+_REASONS = {
+    200: b"OK",
+    400: b"Bad Request",
+    404: b"Not Found",
+    405: b"Method Not Allowed",
+    413: b"Payload Too Large",
+    422: b"Unprocessable Entity",
+    431: b"Request Header Fields Too Large",
+    500: b"Internal Server Error",
+    501: b"Not Implemented",
+}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, close: bool = False):
+        self.status = status
+        self.message = message
+        self.close = close
+        super().__init__(message)
+
+
+def _json_body(body: bytes) -> dict:
+    try:
+        data = json.loads(body)
+    except (UnicodeDecodeError, ValueError):
+        raise _HTTPError(400, "INVALID_JSON")
+    if not isinstance(data, dict):
+        raise _HTTPError(400, "EXPECTED_JSON_OBJECT")
+    return data
+
+
+# -----------------------------------------------------
+# Handlers: body bytes -> (status, JSON-serializable payload)
+# Verdict responses are canonical bytes assembled from cached
+# fragments (core/verdict_json.py) and sent as they are.
+# -----------------------------------------------------
+
+def handle_analyze(body: bytes):
+    data = _json_body(body)
+    try:
+        text = validate_input(data.get("text"))
+    except Refusal as r:
+        return 422, {"error": r.reason}
+
+    facts = engine.get_extractor().extract(text)
+    verdict = engine.get_evaluator().evaluate(facts)
+    return 200, verdict_json.analysis(facts, verdict, engine.get_knowledge().version)
+
+
+def handle_analyze_batch(body: bytes):
+    data = _json_body(body)
+    texts = data.get("texts")
+    if not isinstance(texts, list):
+        return 400, {"error": "EXPECTED_TEXTS_LIST"}
+    if len(texts) > MAX_BATCH_TEXTS:
+        return 413, {"error": f"BATCH_TOO_LARGE: {len(texts)} > {MAX_BATCH_TEXTS}"}
+
+    results = [None] * len(texts)
+    valid = []
+    for index, text in enumerate(texts):
+        try:
+            valid.append((index, validate_input(text)))
+        except Refusal as r:
+            results[index] = verdict_json.canonical({"error": r.reason})
+
+    # Texts identical once lower-cased (the extractor's first step) are
+    # analyzed once. Near-duplicates are not merged: one changed
+    # sentence can change the verdict (core/dedup.py is for archives).
+    extractor = engine.get_extractor()
+    evaluator = engine.get_evaluator()
+    version = engine.get_knowledge().version
+    analyzed = {}
+    for index, text in valid:
+        key = text.lower()
+        payload = analyzed.get(key)
+        if payload is None:
+            facts = extractor.extract(text)
+            payload = verdict_json.analysis(facts, evaluator.evaluate(facts), version)
+            analyzed[key] = payload
+        results[index] = payload
+    return 200, verdict_json.obj({"results": b"[" + b",".join(results) + b"]"})
+
+
+def handle_health(body: bytes):
+    return 200, {"status": "ok", "pid": os.getpid()}
+
+
+ROUTES = {
+    ("POST", "/analyze"): handle_analyze,
+    ("POST", "/analyze/batch"): handle_analyze_batch,
+    ("GET", "/health"): handle_health,
+}
+_PATHS = {path for _, path in ROUTES}
+
+
+def dispatch(method: str, path: str, body: bytes):
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        if path in _PATHS:
+            return 405, {"error": "METHOD_NOT_ALLOWED"}
+        return 404, {"error": "NOT_FOUND"}
+    return handler(body)
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        b"HTTP/1.1 %d %s\r\n"
+        b"Content-Type: application/json; charset=utf-8\r\n"
+        b"Content-Length: %d\r\n"
+        % (status, _REASONS.get(status, b"Unknown"), len(body))
+    )
+    if not keep_alive:
+        head += b"Connection: close\r\n"
+    return head + b"\r\n" + body
+
+
+# -----------------------------------------------------
+# Protocol
+# -----------------------------------------------------
+
+class ServerState:
+    """
+    Per-process serving state shared by every connection: request
+    count, open connections and the stop signal. With max_requests
+    set the server stops itself after that many requests (pre-fork
+    worker recycling).
+    """
+
+    def __init__(self, max_requests: int = None):
+        self.max_requests = max_requests
+        self.requests = 0
+        self.connections = set()
+        self.stopping = False
+        self._stopped = None
+
+    def stop(self):
+        if self.stopping:
+            return
+        self.stopping = True
+        if self._stopped is not None:
+            self._stopped.set()
+        # Idle keep-alive connections are closed now; the others close
+        # after their current response (see HTTPProtocol._handle)
+        for protocol in list(self.connections):
+            if not protocol._busy and not protocol._buffer:
+                protocol.transport.close()
+
+    def count_request(self):
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop()
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """
+    Minimal HTTP/1.1 server protocol: Content-Length bodies only
+    (no chunked requests), keep-alive and pipelining.
+    """
+
+    def __init__(self, state: ServerState = None):
+        self.state = state or ServerState()
+        self.transport = None
+        self._buffer = bytearray()
+        self._closing = False
+        self._busy = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.state.connections.add(self)
+
+    def connection_lost(self, exc):
+        self.state.connections.discard(self)
+
+    def data_received(self, data: bytes):
+        if self._closing:
+            return
+        self._buffer += data
+        self._busy = True
+        responses = []
+        while not self._closing:
+            try:
+                request = self._next_request()
+            except _HTTPError as e:
+                responses.append(_response(e.status, {"error": e.message}, keep_alive=False))
+                self._closing = True
+                break
+            if request is None:
+                break
+            responses.append(self._handle(*request))
+
+        self._busy = False
+        if responses:
+            self.transport.writelines(responses)
+        if self._closing:
+            self.transport.close()
+
+    def _next_request(self):
+        """
+        Pop one complete request off the buffer, or None if incomplete.
+        """
+        end = self._buffer.find(b"\r\n\r\n")
+        if end < 0:
+            if len(self._buffer) > MAX_HEADER_BYTES:
+                raise _HTTPError(431, "HEADERS_TOO_LARGE")
+            return None
+
+        try:
+            lines = bytes(self._buffer[:end]).decode("latin-1").split("\r\n")
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise _HTTPError(400, "BAD_REQUEST_LINE")
+
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise _HTTPError(501, "CHUNKED_NOT_SUPPORTED")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise _HTTPError(400, "BAD_CONTENT_LENGTH")
+        if length < 0:
+            raise _HTTPError(400, "BAD_CONTENT_LENGTH")
+        if length > MAX_BODY_BYTES:
+            raise _HTTPError(413, "BODY_TOO_LARGE")
+
+        start = end + 4
+        if len(self._buffer) < start + length:
+            return None
+        body = bytes(self._buffer[start:start + length])
+        del self._buffer[:start + length]
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+        return method, target.split("?", 1)[0], body, keep_alive
+
+    def _handle(self, method, path, body, keep_alive) -> bytes:
+        self.state.count_request()
+        if self.state.stopping:
+            keep_alive = False
+        try:
+            status, payload = dispatch(method, path, body)
+        except _HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception:
+            traceback.print_exc()
+            status, payload = 500, {"error": "INTERNAL_ERROR"}
+        if not keep_alive:
+            self._closing = True
+        return _response(status, payload, keep_alive)
+
+
+# =====================================================
+# Entry point
+# =====================================================
+
+async def serve(host: str = HOST, port: int = PORT, sock=None, state: ServerState = None):
+    """
+    Serve on host:port, or on an already bound socket, until
+    state.stop(); then stop accepting and let open connections finish
+    for up to GRACE_SECONDS.
+    """
+    state = state or ServerState()
+    state._stopped = asyncio.Event()
+    if state.stopping:
+        state._stopped.set()
+
+    loop = asyncio.get_running_loop()
+    if sock is not None:
+        server = await loop.create_server(lambda: HTTPProtocol(state), sock=sock, backlog=1024)
+    else:
+        server = await loop.create_server(lambda: HTTPProtocol(state), host, port, backlog=1024)
+
+    await state._stopped.wait()
+    server.close()
+    deadline = time.monotonic() + GRACE_SECONDS
+    while state.connections and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    for protocol in list(state.connections):
+        protocol.transport.abort()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Medical-legal rights HTTP API")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="serve from this many pre-forked processes (core/prefork.py)")
+    args = parser.parse_args(argv)
+
+    if args.workers > 1:
+        from core.prefork import Arbiter
+        Arbiter(host=args.host, port=args.port, workers=args.workers).run()
+        return
+
+    # Nothing on the HTTP path logs to a sink
+    engine.warm_up(with_sinks=False)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# core/interaction.py
+
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+from core import admission, proof, spans
+from core.audit import AuditTrail
+from core.logger import get_writer, log_event
+from core.refusal import Refusal
+from core.singleflight import SingleFlight
+from core.fact_extractor import FactExtractor
+from core.rights_evaluator import RightsEvaluator
+
+# =====================================================
+# One user interaction, timed stage by stage
+# =====================================================
+
+MAX_INPUT_CHARS = 20_000
+
+# Verdict sections whose item ids are reported as rules_evaluated
+RULE_SECTIONS = ("primary_violations", "imc_duties", "procedural_remedies")
+
+# Identical inputs analyzed at the same time (a complaint template
+# going round) share one extraction + evaluation; each still gets its
+# own Interaction, query_id and audit trail.
+_inflight = SingleFlight()
+
+
+@dataclass
+class Interaction:
+    query_id: str
+    user_input: str
+    facts: Optional[dict] = None
+    verdict: Optional[dict] = None
+    refusal: Optional[Refusal] = None
+    coalesced: bool = False     # facts/verdict shared with a concurrent request
+    tier: int = admission.FULL  # load-shedding tier (core/admission.py)
+    recorder: spans.SpanRecorder = field(default_factory=spans.SpanRecorder)
+    verdict_json: Optional[bytes] = None  # canonical verdict, set by core/sinks.py
+
+
+def validate_input(text: str) -> str:
+    text = text.strip() if isinstance(text, str) else ""
+    if not text:
+        raise Refusal("EMPTY_INPUT")
+    if len(text) > MAX_INPUT_CHARS:
+        raise Refusal(f"INPUT_TOO_LONG: {len(text)} > {MAX_INPUT_CHARS}")
+    return text
+
+
+def coalescing_key(text: str, extractor, evaluator):
+    """
+    Inputs with the same key get the same facts and verdict: the
+    extractor lowercases before matching, so case is irrelevant.
+    """
+    digest = hashlib.blake2b(text.lower().encode("utf-8"), digest_size=16).digest()
+    return digest, id(extractor), id(evaluator)
+
+
+def _stages(text, extractor, evaluator, recorder):
+    recorder.start(spans.EXTRACTION)
+    facts = extractor.extract(text)
+    recorder.stop(spans.EXTRACTION)
+
+    recorder.start(spans.EVALUATION)
+    verdict = evaluator.evaluate(facts)
+    recorder.stop(spans.EVALUATION)
+    return facts, verdict
+
+
+def _extract_and_evaluate(text, extractor, evaluator, recorder, controller):
+    """
+    The coalescing leader's work: only the leader takes an admission
+    slot, so requests waiting on it neither hold a slot nor lengthen
+    the queue that picks shedding tiers. Raises admission.Busy.
+    """
+    if controller is None:
+        return _stages(text, extractor, evaluator, recorder) + (admission.FULL,)
+
+    recorder.start(spans.ADMISSION_WAIT)
+    try:
+        ticket = controller.acquire()
+    finally:
+        recorder.stop(spans.ADMISSION_WAIT)
+    try:
+        return _stages(text, extractor, evaluator, recorder) + (ticket.tier,)
+    finally:
+        controller.release()
+
+
+def analyze(
+    user_input: str,
+    extractor: FactExtractor,
+    evaluator: RightsEvaluator,
+    controller: admission.AdmissionController = None,
+) -> Interaction:
+    """
+    Validate, extract and evaluate, recording each stage. A refused
+    input comes back with .refusal set and no facts or verdict.
+
+    With a controller, extraction and evaluation run under one of its
+    slots; a request it turns away gets a BUSY verdict and no facts,
+    and an admitted one carries its shedding tier in .tier.
+
+    A request identical to one already in flight waits for its result
+    (timed as coalesced_wait) instead of running the stages itself,
+    and shares its tier or BUSY verdict; the shared facts and verdict
+    must be treated as read-only.
+    """
+    interaction = Interaction(query_id=uuid.uuid4().hex, user_input=user_input)
+    recorder = interaction.recorder
+
+    recorder.start(spans.VALIDATION)
+    try:
+        interaction.user_input = validate_input(user_input)
+    except Refusal as r:
+        interaction.refusal = r
+        return interaction
+    finally:
+        recorder.stop(spans.VALIDATION)
+
+    text = interaction.user_input
+    start = time.perf_counter()
+    try:
+        (facts, verdict, tier), shared = _inflight.do(
+            coalescing_key(text, extractor, evaluator),
+            _extract_and_evaluate, text, extractor, evaluator, recorder, controller,
+        )
+    except admission.Busy as busy:
+        interaction.verdict = busy.verdict()
+        return interaction
+    if shared:
+        recorder.add(spans.COALESCED_WAIT, time.perf_counter() - start)
+
+    interaction.facts = facts
+    interaction.verdict = verdict
+    interaction.coalesced = shared
+    interaction.tier = tier
+    return interaction
+
+
+def coalescing_stats() -> dict:
+    """
+    Analyses executed vs. requests served from a concurrent identical
+    one since process start.
+    """
+    return _inflight.stats()
+
+
+def _facts_used(facts) -> list:
+    used = []
+    for key, value in (facts or {}).items():
+        if isinstance(value, dict):
+            used.extend(f"{key}.{k}" for k, v in value.items() if v != "unknown")
+        elif value != "unknown":
+            used.append(key)
+    return used
+
+
+def audit_trail(interaction: Interaction) -> AuditTrail:
+    verdict = interaction.verdict or {}
+    fired = [
+        item["id"]
+        for section in RULE_SECTIONS
+        for item in verdict.get(section) or []
+        if isinstance(item, dict) and item.get("id")
+    ]
+    return AuditTrail(
+        query_id=interaction.query_id,
+        facts_used=_facts_used(interaction.facts),
+        rules_evaluated=fired,
+        verdict_status=verdict.get("verdict_type", "REFUSED" if interaction.refusal else None),
+        proof_ids=proof.step_ids(verdict.get("proof") or ()),
+        refusal=interaction.refusal,
+        timings=interaction.recorder.timings(),
+    )
+
+
+def record_audit_trail(interaction: Interaction) -> AuditTrail:
+    """
+    Persist the interaction's AuditTrail to the audit log (AUDIT_TRAIL
+    event, keyed by query_id). Call after the last timed stage.
+
+    The trail carries proof step ids, plus the definitions (as
+    proof_steps) of steps this process has not yet logged.
+    """
+    trail = audit_trail(interaction)
+    # Any line the writer lost may have held a definition: the drop
+    # count is the announcement epoch (core/proof.py)
+    epoch = get_writer().dropped
+    new_steps = proof.unannounced((interaction.verdict or {}).get("proof") or (), epoch)
+    accepted = log_event("AUDIT_TRAIL", {
+        "query_id": trail.query_id,
+        "facts_used": trail.facts_used,
+        "rules_evaluated": trail.rules_evaluated,
+        "verdict_status": trail.verdict_status,
+        "proof_ids": trail.proof_ids,
+        "proof_steps": [s._asdict() for s in new_steps],
+        "refusal": trail.refusal.reason if trail.refusal else None,
+        "coalesced": interaction.coalesced,
+        "tier": admission.TIER_NAMES[interaction.tier],
+        "timings_ms": {stage: round(s * 1000, 3) for stage, s in trail.timings},
+    })
+    if accepted:
+        proof.announced(new_steps, epoch)
+    return trail
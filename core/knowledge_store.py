@@ -0,0 +1,50 @@
+# core/knowledge_store.py
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+# =====================================================
+# Knowledge base (NHRC rights / IMC duties)
+# =====================================================
+
+KNOWLEDGE_PATH = Path("knowledge") / "knowledge_base.json"
+
+# knowledge_base.json carries /* ... */ section comments; strings are
+# matched first so a "/*" inside a citation is left alone.
+_COMMENT = re.compile(r'("(?:\\.|[^"\\])*")|/\*.*?\*/', re.DOTALL)
+
+
+def strip_comments(text: str) -> str:
+    return _COMMENT.sub(lambda m: m.group(1) or "", text)
+
+
+class KnowledgeStore:
+    """
+    Immutable view of the knowledge base, indexed by entry id.
+
+    version is a content hash of the file: anything cached from the
+    knowledge base should be keyed by it.
+    """
+
+    def __init__(self, entries, version: str):
+        self.entries = tuple(entries)
+        self.version = version
+        self._by_id = {entry["id"]: entry for entry in self.entries}
+
+    def get(self, entry_id: str):
+        return self._by_id.get(entry_id)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._by_id
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def load_knowledge_store(path=KNOWLEDGE_PATH) -> KnowledgeStore:
+    raw = Path(path).read_bytes()
+    data = json.loads(strip_comments(raw.decode("utf-8")))
+    version = hashlib.blake2b(raw, digest_size=8).hexdigest()
+    return KnowledgeStore(data["knowledge_entries"], version)
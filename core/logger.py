@@ -1,16 +1,328 @@
 import json
-import time
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX: single-process use only
+    fcntl = None
+
+from core import audit_log
+from core.process_local import STOP, FlushRequest, ProcessSingleton
 
 LOG_DIR = "logs"
-LOG_FILE = os.path.join(LOG_DIR, "audit.log")
+LOG_FILE = os.path.join(LOG_DIR, audit_log.ACTIVE_SEGMENT)
+
+# =====================================================
+# Writer tuning
+# =====================================================
+
+QUEUE_SIZE = 10_000          # max events buffered in memory
+BATCH_SIZE = 256             # flush once this many lines are pending
+FLUSH_INTERVAL = 0.5         # ... or once the oldest pending line is this old (s)
+
+# none        -> leave durability to the OS page cache
+# interval    -> fsync at most once every FSYNC_INTERVAL seconds
+# every-batch -> fsync after every flushed batch
+FSYNC_POLICY = os.environ.get("AUDIT_FSYNC_POLICY", "interval")
+FSYNC_INTERVAL = 5.0
+
+# block -> caller waits for room in the queue (no event is lost)
+# drop  -> event is discarded and counted (request path never waits)
+QUEUE_FULL_POLICY = os.environ.get("AUDIT_QUEUE_FULL_POLICY", "block")
+
+# Rotation of the active segment (see core/audit_log.py)
+ROTATE_MAX_BYTES = 16 * 1024 * 1024
+ROTATE_MAX_AGE = 24 * 60 * 60    # seconds
+
+FSYNC_POLICIES = ("none", "interval", "every-batch")
+QUEUE_FULL_POLICIES = ("block", "drop")
+
+class AuditLogWriter:
+    """
+    Background writer for the JSONL audit log.
+
+    Callers only enqueue a serialized line. A single daemon thread owns
+    the file handle, batches lines and writes each batch with one
+    write + flush, so the request path does no file I/O.
+    """
+
+    def __init__(
+        self,
+        path: str = LOG_FILE,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        fsync_policy: str = FSYNC_POLICY,
+        fsync_interval: float = FSYNC_INTERVAL,
+        queue_full_policy: str = QUEUE_FULL_POLICY,
+        rotate_max_bytes: int = ROTATE_MAX_BYTES,
+        rotate_max_age: float = ROTATE_MAX_AGE,
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        if queue_full_policy not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"Unknown queue full policy: {queue_full_policy}")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.queue_full_policy = queue_full_policy
+        self.rotate_max_bytes = rotate_max_bytes
+        self.rotate_max_age = rotate_max_age
+
+        self.written = 0
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._lock_file = None
+        self._segment_started = 0
+        self._recovered = False
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="audit-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    # -------------------------------------------------
+    # Caller side
+    # -------------------------------------------------
+    def write(self, line: str) -> bool:
+        """
+        Enqueue one serialized line. Returns False if it was dropped.
+        """
+        if self._closed:
+            self.dropped += 1
+            return False
+
+        if self.queue_full_policy == "block":
+            self._queue.put(line)
+            return True
+
+        try:
+            self._queue.put_nowait(line)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Block until every line enqueued before this call is written.
+        """
+        if self._closed:
+            return True
+        request = FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+    # -------------------------------------------------
+    # Writer thread
+    # -------------------------------------------------
+    def _run(self):
+        pending = []
+        batch_started = 0.0
+
+        while True:
+            if pending:
+                wait = self.flush_interval - (time.monotonic() - batch_started)
+                try:
+                    item = self._queue.get(timeout=max(wait, 0))
+                except queue.Empty:
+                    item = None
+            else:
+                item = self._queue.get()
+
+            stop = False
+            flush_requests = []
 
-def log_event(event_type: str, payload: dict):
-    os.makedirs(LOG_DIR, exist_ok=True)
+            # Drain whatever else is already queued, up to one batch
+            while item is not None:
+                if item is STOP:
+                    stop = True
+                elif isinstance(item, FlushRequest):
+                    flush_requests.append(item)
+                else:
+                    if not pending:
+                        batch_started = time.monotonic()
+                    pending.append(item)
+
+                if stop or len(pending) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            due = (
+                len(pending) >= self.batch_size
+                or time.monotonic() - batch_started >= self.flush_interval
+            )
+            if pending and (due or stop or flush_requests):
+                self._write_batch(pending)
+                pending = []
+
+            for request in flush_requests:
+                request.done.set()
+
+            if stop:
+                self._close_file()
+                return
+
+    @contextmanager
+    def _process_lock(self):
+        """
+        Exclusive lock across processes (pre-fork workers share the
+        active segment): appends never interleave and only one process
+        rotates at a time.
+        """
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._lock_file = open(self.path + ".lock", "a")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _replaced(self) -> bool:
+        """
+        True if another process rotated the active segment away.
+        """
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _write_batch(self, lines):
+        try:
+            with self._process_lock():
+                if self._file is None:
+                    self._open_file()
+                elif self._replaced():
+                    self._close_file()
+                    self._open_file()
+                elif self._should_rotate():
+                    self._rotate()
+
+                self._file.write("".join(lines))
+                self._file.flush()
+            self.written += len(lines)
+
+            now = time.monotonic()
+            if self.fsync_policy == "every-batch" or (
+                self.fsync_policy == "interval"
+                and now - self._last_fsync >= self.fsync_interval
+            ):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+        except Exception:
+            # Never let the writer thread die; the lines are lost
+            import traceback
+            traceback.print_exc()
+            self.dropped += len(lines)
+
+    def _open_file(self):
+        log_dir = os.path.dirname(self.path) or "."
+        os.makedirs(log_dir, exist_ok=True)
+
+        # Finish sealing segments left behind by an earlier process
+        if not self._recovered:
+            self._recovered = True
+            for path in audit_log.closed_segments(log_dir):
+                audit_log.seal_segment_async(path)
+
+        self._file = open(self.path, "a")
+        self._segment_started = int(time.time())
+        if self._file.tell() > 0:
+            with open(self.path, "rb") as f:
+                first = audit_log.record_key(f.readline())
+            if first is not None:
+                self._segment_started = first[0]
+
+    def _should_rotate(self) -> bool:
+        if self._file.tell() == 0:
+            return False
+        return (
+            self._file.tell() >= self.rotate_max_bytes
+            or time.time() - self._segment_started >= self.rotate_max_age
+        )
+
+    def _rotate(self):
+        """
+        Close the active segment, rename it and seal it in the background.
+        """
+        self._close_file()
+        log_dir = os.path.dirname(self.path) or "."
+        closed = audit_log.closed_segment_path(log_dir, self._segment_started)
+        os.replace(self.path, closed)
+        audit_log.seal_segment_async(closed)
+        self._open_file()
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            if self.fsync_policy != "none":
+                os.fsync(self._file.fileno())
+            self._file.close()
+        finally:
+            self._file = None
+
+
+# =====================================================
+# Process-wide writer
+# =====================================================
+
+_writer = ProcessSingleton(AuditLogWriter, close_at_exit=True)
+
+
+def get_writer() -> AuditLogWriter:
+    return _writer.get()
+
+
+def log_event(event_type: str, payload: dict) -> bool:
+    """
+    Queue one event. Returns False if the writer dropped it.
+    """
     entry = {
         "timestamp": int(time.time()),
         "event_type": event_type,
         "payload": payload
     }
-    with open(LOG_FILE, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    return get_writer().write(json.dumps(entry) + "\n")
+
+
+def flush_events(timeout: float = None) -> bool:
+    """
+    Wait until all events logged so far are on disk (page cache).
+    """
+    writer = _writer.peek()
+    if writer is None:
+        return True
+    return writer.flush(timeout)
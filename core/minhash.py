@@ -0,0 +1,107 @@
+# core/minhash.py
+
+import hashlib
+import random
+
+# =====================================================
+# MinHash signatures and LSH banding
+# =====================================================
+#
+# A set of integer tokens is summarised by NUM_PERM minimum hash
+# values; the fraction of equal positions between two signatures
+# estimates the Jaccard similarity of the sets. Splitting a signature
+# into bands of `rows` values and bucketing each band makes sets with
+# similarity s collide in at least one band with probability
+# 1 - (1 - s**rows) ** bands.
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def token_hash(token: str) -> int:
+    """
+    Stable 32-bit hash of a string token (Python's hash() is salted).
+    """
+    return int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+class MinHasher:
+    """
+    num_perm universal hash functions h(x) = (a*x + b) mod p, fixed by
+    seed so signatures stay comparable across processes and restarts.
+    """
+
+    __slots__ = ("num_perm", "_params")
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = tuple(
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        )
+
+    def signature(self, tokens) -> tuple:
+        """
+        Signature of an iterable of 32-bit int tokens, or None if empty.
+        """
+        tokens = set(tokens)
+        if not tokens:
+            return None
+        p = MERSENNE_PRIME
+        return tuple(
+            min(((a * x + b) % p) & MAX_HASH for x in tokens)
+            for a, b in self._params
+        )
+
+
+def one_permutation_signature(tokens, num_bins: int = 64) -> tuple:
+    """
+    Cheaper sketch for large token sets: each token is hashed once and
+    lands in one of num_bins bins, keeping the minimum per bin. Empty
+    bins borrow from the next non-empty bin (rotation densification).
+
+    Tokens must already be well-mixed 64-bit hashes; equal positions
+    estimate Jaccard like a MinHash signature. None if empty.
+    """
+    bins = [None] * num_bins
+    for token in tokens:
+        token &= 0xFFFFFFFFFFFFFFFF
+        b = token % num_bins
+        value = token // num_bins
+        if bins[b] is None or value < bins[b]:
+            bins[b] = value
+    if all(v is None for v in bins):
+        return None
+
+    signature = list(bins)
+    for b in range(num_bins):
+        if bins[b] is None:
+            distance = 1
+            while bins[(b + distance) % num_bins] is None:
+                distance += 1
+            # Offset by distance so borrowed values rarely equal real ones
+            signature[b] = bins[(b + distance) % num_bins] + distance * MERSENNE_PRIME
+    return tuple(signature)
+
+
+def band_keys(signature: tuple, bands: int, rows: int) -> list:
+    """
+    One bucket key per band, as signed 64-bit ints (SQLite INTEGER).
+    """
+    keys = []
+    for band in range(bands):
+        chunk = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(
+            b"".join(v.to_bytes(4, "little") for v in chunk), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def estimate_jaccard(sig_a: tuple, sig_b: tuple) -> float:
+    if sig_a is None or sig_b is None:
+        return 1.0 if sig_a is sig_b else 0.0
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
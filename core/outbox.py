@@ -0,0 +1,331 @@
+# core/outbox.py
+
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from core.exceptions import PartialDeliveryError, SinkRetryableError
+from core.process_local import ProcessSingleton
+
+# =====================================================
+# Outbox setup
+# =====================================================
+#
+# The request path only INSERTs into the outbox table (one local,
+# durable write). A background dispatcher drains due rows to the
+# registered sinks:
+#
+#   PENDING  -> INFLIGHT (leased) -> DELIVERED
+#                                 -> PENDING again, with backoff
+#                                 -> DEAD after MAX_ATTEMPTS
+#
+# Delivery is at-least-once: a row whose lease expires (crash while
+# in flight) is delivered again. Every row carries an idempotency key
+# that is passed to the sink so duplicates can be recognised.
+
+LOG_DIR = Path("logs")
+DB_PATH = LOG_DIR / "outbox.db"
+
+BATCH_SIZE = 100          # rows claimed per dispatcher pass
+POLL_INTERVAL = 1.0       # seconds between passes when idle
+LEASE_SECONDS = 60.0      # in-flight rows are re-claimable after this
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 2.0        # seconds, doubled per attempt
+BACKOFF_MAX = 600.0
+DELIVERED_RETENTION = 7 * 24 * 60 * 60
+
+# FULL: an accepted row survives power loss, at one fsync per insert
+SYNCHRONOUS = "FULL"
+
+PENDING = "PENDING"
+INFLIGHT = "INFLIGHT"
+DELIVERED = "DELIVERED"
+DEAD = "DEAD"
+
+
+def _connect(db_path) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            sink TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            lease_until REAL,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            delivered_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS outbox_due
+        ON outbox (status, next_attempt_at)
+    """)
+    conn.commit()
+    return conn
+
+
+class Outbox:
+    """
+    Durable queue of sink deliveries backed by SQLite.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._conn = _connect(db_path)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    # -------------------------------------------------
+    # Request path
+    # -------------------------------------------------
+    def enqueue(self, sink: str, payload, idempotency_key: str = None) -> str:
+        """
+        Record a delivery for sink. Returns the idempotency key.
+        Enqueueing the same key twice is a no-op.
+        """
+        key = idempotency_key or uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR IGNORE INTO outbox (
+                    idempotency_key, sink, payload, status,
+                    next_attempt_at, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    sink,
+                    json.dumps(payload, ensure_ascii=False),
+                    PENDING,
+                    time.time(),
+                    datetime.utcnow().isoformat(),
+                )
+            )
+            self._conn.commit()
+        self.wake()
+        return key
+
+    # -------------------------------------------------
+    # Dispatcher side
+    # -------------------------------------------------
+    def claim(self, limit: int = BATCH_SIZE, lease: float = LEASE_SECONDS):
+        """
+        Lease up to limit due rows. Returns [(id, key, sink, payload, attempts)].
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                UPDATE outbox
+                SET status = ?, lease_until = ?, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM outbox
+                    WHERE (status = ? AND next_attempt_at <= ?)
+                       OR (status = ? AND lease_until <= ?)
+                    ORDER BY id
+                    LIMIT ?
+                )
+                RETURNING id, idempotency_key, sink, payload, attempts
+                """,
+                (INFLIGHT, now + lease, PENDING, now, INFLIGHT, now, limit)
+            ).fetchall()
+            self._conn.commit()
+        rows.sort()
+        return [(i, k, s, json.loads(p), a) for i, k, s, p, a in rows]
+
+    def mark_delivered(self, ids):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, delivered_at = ?, lease_until = NULL WHERE id = ?",
+                [(DELIVERED, datetime.utcnow().isoformat(), i) for i in ids]
+            )
+            self._conn.commit()
+
+    def mark_failed(self, rows, error: str, max_attempts: int = MAX_ATTEMPTS):
+        """
+        rows: [(id, attempts)] that failed their latest delivery.
+        """
+        now = time.time()
+        updates = []
+        for row_id, attempts in rows:
+            if attempts >= max_attempts:
+                updates.append((DEAD, now, error, row_id))
+            else:
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempts - 1)))
+                updates.append((PENDING, now + delay, error, row_id))
+        with self._lock:
+            self._conn.executemany(
+                """
+                UPDATE outbox
+                SET status = ?, next_attempt_at = ?, last_error = ?, lease_until = NULL
+                WHERE id = ?
+                """,
+                updates
+            )
+            self._conn.commit()
+
+    def requeue_dead(self, sink: str = None) -> int:
+        """
+        Move dead-lettered rows back to PENDING with a fresh attempt budget.
+        """
+        query = "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?"
+        params = [PENDING, time.time(), DEAD]
+        if sink is not None:
+            query += " AND sink = ?"
+            params.append(sink)
+        with self._lock:
+            count = self._conn.execute(query, params).rowcount
+            self._conn.commit()
+        self.wake()
+        return count
+
+    def purge_delivered(self, older_than: float = DELIVERED_RETENTION) -> int:
+        cutoff = datetime.utcfromtimestamp(time.time() - older_than).isoformat()
+        with self._lock:
+            count = self._conn.execute(
+                "DELETE FROM outbox WHERE status = ? AND delivered_at < ?",
+                (DELIVERED, cutoff)
+            ).rowcount
+            self._conn.commit()
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sink, status, COUNT(*) FROM outbox GROUP BY sink, status"
+            ).fetchall()
+        result = {}
+        for sink, status, count in rows:
+            result.setdefault(sink, {})[status] = count
+        return result
+
+    def wake(self):
+        self._wakeup.set()
+
+    def wait_for_work(self, timeout: float):
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+
+class OutboxDispatcher:
+    """
+    Background thread draining the outbox into registered sinks.
+
+    A sink is a callable taking [(idempotency_key, payload)] and
+    raising on failure; the whole batch is then retried later, or only
+    the part after e.sent for a PartialDeliveryError.
+    """
+
+    def __init__(self, outbox: Outbox, sinks: dict = None, poll_interval: float = POLL_INTERVAL):
+        self.outbox = outbox
+        self.sinks = dict(sinks or {})
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+
+    def register_sink(self, name: str, deliver):
+        self.sinks[name] = deliver
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="outbox-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        self.outbox.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> int:
+        """
+        One dispatch pass. Returns the number of rows claimed.
+        """
+        claimed = self.outbox.claim()
+        by_sink = {}
+        for row in claimed:
+            by_sink.setdefault(row[2], []).append(row)
+
+        for sink, rows in by_sink.items():
+            deliver = self.sinks.get(sink)
+            if deliver is None:
+                self.outbox.mark_failed(
+                    [(r[0], r[4]) for r in rows], f"No sink registered: {sink}"
+                )
+                continue
+            try:
+                deliver([(r[1], r[3]) for r in rows])
+            except Exception as e:
+                if isinstance(e, PartialDeliveryError):
+                    self.outbox.mark_delivered([r[0] for r in rows[:e.sent]])
+                    rows = rows[e.sent:]
+                    e = e.__cause__ or e
+                if not isinstance(e, SinkRetryableError):
+                    traceback.print_exc()
+                self.outbox.mark_failed([(r[0], r[4]) for r in rows], repr(e))
+            else:
+                self.outbox.mark_delivered([r[0] for r in rows])
+
+        return len(claimed)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                claimed = self.run_once()
+                now = time.time()
+                if now - self._last_purge > 3600:
+                    self.outbox.purge_delivered()
+                    self._last_purge = now
+            except Exception:
+                traceback.print_exc()
+                claimed = 0
+
+            if not claimed:
+                self.outbox.wait_for_work(self.poll_interval)
+
+
+# =====================================================
+# Process-wide outbox
+# =====================================================
+
+# Neither the dispatcher thread nor the SQLite connection may be used
+# in a forked child; both are recreated on demand
+_outbox = ProcessSingleton(Outbox)
+_dispatcher = ProcessSingleton(lambda: OutboxDispatcher(get_outbox()))
+_sinks_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    return _outbox.get()
+
+
+def start_dispatcher(sinks: dict) -> OutboxDispatcher:
+    """
+    Start the process-wide dispatcher (once) and register sinks on it.
+    """
+    dispatcher = _dispatcher.get()
+    with _sinks_lock:
+        for name, deliver in sinks.items():
+            dispatcher.register_sink(name, deliver)
+        dispatcher.start()
+    return dispatcher
+
+
+def enqueue(sink: str, payload, idempotency_key: str = None) -> str:
+    return get_outbox().enqueue(sink, payload, idempotency_key)
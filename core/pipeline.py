@@ -0,0 +1,352 @@
+# core/pipeline.py
+
+import json
+import operator
+from pathlib import Path
+from typing import Dict, List
+
+from core.refusal import Refusal
+from explanation.prompt_builder import CompiledTemplate
+
+# =====================================================
+# Structured-query pipeline
+# =====================================================
+#
+#   query  --schema-->  facts  --rules-->  proof symbols
+#          --verdict engine-->  verdict  --template-->  explanation
+#
+# CompiledPipeline checks the four documents once and turns them into
+# plain tuples and closures; run() then only walks that plan. Every
+# string the pipeline can emit comes from the documents, so the
+# template's forbidden words are screened once, at compile time.
+#
+# Fail closed: a query with a missing, unknown, mistyped or
+# out-of-range field is refused, never evaluated.
+
+QUERY_SCHEMA_PATH = Path("queries") / "query_schema.json"
+RULES_PATH = Path("rules") / "rules.json"
+VERDICT_ENGINE_PATH = Path("verdict") / "verdict_engine.json"
+EXPLANATION_TEMPLATE_PATH = Path("explanation") / "explanation_template.json"
+
+MAX_CACHED_RESULTS = 4096   # distinct queries remembered per pipeline
+MAX_COMPILED = 8            # document sets remembered by run_pipeline()
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# Template slots the pipeline knows how to fill
+SLOTS = ("verdict", "proof.symbols_used", "proof.steps")
+
+# bool is a subclass of int: an integer field must not take True
+TYPE_CHECKS = {
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "string": lambda v: isinstance(v, str),
+}
+
+
+def _dump(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+class _Field:
+    __slots__ = ("name", "type", "check", "minimum", "maximum", "enum")
+
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.type = spec.get("type")
+        if self.type not in TYPE_CHECKS:
+            raise ValueError(f"Field {name}: unsupported type {self.type!r}")
+        self.check = TYPE_CHECKS[self.type]
+        self.minimum = spec.get("minimum")
+        self.maximum = spec.get("maximum")
+        self.enum = frozenset(spec["enum"]) if "enum" in spec else None
+        # Free text would escape the compile-time forbidden-word screen
+        if self.type == "string" and self.enum is None:
+            raise ValueError(f"Field {name}: string fields need an enum")
+
+    def validate(self, value):
+        if not self.check(value):
+            raise Refusal(f"WRONG_TYPE: {self.name} must be {self.type}")
+        if self.minimum is not None and value < self.minimum:
+            raise Refusal(f"OUT_OF_RANGE: {self.name} < {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise Refusal(f"OUT_OF_RANGE: {self.name} > {self.maximum}")
+        if self.enum is not None and value not in self.enum:
+            raise Refusal(f"OUT_OF_RANGE: {self.name} not one of the listed values")
+
+
+class _Rule:
+    __slots__ = ("rule_id", "symbol", "conditions", "source", "citation")
+
+    def __init__(self, spec: dict, fields: Dict[str, _Field], index: Dict[str, int]):
+        self.rule_id = spec["rule_id"]
+        self.symbol = spec["symbol"]
+        self.source = spec.get("source", "")
+        self.citation = spec.get("citation", "")
+
+        conditions = []
+        for cond in spec.get("conditions", []):
+            name, op = cond["field"], cond["op"]
+            if name not in fields:
+                raise ValueError(f"Rule {self.rule_id}: unknown field {name}")
+            if op not in OPERATORS:
+                raise ValueError(f"Rule {self.rule_id}: unknown operator {op}")
+            if not fields[name].check(cond["value"]):
+                raise ValueError(f"Rule {self.rule_id}: {name} compared to a non-{fields[name].type}")
+            # (slot in the value tuple, test, value, step text prefix)
+            conditions.append((
+                index[name],
+                OPERATORS[op],
+                cond["value"],
+                f"{self.rule_id}: {name} {op} {_dump(cond['value'])} holds for ",
+            ))
+        if not conditions:
+            raise ValueError(f"Rule {self.rule_id}: no conditions")
+        self.conditions = tuple(conditions)
+
+    def steps(self, values: tuple):
+        """
+        Proof steps if every condition holds for values, else None.
+        """
+        steps = []
+        for slot, test, expected, text in self.conditions:
+            observed = values[slot]
+            # An absent optional field satisfies no condition
+            if observed is None or not test(observed, expected):
+                return None
+            steps.append(text + _dump(observed))
+        steps.append(f"{self.rule_id}: derives {self.symbol}")
+        return steps
+
+
+class CompiledPipeline:
+    """
+    Query schema, ruleset, verdict engine and explanation template,
+    validated and compiled once. run() is safe to call from any
+    number of threads.
+    """
+
+    def __init__(self, query_schema: dict, ruleset: dict, verdict_engine: dict, template: dict):
+        # -------- schema --------
+        fields = {
+            name: _Field(name, spec)
+            for name, spec in query_schema.get("fields", {}).items()
+        }
+        self.field_names = tuple(fields)
+        self._fields = tuple(fields.values())
+        self._allowed = frozenset(fields)
+        self._required = tuple(query_schema.get("required", self.field_names))
+        unknown = [name for name in self._required if name not in fields]
+        if unknown:
+            raise ValueError(f"Required fields missing from schema: {unknown}")
+        index = {name: i for i, name in enumerate(self.field_names)}
+
+        # -------- rules --------
+        self._rules = tuple(_Rule(spec, fields, index) for spec in ruleset.get("rules", []))
+        symbols = {rule.symbol for rule in self._rules}
+
+        # -------- verdict engine (first match wins) --------
+        plan = []
+        for entry in verdict_engine.get("verdicts", []):
+            if "when_all_symbols" in entry:
+                required, match_all = frozenset(entry["when_all_symbols"]), True
+            else:
+                required, match_all = frozenset(entry.get("when_any_symbol", [])), False
+            undefined = required - symbols
+            if undefined:
+                raise ValueError(f"Verdict {entry['verdict']}: no rule derives {sorted(undefined)}")
+            plan.append((required, match_all, entry["verdict"]))
+        self._verdicts = tuple(plan)
+        self._default_verdict = verdict_engine.get("default_verdict", "NOT_PROVABLE")
+
+        # -------- explanation --------
+        self.template = CompiledTemplate(
+            template.get("template_id", "EXPLANATION_TEMPLATE"),
+            template.get("version", 1),
+            template["template"],
+        )
+        allowed_inputs = set(template.get("inputs_allowed", ("verdict", "proof")))
+        for slot in self.template.slots:
+            if slot not in SLOTS:
+                raise ValueError(f"Unknown template slot: {slot}")
+            if slot.split(".", 1)[0] not in allowed_inputs:
+                raise ValueError(f"Template slot not allowed: {slot}")
+
+        self.forbidden_words = tuple(w.lower() for w in template.get("forbidden_words", ()))
+        self._screen(fields)
+
+        self._cache: Dict[tuple, tuple] = {}
+
+    def _screen(self, fields: Dict[str, _Field]):
+        """
+        Refuse to compile documents whose output could contain a
+        forbidden word. Observed values are numbers, booleans or enum
+        strings, so the static strings cover everything emitted.
+        """
+        strings = list(self.template.segments)
+        strings += [self._default_verdict] + [v for _, _, v in self._verdicts]
+        for rule in self._rules:
+            strings += [rule.symbol, rule.source, rule.citation, rule.rule_id]
+            strings += [text for _, _, _, text in rule.conditions]
+        for field in fields.values():
+            strings += [_dump(v) for v in field.enum or ()]
+
+        for text in strings:
+            lowered = text.lower()
+            for word in self.forbidden_words:
+                if word in lowered:
+                    raise ValueError(f"Forbidden word {word!r} in pipeline output: {text!r}")
+
+    # -------------------------------------------------
+    # Evaluation
+    # -------------------------------------------------
+
+    def _values(self, query) -> tuple:
+        if not isinstance(query, dict):
+            raise Refusal("QUERY_NOT_AN_OBJECT")
+        unknown = query.keys() - self._allowed
+        if unknown:
+            raise Refusal(f"UNKNOWN_FIELD: {', '.join(sorted(unknown))}")
+        missing = [name for name in self._required if name not in query]
+        if missing:
+            raise Refusal(f"MISSING_FIELD: {', '.join(missing)}")
+
+        values = []
+        for field in self._fields:
+            value = query.get(field.name)
+            if value is not None or field.name in query:
+                field.validate(value)
+            values.append(value)
+        return tuple(values)
+
+    def _evaluate(self, values: tuple) -> tuple:
+        symbols = []
+        steps = []
+        sources = []
+        for rule in self._rules:
+            rule_steps = rule.steps(values)
+            if rule_steps is not None:
+                symbols.append(rule.symbol)
+                steps.extend(rule_steps)
+                sources.append((rule.symbol, rule.source, rule.citation))
+
+        fired = frozenset(symbols)
+        verdict = self._default_verdict
+        for required, match_all, candidate in self._verdicts:
+            if (required <= fired) if match_all else (required & fired):
+                verdict = candidate
+                break
+
+        explanation = self.template.render({
+            slot: self._slot_value(slot, verdict, symbols, steps)
+            for slot in self.template.slots
+        })
+        return verdict, tuple(symbols), tuple(steps), tuple(sources), explanation
+
+    @staticmethod
+    def _slot_value(slot: str, verdict: str, symbols, steps) -> str:
+        if slot == "verdict":
+            return verdict
+        if slot == "proof.symbols_used":
+            return ", ".join(symbols) if symbols else "none"
+        return "; ".join(steps) if steps else "none"
+
+    def run(self, query: dict) -> dict:
+        """
+        Evaluate one query. Raises Refusal instead of evaluating an
+        incomplete or malformed query.
+        """
+        values = self._values(query)
+        compiled = self._cache.get(values)
+        if compiled is None:
+            compiled = self._evaluate(values)
+            if len(self._cache) >= MAX_CACHED_RESULTS:
+                self._cache.clear()
+            self._cache[values] = compiled
+
+        verdict, symbols, steps, sources, explanation = compiled
+        return {
+            "verdict": verdict,
+            "proof": {
+                "symbols_used": list(symbols),
+                "steps": list(steps),
+            },
+            "sources": [
+                {"symbol": symbol, "source": source, "citation": citation}
+                for symbol, source, citation in sources
+            ],
+            "explanation": explanation,
+        }
+
+    def run_many(self, queries) -> List[object]:
+        """
+        Evaluate a batch. Each item is the result dict, or the Refusal
+        for that query: one bad query does not refuse the batch.
+        """
+        results = []
+        for query in queries:
+            try:
+                results.append(self.run(query))
+            except Refusal as r:
+                results.append(r)
+        return results
+
+
+# =====================================================
+# Public API
+# =====================================================
+
+def _load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_pipeline(
+    query_schema_path=QUERY_SCHEMA_PATH,
+    rules_path=RULES_PATH,
+    verdict_engine_path=VERDICT_ENGINE_PATH,
+    template_path=EXPLANATION_TEMPLATE_PATH,
+) -> CompiledPipeline:
+    """
+    Read and compile the four documents. Keep the result and call
+    run() / run_many() on it rather than reloading per query.
+    """
+    return CompiledPipeline(
+        _load_json(query_schema_path),
+        _load_json(rules_path),
+        _load_json(verdict_engine_path),
+        _load_json(template_path),
+    )
+
+
+_compiled: Dict[str, CompiledPipeline] = {}
+
+
+def run_pipeline(
+    query: dict,
+    query_schema: dict,
+    ruleset: dict,
+    verdict_engine: dict,
+    explanation_template: dict,
+) -> dict:
+    """
+    One-shot form of CompiledPipeline(...).run(query). The compiled
+    plan is reused while the same four documents are passed in.
+    """
+    documents = (query_schema, ruleset, verdict_engine, explanation_template)
+    key = json.dumps(documents, sort_keys=True)
+    pipeline = _compiled.get(key)
+    if pipeline is None:
+        pipeline = CompiledPipeline(*documents)
+        if len(_compiled) >= MAX_COMPILED:
+            _compiled.clear()
+        _compiled[key] = pipeline
+    return pipeline.run(query)
@@ -0,0 +1,447 @@
+# core/prefork.py
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import selectors
+import signal
+import socket
+import time
+import traceback
+from dataclasses import dataclass
+
+from core import engine, http_api
+
+# =====================================================
+# Pre-fork multi-process server
+# =====================================================
+#
+# Analysis is CPU-bound and runs on the event loop, so one process
+# serves one core. The parent warms the engine once, freezes the heap
+# (gc.freeze keeps the collector from touching, and so copying, the
+# shared pages), binds the socket and forks the workers; every worker
+# accepts on the inherited socket with the engine already in memory.
+#
+# Parent signals:
+#   SIGHUP           re-import the rule modules and knowledge base
+#                    (engine.reload), start a new generation from them,
+#                    then gracefully stop the old one. Any other code
+#                    change needs a full restart.
+#   SIGTERM, SIGINT  graceful shutdown
+#
+# Workers report over a pipe (one JSON line per HEARTBEAT_SECONDS) and
+# recycle themselves after MAX_REQUESTS (+ up to MAX_REQUESTS_JITTER of
+# it, so they do not all restart together). A worker whose heartbeat
+# stops is killed.
+#
+# The HTTP API logs nothing (no audit trail, chat history or Sheets
+# rows), so workers start no sink threads.
+
+WORKERS = os.cpu_count() or 1
+MAX_REQUESTS = 100_000
+MAX_REQUESTS_JITTER = 0.1     # fraction of max_requests
+
+HEARTBEAT_SECONDS = 1.0
+HEARTBEAT_TIMEOUT = 30.0      # a batch request can block the loop for a while
+RESPAWN_BACKOFF = 1.0         # delay after a worker dies during startup
+SHUTDOWN_TIMEOUT = http_api.GRACE_SECONDS + 5.0
+
+STATUS_FILE = "logs/prefork_status.json"
+STATUS_SECONDS = 2.0
+
+
+@dataclass
+class WorkerInfo:
+    pid: int
+    generation: int
+    heartbeat_fd: int
+    started: float
+    last_heartbeat: float
+    requests: int = 0
+    connections: int = 0
+    stopping: bool = False
+
+
+# -----------------------------------------------------
+# Worker process
+# -----------------------------------------------------
+
+def _worker_main(sock, heartbeat_fd: int, generation: int, max_requests: int):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # the parent coordinates shutdown
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+
+    # The frozen heap stays frozen: unfreezing would let full
+    # collections touch (and copy) every shared page
+    state = http_api.ServerState(max_requests=max_requests)
+
+    async def heartbeat():
+        while not state.stopping:
+            line = json.dumps({
+                "pid": os.getpid(),
+                "generation": generation,
+                "requests": state.requests,
+                "connections": len(state.connections),
+                "ts": time.time(),
+            }) + "\n"
+            try:
+                os.write(heartbeat_fd, line.encode("utf-8"))
+            except OSError:
+                # Parent is gone: nobody will restart or reap us
+                state.stop()
+                return
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, state.stop)
+        beat = asyncio.create_task(heartbeat())
+        try:
+            await http_api.serve(sock=sock, state=state)
+        finally:
+            beat.cancel()
+
+    asyncio.run(run())
+
+
+# -----------------------------------------------------
+# Parent process
+# -----------------------------------------------------
+
+class Arbiter:
+    """
+    Owns the listening socket and keeps `workers` processes of the
+    current generation running.
+    """
+
+    def __init__(
+        self,
+        host: str = http_api.HOST,
+        port: int = http_api.PORT,
+        workers: int = WORKERS,
+        max_requests: int = MAX_REQUESTS,
+        max_requests_jitter: float = MAX_REQUESTS_JITTER,
+        status_file: str = STATUS_FILE,
+    ):
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.status_file = status_file
+
+        self.generation = 0
+        self.workers = {}           # pid -> WorkerInfo
+        self._buffers = {}          # heartbeat fd -> partial line
+        self._signals = []
+        self._stopping = False
+        self._respawn_after = 0.0
+        self._last_status = 0.0
+
+        self.sock = None
+        self._selector = None
+        self._wake_r = self._wake_w = None
+
+    # ---------- setup ----------
+
+    def _prepare_engine(self):
+        engine.warm_up(with_sinks=False)
+        gc.collect()
+        gc.freeze()
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(1024)
+        sock.setblocking(False)
+        self.sock = sock
+        self.port = sock.getsockname()[1]
+
+    def _install_signals(self):
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        signal.set_wakeup_fd(self._wake_w)
+
+        def record(signum, frame):
+            self._signals.append(signum)
+
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, record)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    # ---------- workers ----------
+
+    def _spawn(self):
+        read_fd, write_fd = os.pipe()
+        max_requests = None
+        if self.max_requests:
+            jitter = int(self.max_requests * self.max_requests_jitter)
+            max_requests = self.max_requests + random.randint(0, jitter)
+
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                os.close(read_fd)
+                for fd in [self._wake_r, self._wake_w, *self._buffers]:
+                    os.close(fd)
+                _worker_main(self.sock, write_fd, self.generation, max_requests)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+
+        os.close(write_fd)
+        os.set_blocking(read_fd, False)
+        now = time.monotonic()
+        self.workers[pid] = WorkerInfo(pid, self.generation, read_fd, now, now)
+        self._buffers[read_fd] = b""
+        self._selector.register(read_fd, selectors.EVENT_READ, pid)
+
+    def _drop(self, info: WorkerInfo):
+        try:
+            self._selector.unregister(info.heartbeat_fd)
+        except KeyError:
+            pass        # already unregistered at EOF
+        os.close(info.heartbeat_fd)
+        self._buffers.pop(info.heartbeat_fd, None)
+        self.workers.pop(info.pid, None)
+
+    def _signal_worker(self, info: WorkerInfo, signum):
+        try:
+            os.kill(info.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _stop_worker(self, info: WorkerInfo):
+        if not info.stopping:
+            info.stopping = True
+            self._signal_worker(info, signal.SIGTERM)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            info = self.workers.get(pid)
+            if info is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if not info.stopping and code != 0:
+                print(f"❌ Worker {pid} exited with {code}")
+                if time.monotonic() - info.started < RESPAWN_BACKOFF:
+                    self._respawn_after = time.monotonic() + RESPAWN_BACKOFF
+            self._drop(info)
+
+    def _read_heartbeats(self, fd: int, pid: int):
+        info = self.workers.get(pid)
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        if not data:
+            # Worker exited; it is reaped on SIGCHLD
+            self._selector.unregister(fd)
+            return
+        if info is None:
+            return
+
+        lines = (self._buffers[fd] + data).split(b"\n")
+        self._buffers[fd] = lines.pop()
+        for line in lines:
+            try:
+                beat = json.loads(line)
+            except ValueError:
+                continue
+            info.last_heartbeat = time.monotonic()
+            info.requests = beat.get("requests", info.requests)
+            info.connections = beat.get("connections", info.connections)
+
+    def _kill_stale(self):
+        now = time.monotonic()
+        for info in list(self.workers.values()):
+            if now - info.last_heartbeat > HEARTBEAT_TIMEOUT:
+                print(f"❌ Worker {info.pid} missed heartbeats, killing")
+                info.stopping = True
+                self._signal_worker(info, signal.SIGKILL)
+
+    def _maintain(self):
+        if self._stopping or time.monotonic() < self._respawn_after:
+            return
+        current = [
+            info for info in self.workers.values()
+            if info.generation == self.generation and not info.stopping
+        ]
+        for _ in range(self.num_workers - len(current)):
+            self._spawn()
+
+    # ---------- signals ----------
+
+    def _handle_signals(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        signals, self._signals = self._signals, []
+        for signum in signals:
+            if signum == signal.SIGCHLD:
+                self._reap()
+            elif signum == signal.SIGHUP:
+                self.reload()
+            elif signum in (signal.SIGTERM, signal.SIGINT):
+                self._stopping = True
+
+    def reload(self):
+        """
+        Rebuild the engine from the current rule modules and knowledge
+        base, fork a new generation from it and gracefully stop the
+        old one. A failed reload keeps the running workers.
+        """
+        gc.unfreeze()
+        try:
+            engine.reload()
+            self._prepare_engine()
+        except Exception:
+            print("❌ Engine reload failed; keeping current workers")
+            traceback.print_exc()
+            gc.freeze()
+            return
+
+        self.generation += 1
+        old = [info for info in self.workers.values() if info.generation < self.generation]
+        self._respawn_after = 0.0
+        self._maintain()
+        for info in old:
+            self._stop_worker(info)
+
+    # ---------- status ----------
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "pid": os.getpid(),
+            "address": f"{self.host}:{self.port}",
+            "generation": self.generation,
+            "knowledge_version": engine.get_knowledge().version,
+            "workers": [
+                {
+                    "pid": info.pid,
+                    "generation": info.generation,
+                    "requests": info.requests,
+                    "connections": info.connections,
+                    "uptime_s": round(now - info.started, 1),
+                    "heartbeat_age_s": round(now - info.last_heartbeat, 1),
+                    "stopping": info.stopping,
+                }
+                for info in sorted(self.workers.values(), key=lambda w: w.pid)
+            ],
+            "ts": int(time.time()),
+        }
+
+    def _write_status(self):
+        if not self.status_file:
+            return
+        directory = os.path.dirname(self.status_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.status_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.status(), f, indent=2)
+            os.replace(tmp, self.status_file)
+        except OSError:
+            traceback.print_exc()
+
+    # ---------- main loop ----------
+
+    def run(self):
+        self._prepare_engine()
+        self._bind()
+        self._install_signals()
+        print(f"Serving on http://{self.host}:{self.port} with {self.num_workers} workers")
+
+        try:
+            self._maintain()
+            while not self._stopping:
+                for key, _ in self._selector.select(timeout=HEARTBEAT_SECONDS):
+                    if key.data is None:
+                        self._handle_signals()
+                    else:
+                        self._read_heartbeats(key.fd, key.data)
+                self._reap()
+                self._kill_stale()
+                self._maintain()
+
+                if time.monotonic() - self._last_status >= STATUS_SECONDS:
+                    self._write_status()
+                    self._last_status = time.monotonic()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """
+        SIGTERM every worker, wait for them to drain, then SIGKILL
+        whatever is left.
+        """
+        self._stopping = True
+        for info in list(self.workers.values()):
+            self._stop_worker(info)
+
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for info in list(self.workers.values()):
+            self._signal_worker(info, signal.SIGKILL)
+        while self.workers:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            info = self.workers.get(pid)
+            if info is not None:
+                self._drop(info)
+
+        self._write_status()
+        self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fork medical-legal rights HTTP API")
+    parser.add_argument("--host", default=http_api.HOST)
+    parser.add_argument("--port", type=int, default=http_api.PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS,
+                        help="recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=float, default=MAX_REQUESTS_JITTER,
+                        help="add up to this fraction of --max-requests per worker")
+    parser.add_argument("--status-file", default=STATUS_FILE)
+    args = parser.parse_args(argv)
+
+    Arbiter(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        status_file=args.status_file,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# core/process_local.py
+
+import atexit
+import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+# =====================================================
+# Process-wide background services
+# =====================================================
+#
+# Writers, pools and SQLite connections are built lazily, once per
+# process. None of them survives fork(): threads are not copied into
+# the child and a SQLite connection must not be shared with it. A
+# ProcessSingleton therefore forgets its instance (and its lock, which
+# may have been held by a thread of the parent) in a forked child,
+# which builds its own on first use. Read-only objects worth sharing
+# with the children (the warmed engine) are marked inherited: the
+# child keeps the instance and only gets a new lock.
+
+T = TypeVar("T")
+
+# Queue sentinel for background writer threads
+STOP = object()
+
+
+class FlushRequest:
+    """
+    Queued behind pending items; the writer thread sets done once
+    everything ahead of it has been written.
+    """
+
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+def after_fork(reset: Callable[[], None]):
+    """
+    Run reset() in every forked child (POSIX only).
+    """
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=reset)
+
+
+class ProcessSingleton(Generic[T]):
+    """
+    Lazily built, process-wide instance of factory(). With
+    close_at_exit, every instance built has close() run at exit; with
+    inherited, a forked child keeps the parent's instance.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        close_at_exit: bool = False,
+        inherited: bool = False,
+    ):
+        self._factory = factory
+        self._close_at_exit = close_at_exit
+        self._inherited = inherited
+        self._instance = None
+        self._lock = threading.Lock()
+        after_fork(self._reset)
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._install(self._factory())
+        return instance
+
+    def peek(self) -> Optional[T]:
+        """
+        The instance if one has been built, without building it.
+        """
+        return self._instance
+
+    def replace(self, instance: T) -> Optional[T]:
+        """
+        Install instance in place of the current one; returns the old
+        one (the caller closes it).
+        """
+        with self._lock:
+            old = self._instance
+            self._install(instance)
+        return old
+
+    def _install(self, instance: T) -> T:
+        if self._close_at_exit:
+            atexit.register(instance.close)
+        self._instance = instance
+        return instance
+
+    def _reset(self):
+        if not self._inherited:
+            self._instance = None
+        self._lock = threading.Lock()
@@ -0,0 +1,113 @@
+# core/proof.py
+
+import hashlib
+import threading
+from typing import Iterable, NamedTuple, Tuple
+
+# =====================================================
+# Proof steps
+# =====================================================
+#
+# A proof step records that one fact satisfied one clause of one
+# rule: (item, clause, fact, value). The set of possible steps is
+# small and fixed by the evaluator, so steps are interned: every
+# verdict that uses a step holds the same immutable object, and a
+# proof bundle is a tuple of shared references.
+#
+# Step ids are a hash of the content, so the same step has the same
+# id in every process and every run. The audit log records ids only;
+# the first AUDIT_TRAIL in a process that uses a step also carries its
+# definition. A step counts as announced only once its trail has been
+# accepted by the writer, and every step is announced again after the
+# writer loses any line (its dropped count is the epoch).
+
+ID_PREFIX = "P"
+
+
+class ProofStep(NamedTuple):
+    # A tuple, so it serializes as a compact JSON array with no hooks:
+    # ["P1f0c9a2b", "RIGHT_TO_INFORMATION", "any", "information_denied", "yes"]
+    step_id: str
+    item_id: str
+    clause: str
+    fact: str
+    value: str
+
+
+ProofBundle = Tuple[ProofStep, ...]
+
+_steps = {}                 # (item_id, clause, fact, value) -> ProofStep
+_by_id = {}                 # step_id -> ProofStep
+_announced = set()          # step ids already defined in the audit log
+_announced_epoch = 0        # writer drop count _announced is valid for
+_lock = threading.Lock()
+
+
+def _step_id(key) -> str:
+    digest = hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=4)
+    return ID_PREFIX + digest.hexdigest()
+
+
+def step(item_id: str, clause: str, fact: str, value: str = "yes") -> ProofStep:
+    """
+    The interned step for (item_id, clause, fact, value).
+    """
+    key = (item_id, clause, fact, value)
+    cached = _steps.get(key)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        cached = _steps.get(key)
+        if cached is not None:
+            return cached
+        step_id = _step_id(key)
+        other = _by_id.get(step_id)
+        if other is not None:
+            raise ValueError(f"Proof step id collision: {other} / {key}")
+        interned = ProofStep(step_id, *key)
+        _by_id[step_id] = interned
+        _steps[key] = interned
+    return interned
+
+
+def get_step(step_id: str) -> ProofStep:
+    return _by_id[step_id]
+
+
+def step_ids(bundle: Iterable) -> list:
+    """
+    Ids of a bundle; accepts interned steps or their decoded JSON
+    arrays (e.g. a verdict read back from chat history).
+    """
+    return [s[0] for s in bundle]
+
+
+def describe(s: ProofStep) -> str:
+    """
+    One-line text form, as used for ExplanationInput.proof_steps.
+    """
+    return f"{s.item_id} [{s.clause}]: {s.fact} = {s.value}"
+
+
+def unannounced(bundle: Iterable[ProofStep], epoch: int = 0) -> list:
+    """
+    Steps of bundle whose definition this process has not written to
+    the audit log (in this epoch). Call announced() once written.
+    """
+    global _announced_epoch
+    with _lock:
+        if epoch != _announced_epoch:
+            _announced.clear()
+            _announced_epoch = epoch
+        return [s for s in dict.fromkeys(bundle) if s.step_id not in _announced]
+
+
+def announced(steps: Iterable[ProofStep], epoch: int = 0):
+    with _lock:
+        if epoch == _announced_epoch:
+            _announced.update(s.step_id for s in steps)
+
+
+def interned_count() -> int:
+    return len(_steps)
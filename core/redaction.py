@@ -0,0 +1,153 @@
+# core/redaction.py
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Tuple
+
+# =====================================================
+# PII redaction (applied before any sink)
+# =====================================================
+#
+# All patterns are compiled into ONE alternation with a named group
+# per kind, so a text is scanned once however many kinds are enabled.
+# Configured names are folded into a character trie first, which keeps
+# the regex linear in the text rather than in the size of the list.
+
+# Lookbehind: only try at the start of a local part, not inside every word
+EMAIL = r"(?<![\w.%+-])[\w.%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"
+
+# 12 digits in 4-4-4 groups, first digit 2-9 (UIDAI format)
+AADHAAR = r"(?<![\d+])[2-9]\d{3}[ -]?\d{4}[ -]?\d{4}(?!\d)"
+
+# Indian mobile numbers with optional +91 / 0091 / 0 prefix
+PHONE = r"(?<![\d+])(?:(?:\+|00)91[ -]?|0)?[6-9]\d{4}[ -]?\d{5}(?!\d)"
+
+NAMES_FILE = os.environ.get("REDACTION_NAMES_FILE", "config/redaction_names.txt")
+
+MASKS = {
+    "AADHAAR": "[AADHAAR]",
+    "PHONE": "[PHONE]",
+    "EMAIL": "[EMAIL]",
+    "NAME": "[NAME]",
+}
+
+
+@dataclass(frozen=True)
+class RedactionSpan:
+    kind: str
+    start: int        # offsets in the original text
+    end: int
+
+
+@dataclass(frozen=True)
+class RedactionResult:
+    text: str
+    spans: Tuple[RedactionSpan, ...]
+    seconds: float
+
+
+def _trie_regex(words) -> str:
+    """
+    Regex matching any of words, factored on common prefixes.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        alternatives = []
+        optional = False
+        for char in sorted(node):
+            if char == "":
+                optional = True
+            else:
+                alternatives.append(re.escape(char) + build(node[char]))
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        if optional:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def _compile(names: Iterable[str]):
+    # Longest kinds first: an Aadhaar number contains a phone-shaped run
+    parts = [
+        f"(?P<AADHAAR>{AADHAAR})",
+        f"(?P<PHONE>{PHONE})",
+        f"(?P<EMAIL>{EMAIL})",
+    ]
+    names = sorted({n.strip().lower() for n in names if n.strip()})
+    if names:
+        parts.append(rf"(?P<NAME>\b{_trie_regex(names)}\b)")
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+
+def _load_names(path) -> list:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        return []
+
+
+_pattern = _compile(_load_names(NAMES_FILE))
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "redacted": 0, "seconds": 0.0, "max_seconds": 0.0}
+
+
+def set_names(names: Iterable[str]):
+    """
+    Replace the configured name list (e.g. from a deployment secret).
+    """
+    global _pattern
+    _pattern = _compile(names)
+
+
+def redact(text: str) -> RedactionResult:
+    """
+    Mask PII in text in a single scan.
+    """
+    start_time = time.perf_counter()
+    pieces = []
+    spans = []
+    last = 0
+    for match in _pattern.finditer(text):
+        kind = match.lastgroup
+        pieces.append(text[last:match.start()])
+        pieces.append(MASKS[kind])
+        spans.append(RedactionSpan(kind, match.start(), match.end()))
+        last = match.end()
+
+    if spans:
+        pieces.append(text[last:])
+        text = "".join(pieces)
+    seconds = time.perf_counter() - start_time
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["redacted"] += len(spans)
+        _stats["seconds"] += seconds
+        _stats["max_seconds"] = max(_stats["max_seconds"], seconds)
+
+    return RedactionResult(text, tuple(spans), seconds)
+
+
+def redact_text(text: str) -> str:
+    return redact(text).text
+
+
+def redaction_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["mean_seconds"] = stats["seconds"] / stats["calls"] if stats["calls"] else 0.0
+    return stats
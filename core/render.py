@@ -0,0 +1,128 @@
+# core/render.py
+
+import copy
+import html
+import threading
+
+from core.verdict_json import strings_only
+
+# =====================================================
+# Verdict HTML fragments
+# =====================================================
+#
+# Each right / duty / procedural item renders to the same HTML every
+# time, so fragments are cached per (knowledge version, style, id) and
+# a verdict section is one string join of cached fragments. The UI
+# sends one st.markdown call per section instead of one per line.
+#
+# The wording comes from core/rights_evaluator.py, not from the
+# knowledge version, so a cached fragment is only used for an item
+# equal to the one it was rendered from.
+
+RIGHT = "right"
+DUTY = "duty"
+PROCEDURAL = "procedural"               # under proven rights
+PROCEDURAL_TITLED = "procedural_titled" # procedural-only verdicts
+
+# Extra CSS for the classes used below (st.caption look-alike)
+CSS = """
+.verdict-caption {
+    color: rgba(49, 51, 63, 0.6);
+    font-size: 14px;
+    margin-bottom: 0.5rem;
+}
+"""
+
+_fragments = {}
+_fragments_version = None
+_fragments_lock = threading.Lock()
+
+
+def _lines(item) -> str:
+    return "".join(
+        f"<li>{html.escape(str(line))}</li>" for line in item.get("explanation", [])
+    )
+
+
+def _source(item) -> str:
+    return f"{html.escape(str(item['source']))} — {html.escape(str(item['citation']))}"
+
+
+def _explained(title: str, item, explanations: bool) -> str:
+    if not explanations:
+        return ""
+    return f"<p><b>{title}</b></p><ul>{_lines(item)}</ul>"
+
+
+def _render(style: str, item, explanations: bool = True) -> str:
+    item_id = html.escape(str(item["id"]))
+
+    if style == RIGHT:
+        return (
+            '<div class="proven-right">'
+            f"<h3>{item_id}</h3>"
+            f"<p><b>Source:</b> {_source(item)}</p>"
+            + _explained("What this right guarantees:", item, explanations)
+            + "</div>"
+        )
+    if style == DUTY:
+        return (
+            f"<h3>{item_id}</h3>"
+            f'<p class="verdict-caption">Source: {_source(item)}</p>'
+            + _explained("What this duty requires:", item, explanations)
+        )
+    if style == PROCEDURAL:
+        return (
+            f'<p class="verdict-caption">Source: {_source(item)}</p>'
+            + (f"<ul>{_lines(item)}</ul>" if explanations else "")
+        )
+    if style == PROCEDURAL_TITLED:
+        return (
+            f"<h3>{item_id}</h3>"
+            f'<p class="verdict-caption">Source: {_source(item)}</p>'
+            + _explained("What this means:", item, explanations)
+        )
+    raise ValueError(f"Unknown fragment style: {style}")
+
+
+def fragment(style: str, item: dict, version: str, explanations: bool = True) -> str:
+    """
+    Cached HTML for one verdict item. A new knowledge version drops
+    every fragment rendered from the old one. Without explanations
+    (load shedding, see core/admission.py) only title and source are
+    shown.
+    """
+    global _fragments_version
+    key = (style, item["id"], explanations)
+    if _fragments_version == version:
+        entry = _fragments.get(key)
+        if entry is not None and entry[0] == item:
+            return entry[1]
+
+    rendered = _render(style, item, explanations)
+    if not strings_only(item):
+        return rendered
+    with _fragments_lock:
+        if _fragments_version != version:
+            _fragments.clear()
+            _fragments_version = version
+        _fragments[key] = (copy.deepcopy(item), rendered)
+    return rendered
+
+
+def section(
+    style: str,
+    items,
+    version: str,
+    header: str = None,
+    explanations: bool = True,
+) -> str:
+    """
+    One HTML payload for a list of items, optionally preceded by a
+    rule and a section header.
+    """
+    parts = []
+    if header is not None:
+        parts.append(f"<hr><h3>{html.escape(header)}</h3>")
+    parts.extend(fragment(style, item, version, explanations) for item in items)
+    return "".join(parts)
@@ -1,29 +1,55 @@
 # core/rights_evaluator.py
 
+from core import proof
+
+
+# -------------------------------------------------
+# Proof: the interned steps for the facts that satisfy a clause
+# (empty when none do, i.e. the clause fails)
+# -------------------------------------------------
+def _satisfied(facts: dict, item_id: str, clause: str, names: tuple) -> tuple:
+    return tuple(
+        proof.step(item_id, clause, name)
+        for name in names
+        if facts.get(name) == "yes"
+    )
+
+
 class RightsEvaluator:
     def evaluate(self, facts: dict) -> dict:
 
         provable = []          # NHRC patient rights
         imc_duties = []        # IMC doctor duties
         procedural = []        # Procedural (non-advisory)
+        proof_steps = []       # Shared ProofStep objects (core/proof.py)
 
         emergency_violation = False
 
         # -------------------------------------------------
         # Helper: prevent duplicate IMC duties
         # -------------------------------------------------
-        def add_imc_duty(duty: dict):
+        def add_imc_duty(duty: dict, steps: tuple):
             if duty["id"] not in {d["id"] for d in imc_duties}:
                 imc_duties.append(duty)
+                proof_steps.extend(steps)
+
+        # -------------------------------------------------
+        # Helper: an IMC duty follows from a proven right when a
+        # doctor is involved; its proof is the right's plus that fact
+        # -------------------------------------------------
+        def doctor_duty(duty_id: str, steps: tuple) -> tuple:
+            return steps + _satisfied(facts, duty_id, "doctor", ("doctor_involved",))
 
         # =====================================================
         # NHRC-01 — Right to Information
         # =====================================================
-        if (
-            facts.get("information_denied") == "yes"
-            or facts.get("billing_not_explained") == "yes"
-            or facts.get("doctor_identity_not_disclosed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_INFORMATION", "any", (
+                "information_denied",
+                "billing_not_explained",
+                "doctor_identity_not_disclosed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_INFORMATION",
                 "source": "NHRC_2019",
@@ -40,6 +66,11 @@ class RightsEvaluator:
         # =====================================================
         records = facts.get("records_issue", {})
         if records.get("requested") == "yes" and records.get("denied") == "yes":
+            steps = (
+                proof.step("RIGHT_TO_RECORDS_AND_REPORTS", "requested", "records_issue.requested"),
+                proof.step("RIGHT_TO_RECORDS_AND_REPORTS", "denied", "records_issue.denied"),
+            )
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_RECORDS_AND_REPORTS",
                 "source": "NHRC_2019",
@@ -62,20 +93,24 @@ class RightsEvaluator:
                         "A physician must maintain proper medical records.",
                         "Records must be provided to patients as per regulations."
                     ]
-                })
+                }, doctor_duty("DUTY_TO_MAINTAIN_AND_PROVIDE_MEDICAL_RECORDS", steps))
 
         # =====================================================
         # NHRC-03 — Emergency Medical Care (+ IMC 2.1.1)
         # =====================================================
-        if (
-            (facts.get("emergency_case") == "yes" or facts.get("emergency_claimed") == "yes")
-            and (
-                facts.get("treatment_refused") == "yes"
-                or facts.get("admission_denied") == "yes"
-                or facts.get("payment_demanded") == "yes"
-            )
-        ):
+        emergency = _satisfied(facts, "RIGHT_TO_EMERGENCY_MEDICAL_CARE", "emergency", (
+            "emergency_case",
+            "emergency_claimed",
+        ))
+        denial = _satisfied(facts, "RIGHT_TO_EMERGENCY_MEDICAL_CARE", "denial", (
+            "treatment_refused",
+            "admission_denied",
+            "payment_demanded",
+        ))
+        if emergency and denial:
             emergency_violation = True
+            steps = emergency + denial
+            proof_steps.extend(steps)
 
             provable.append({
                 "id": "RIGHT_TO_EMERGENCY_MEDICAL_CARE",
@@ -99,12 +134,14 @@ class RightsEvaluator:
                         "A physician has a duty to respond to medical emergencies.",
                         "Emergency care must not be refused or delayed."
                     ]
-                })
+                }, doctor_duty("DUTY_TO_PROVIDE_EMERGENCY_CARE", steps))
 
         # =====================================================
         # NHRC-04 — Informed Consent (+ IMC 3.1)
         # =====================================================
-        if facts.get("consent_issue") == "yes":
+        steps = _satisfied(facts, "RIGHT_TO_INFORMED_CONSENT", "any", ("consent_issue",))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_INFORMED_CONSENT",
                 "source": "NHRC_2019",
@@ -127,16 +164,18 @@ class RightsEvaluator:
                         "A physician must obtain informed consent before procedures.",
                         "Risks, benefits, and alternatives must be explained."
                     ]
-                })
+                }, doctor_duty("DUTY_TO_OBTAIN_INFORMED_CONSENT", steps))
 
         # =====================================================
         # NHRC-06 — Second Opinion
         # =====================================================
-        if (
-            facts.get("second_opinion_denied") == "yes"
-            or facts.get("pressure_against_second_opinion") == "yes"
-            or facts.get("records_withheld_for_second_opinion") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_SECOND_OPINION", "any", (
+                "second_opinion_denied",
+                "pressure_against_second_opinion",
+                "records_withheld_for_second_opinion",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_SECOND_OPINION",
                 "source": "NHRC_2019",
@@ -151,13 +190,15 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-07 — Transparency in Rates
         # =====================================================
-        if (
-            facts.get("rates_not_disclosed") == "yes"
-            or facts.get("overcharging_claimed") == "yes"
-            or facts.get("forced_payment_claimed") == "yes"
-            or facts.get("billing_coercion_claimed") == "yes"
-            or facts.get("billing_not_explained") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_TRANSPARENCY_IN_RATES_AND_CARE", "any", (
+                "rates_not_disclosed",
+                "overcharging_claimed",
+                "forced_payment_claimed",
+                "billing_coercion_claimed",
+                "billing_not_explained",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_TRANSPARENCY_IN_RATES_AND_CARE",
                 "source": "NHRC_2019",
@@ -172,7 +213,9 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-08 — Non-Discrimination
         # =====================================================
-        if facts.get("discrimination_claimed") == "yes":
+        steps = _satisfied(facts, "RIGHT_TO_NON_DISCRIMINATION", "any", ("discrimination_claimed",))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_NON_DISCRIMINATION",
                 "source": "NHRC_2019",
@@ -187,13 +230,15 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-09 — Safety & Quality Care (+ IMC 2.1.4)
         # =====================================================
-        if (
-            facts.get("unsafe_conditions_claimed") == "yes"
-            or facts.get("hygiene_failure_claimed") == "yes"
-            or facts.get("infection_due_to_care_claimed") == "yes"
-            or facts.get("negligence_claimed") == "yes"
-            or facts.get("substandard_care_claimed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_SAFETY_AND_QUALITY_CARE", "any", (
+                "unsafe_conditions_claimed",
+                "hygiene_failure_claimed",
+                "infection_due_to_care_claimed",
+                "negligence_claimed",
+                "substandard_care_claimed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_SAFETY_AND_QUALITY_CARE",
                 "source": "NHRC_2019",
@@ -217,18 +262,20 @@ class RightsEvaluator:
                         "A physician must provide medical care with reasonable skill and competence.",
                         "Care must conform to accepted standards of medical practice."
                     ]
-                })
+                }, doctor_duty("DUTY_TO_PROVIDE_COMPETENT_AND_ETHICAL_CARE", steps))
 
         # =====================================================
         # NHRC-10 — Choice of Treatment
         # =====================================================
-        if (
-            facts.get("treatment_choice_denied") == "yes"
-            or facts.get("forced_treatment_claimed") == "yes"
-            or facts.get("refusal_not_allowed_claimed") == "yes"
-            or facts.get("coercion_for_treatment_claimed") == "yes"
-            or facts.get("penalty_for_refusal_claimed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_CHOOSE_TREATMENT_OPTIONS", "any", (
+                "treatment_choice_denied",
+                "forced_treatment_claimed",
+                "refusal_not_allowed_claimed",
+                "coercion_for_treatment_claimed",
+                "penalty_for_refusal_claimed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_CHOOSE_TREATMENT_OPTIONS",
                 "source": "NHRC_2019",
@@ -243,11 +290,13 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-11 — Medicines & Tests
         # =====================================================
-        if (
-            facts.get("forced_pharmacy_claimed") == "yes"
-            or facts.get("forced_diagnostic_lab_claimed") == "yes"
-            or facts.get("penalty_for_external_source_claimed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_CHOOSE_SOURCE_FOR_MEDICINES_AND_TESTS", "any", (
+                "forced_pharmacy_claimed",
+                "forced_diagnostic_lab_claimed",
+                "penalty_for_external_source_claimed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_CHOOSE_SOURCE_FOR_MEDICINES_AND_TESTS",
                 "source": "NHRC_2019",
@@ -262,13 +311,15 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-12 — Referral & Transfer
         # =====================================================
-        if (
-            facts.get("referral_denied_claimed") == "yes"
-            or facts.get("transfer_without_explanation_claimed") == "yes"
-            or facts.get("unsafe_transfer_claimed") == "yes"
-            or facts.get("commercial_referral_claimed") == "yes"
-            or facts.get("lack_of_continuity_of_care_claimed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_PROPER_REFERRAL_AND_TRANSFER", "any", (
+                "referral_denied_claimed",
+                "transfer_without_explanation_claimed",
+                "unsafe_transfer_claimed",
+                "commercial_referral_claimed",
+                "lack_of_continuity_of_care_claimed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_PROPER_REFERRAL_AND_TRANSFER",
                 "source": "NHRC_2019",
@@ -283,11 +334,13 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-15 — Discharge & Body
         # =====================================================
-        if (
-            facts.get("discharge_denied") == "yes"
-            or facts.get("patient_detained_for_payment") == "yes"
-            or facts.get("body_withheld_for_payment") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_DISCHARGE_AND_BODY_OF_DECEASED", "any", (
+                "discharge_denied",
+                "patient_detained_for_payment",
+                "body_withheld_for_payment",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_DISCHARGE_AND_BODY_OF_DECEASED",
                 "source": "NHRC_2019",
@@ -302,12 +355,14 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-16 — Patient Education
         # =====================================================
-        if (
-            facts.get("patient_education_denied_claimed") == "yes"
-            or facts.get("language_barrier_claimed") == "yes"
-            or facts.get("rights_not_explained_claimed") == "yes"
-            or facts.get("information_not_understandable_claimed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_PATIENT_EDUCATION", "any", (
+                "patient_education_denied_claimed",
+                "language_barrier_claimed",
+                "rights_not_explained_claimed",
+                "information_not_understandable_claimed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_PATIENT_EDUCATION",
                 "source": "NHRC_2019",
@@ -322,12 +377,14 @@ class RightsEvaluator:
         # =====================================================
         # NHRC-17 — Grievance Redressal
         # =====================================================
-        if (
-            facts.get("grievance_denied_claimed") == "yes"
-            or facts.get("complaint_ignored_claimed") == "yes"
-            or facts.get("retaliation_for_complaint_claimed") == "yes"
-            or facts.get("no_grievance_mechanism_claimed") == "yes"
-        ):
+        steps = _satisfied(facts, "RIGHT_TO_BE_HEARD_AND_SEEK_REDRESSAL", "any", (
+                "grievance_denied_claimed",
+                "complaint_ignored_claimed",
+                "retaliation_for_complaint_claimed",
+                "no_grievance_mechanism_claimed",
+        ))
+        if steps:
+            proof_steps.extend(steps)
             provable.append({
                 "id": "RIGHT_TO_BE_HEARD_AND_SEEK_REDRESSAL",
                 "source": "NHRC_2019",
@@ -342,7 +399,8 @@ class RightsEvaluator:
         # =====================================================
         # IMC 2.1.2 — Under Influence
         # =====================================================
-        if facts.get("doctor_under_influence") == "yes":
+        steps = _satisfied(facts, "DUTY_NOT_TO_PRACTICE_UNDER_INFLUENCE", "any", ("doctor_under_influence",))
+        if steps:
             add_imc_duty({
                 "id": "DUTY_NOT_TO_PRACTICE_UNDER_INFLUENCE",
                 "source": "IMC_2002",
@@ -354,17 +412,20 @@ class RightsEvaluator:
                     "A physician must not practice medicine under the influence of alcohol or drugs.",
                     "Practicing under such influence constitutes professional misconduct."
                 ]
-            })
+            }, steps)
 
         # =====================================================
         # PROCEDURAL — Descriptive only (NO ADVICE)
         # =====================================================
-        if facts.get("doctor_involved") == "yes":
-            if (
-                facts.get("mistreatment_claimed") == "yes"
-                or facts.get("abuse_claimed") == "yes"
-                or facts.get("unethical_behavior_claimed") == "yes"
-            ):
+        doctor = _satisfied(facts, "PROFESSIONAL_CONDUCT_CONCERNS", "doctor", ("doctor_involved",))
+        if doctor:
+            conduct = _satisfied(facts, "PROFESSIONAL_CONDUCT_CONCERNS", "conduct", (
+                "mistreatment_claimed",
+                "abuse_claimed",
+                "unethical_behavior_claimed",
+            ))
+            if conduct:
+                proof_steps.extend(doctor + conduct)
                 procedural.append({
                     "id": "PROFESSIONAL_CONDUCT_CONCERNS",
                     "source": "IMC_2002",
@@ -388,7 +449,9 @@ class RightsEvaluator:
                 "verdict_type": verdict_type,
                 "primary_violations": provable,
                 "imc_duties": imc_duties,
-                "procedural_remedies": procedural
+                "procedural_remedies": procedural,
+                # Duties reuse their right's steps: keep each step once
+                "proof": tuple(dict.fromkeys(proof_steps)),
             }
 
 
@@ -397,5 +460,6 @@ class RightsEvaluator:
             "reasons": [
                 "No legally decidable right or duty applies.",
                 "The system cannot reach a determination based on the provided information."
-            ]
+            ],
+            "proof": (),
         }
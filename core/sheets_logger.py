@@ -3,59 +3,360 @@
 import os
 import json
 import base64
-import gspread
-from google.oauth2.service_account import Credentials
+import random
+import threading
+import time
+from collections import deque
 from datetime import datetime
 import traceback
 
+from core import verdict_json
+from core.exceptions import PartialDeliveryError, SinkRetryableError
+from core.process_local import ProcessSingleton
+from core.redaction import redact_text
 
-def log_to_google_sheets(user_input, extracted_facts, verdict):
-    try:
-        # 1. Read base64 credential
-        b64 = os.environ.get("GOOGLE_SERVICE_ACCOUNT_B64")
-        if not b64:
-            raise RuntimeError("GOOGLE_SERVICE_ACCOUNT_B64 missing")
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
 
-        service_account_info = json.loads(
-            base64.b64decode(b64).decode("utf-8")
-        )
+# =====================================================
+# Client tuning
+# =====================================================
+
+BATCH_SIZE = 50           # rows per append_rows call
+FLUSH_INTERVAL = 2.0      # max seconds a row waits before being sent
+MAX_PENDING = 10_000      # rows held in memory while the sheet is unreachable
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0        # seconds, doubled on each retry
+BACKOFF_MAX = 32.0
+CLOSE_TIMEOUT = 5.0       # max seconds close() (and so process exit) waits
+
+# Outbox sink name (see core/outbox.py)
+SHEETS_SINK = "google_sheets"
+
+# HTTP statuses worth retrying (quota / rate limit / transient)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+# =====================================================
+# Backends
+# =====================================================
+
+class GspreadBackend:
+    """
+    Google Sheets through gspread.
+    Credentials are decoded and authorized once; the worksheet
+    handle is cached for the lifetime of the process.
+    """
+
+    def __init__(self, sheet_name: str = None, credentials_b64: str = None):
+        self.sheet_name = sheet_name or os.environ.get("SHEET_NAME")
+        self.credentials_b64 = credentials_b64 or os.environ.get("GOOGLE_SERVICE_ACCOUNT_B64")
+        self._sheet = None
+        self._lock = threading.Lock()
+
+    def _worksheet(self):
+        if self._sheet is not None:
+            return self._sheet
+
+        with self._lock:
+            if self._sheet is not None:
+                return self._sheet
+
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            if not self.credentials_b64:
+                raise RuntimeError("GOOGLE_SERVICE_ACCOUNT_B64 missing")
+            if not self.sheet_name:
+                raise RuntimeError("SHEET_NAME missing")
+
+            service_account_info = json.loads(
+                base64.b64decode(self.credentials_b64).decode("utf-8")
+            )
+            credentials = Credentials.from_service_account_info(
+                service_account_info,
+                scopes=SCOPES,
+            )
+            client = gspread.authorize(credentials)
+            self._sheet = client.open(self.sheet_name).sheet1
+            return self._sheet
+
+    def append_rows(self, rows):
+        import gspread
+
+        try:
+            self._worksheet().append_rows(rows, value_input_option="RAW")
+        except gspread.exceptions.APIError as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status in RETRYABLE_STATUSES:
+                raise SinkRetryableError(f"Google Sheets API error {status}") from e
+            raise
+
+
+class FakeSheetsBackend:
+    """
+    In-memory stand-in for offline tests and throughput runs.
+
+    latency:         seconds slept per append_rows call
+    quota_failures:  number of initial calls that fail as retryable
+    """
+
+    def __init__(self, latency: float = 0.0, quota_failures: int = 0):
+        self.latency = latency
+        self.quota_failures = quota_failures
+        self.rows = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def append_rows(self, rows):
+        with self._lock:
+            self.calls += 1
+            if self.latency:
+                time.sleep(self.latency)
+            if self.quota_failures > 0:
+                self.quota_failures -= 1
+                raise SinkRetryableError("Quota exceeded (fake)")
+            self.rows.extend(rows)
+
+
+# =====================================================
+# Batching client
+# =====================================================
+
+class SheetsClient:
+    """
+    Long-lived sheets client.
+
+    append() only buffers the row. A background thread sends buffered
+    rows with one append_rows call per batch, when BATCH_SIZE rows are
+    pending or the oldest row is FLUSH_INTERVAL seconds old. Retryable
+    failures are retried with exponential backoff and jitter. While the
+    sheet is unreachable at most max_pending rows are held; beyond that
+    the oldest are dropped, counted and reported.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_pending: int = MAX_PENDING,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+    ):
+        self.backend = backend if backend is not None else GspreadBackend()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
 
-        # 2. Auth
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
+        self.sent = 0
+        self.dropped = 0
+        self.retries = 0
 
-        credentials = Credentials.from_service_account_info(
-            service_account_info,
-            scopes=scopes,
+        self._pending = deque(maxlen=max_pending)
+        self._overflowing = False
+        self._oldest = 0.0
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="sheets-client", daemon=True
         )
+        self._thread.start()
 
-        client = gspread.authorize(credentials)
+    def append(self, row: list):
+        with self._cond:
+            if len(self._pending) == self._pending.maxlen:
+                # deque(maxlen) discards the oldest row on append
+                self.dropped += 1
+                if not self._overflowing:
+                    self._overflowing = True
+                    print(f"❌ Google Sheets buffer full ({self.max_pending} rows): dropping oldest rows")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
 
-        # 3. Open sheet
-        sheet_name = os.environ.get("SHEET_NAME")
-        if not sheet_name:
-            raise RuntimeError("SHEET_NAME missing")
+    def send(self, rows: list, retry: bool = True):
+        """
+        Send rows now (caller's thread), retrying transient failures
+        unless retry is false. Raises the last error if every attempt
+        fails, or PartialDeliveryError (caused by it) if earlier
+        batches had already been appended: only rows[e.sent:] are
+        missing from the sheet.
+        """
+        max_retries = self.max_retries if retry else 0
+        with self._send_lock:
+            for offset in range(0, len(rows), self.batch_size):
+                try:
+                    self._send_batch(rows[offset:offset + self.batch_size], max_retries)
+                except Exception as e:
+                    if offset:
+                        raise PartialDeliveryError(offset) from e
+                    raise
 
-        sheet = client.open(sheet_name).sheet1
+    def _take_pending(self) -> list:
+        # Caller holds self._cond
+        rows = list(self._pending)
+        self._pending.clear()
+        if self._overflowing:
+            self._overflowing = False
+            print(f"❌ Google Sheets buffer overflowed: {self.dropped} rows dropped so far")
+        return rows
 
-        # 4. Append row
-        row = [
-            datetime.utcnow().isoformat(),
-            user_input,
-            json.dumps(extracted_facts, ensure_ascii=False),
-            verdict.get("verdict_type"),
-            json.dumps(verdict.get("primary_violations", []), ensure_ascii=False),
-            json.dumps(verdict.get("imc_duties", []), ensure_ascii=False),
-            json.dumps(verdict.get("procedural_remedies", []), ensure_ascii=False),
-            json.dumps(verdict.get("sources", []), ensure_ascii=False),
-            os.environ.get("SYSTEM_VERSION", "unknown"),
-        ]
+    def flush(self):
+        with self._cond:
+            rows = self._take_pending()
+        if rows:
+            self._send_or_drop(rows)
 
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """
+        Send what is pending (one attempt, no backoff) and stop. Runs at
+        exit, so it waits at most timeout seconds: during an outage the
+        remaining rows are abandoned rather than holding up the process.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"❌ Google Sheets client did not stop within {timeout:g}s; pending rows abandoned")
 
-        sheet.append_row(row, value_input_option="RAW")
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "pending": len(self._pending),
+        }
 
+    def _send_batch(self, rows, max_retries: int):
+        attempt = 0
+        while True:
+            try:
+                self.backend.append_rows(rows)
+                self.sent += len(rows)
+                return
+            except SinkRetryableError:
+                if attempt >= max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+                self.retries += 1
+
+    def _send_or_drop(self, rows, retry: bool = True):
+        try:
+            self.send(rows, retry)
+        except Exception as e:
+            print("❌ Google Sheets logging failed")
+            traceback.print_exc()
+            sent = e.sent if isinstance(e, PartialDeliveryError) else 0
+            self.dropped += len(rows) - sent
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    if self._pending:
+                        wait = self.flush_interval - (time.monotonic() - self._oldest)
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+
+                rows = self._take_pending()
+                closed = self._closed
+
+            if rows:
+                self._send_or_drop(rows, retry=not closed)
+            if closed:
+                return
+
+
+# =====================================================
+# Process-wide client
+# =====================================================
+
+_client_config = (None, {})      # (backend, options) from set_sheets_backend
+
+
+def _build_client() -> SheetsClient:
+    backend, options = _client_config
+    return SheetsClient(backend, **options)
+
+
+# A forked child rebuilds its client from the same configuration
+_client = ProcessSingleton(_build_client, close_at_exit=True)
+
+
+def get_sheets_client() -> SheetsClient:
+    return _client.get()
+
+
+def set_sheets_backend(backend, **options) -> SheetsClient:
+    """
+    Replace the process-wide client, e.g. with a FakeSheetsBackend.
+    """
+    global _client_config
+    _client_config = (backend, options)
+    client = SheetsClient(backend, **options)
+    old = _client.replace(client)
+    if old is not None:
+        old.close()
+    return client
+
+
+def _section(verdict, key) -> str:
+    # Cached canonical fragments, joined (core/verdict_json.py)
+    return verdict_json.section(verdict.get(key, [])).decode("utf-8")
+
+
+def build_row(user_input, extracted_facts, verdict) -> list:
+    return [
+        datetime.utcnow().isoformat(),
+        redact_text(user_input),
+        verdict_json.canonical(extracted_facts).decode("utf-8"),
+        verdict.get("verdict_type"),
+        _section(verdict, "primary_violations"),
+        _section(verdict, "imc_duties"),
+        _section(verdict, "procedural_remedies"),
+        _section(verdict, "sources"),
+        os.environ.get("SYSTEM_VERSION", "unknown"),
+    ]
+
+
+def deliver_outbox_rows(items):
+    """
+    Outbox sink: send [(idempotency_key, row)] synchronously.
+    The key is appended as the last column so rows delivered twice
+    can be de-duplicated in the sheet.
+
+    One attempt only: the outbox owns retries and backoff (mark_failed
+    reschedules the rows), and sleeping here would stall every other
+    due row in the single dispatcher thread, up to the lease expiry.
+    A PartialDeliveryError tells the outbox which rows already landed,
+    so only the rest are sent again.
+    """
+    get_sheets_client().send([list(row) + [key] for key, row in items], retry=False)
+
+
+def log_to_google_sheets(user_input, extracted_facts, verdict):
+    try:
+        get_sheets_client().append(
+            build_row(user_input, extracted_facts, verdict)
+        )
     except Exception:
         print("❌ Google Sheets logging failed")
         traceback.print_exc()
@@ -0,0 +1,60 @@
+# core/singleflight.py
+
+import threading
+from concurrent.futures import Future
+
+# =====================================================
+# Request coalescing
+# =====================================================
+#
+# Concurrent calls with the same key share one execution: the first
+# caller (the leader) runs the function, later callers wait on its
+# Future and get the same result or exception. The key is forgotten
+# as soon as the call finishes, so this is not a cache: only calls
+# that overlap in time are coalesced.
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}        # key -> Future of the in-flight call
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args):
+        """
+        Run fn(*args), or wait for the in-flight call with the same
+        key. Returns (result, shared); shared is True for a waiter.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
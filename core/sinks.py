@@ -0,0 +1,260 @@
+# core/sinks.py
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from core import admission, spans, verdict_json
+from core.chat_history import save_chat
+from core.interaction import Interaction, record_audit_trail
+from core.outbox import enqueue
+from core.process_local import ProcessSingleton
+from core.sheets_logger import SHEETS_SINK, build_row
+
+# =====================================================
+# Post-verdict sink fan-out
+# =====================================================
+#
+# Once a verdict has been shown, the interaction is handed to every
+# registered sink at once on a shared thread pool, so the response
+# costs the verdict computation alone rather than the sum of the
+# sinks. Sinks are isolated from each other: one failing or running
+# slow does not delay or drop the others.
+#
+# Nothing is discarded: when MAX_PENDING deliveries are queued,
+# dispatch() blocks until there is room (the logger's "block" policy).
+# A sink's timeout only flags a delivery that finished late; threads
+# cannot be interrupted, and queued records are never thrown away.
+#
+# Each delivery's duration goes into the interaction's SpanRecorder.
+# A sink marked `last` (the audit trail) runs once the interaction's
+# other sinks have finished, so the trail carries their timings.
+
+POOL_WORKERS = 4
+MAX_PENDING = 1000        # queued deliveries across all sinks
+
+AUDIT_LOG_TIMEOUT = 5.0
+CHAT_HISTORY_TIMEOUT = 2.0
+GOOGLE_SHEETS_TIMEOUT = 2.0
+
+
+@dataclass(frozen=True)
+class Sink:
+    name: str
+    deliver: Callable[[Interaction], None]
+    timeout: float
+    feature: Optional[str] = None     # admission feature gating this sink
+    analyzed_only: bool = True        # skip refused / BUSY interactions
+    span: Optional[int] = None        # recorder slot for the delivery time
+    last: bool = False                # run after the interaction's other sinks
+
+
+class SinkMetrics:
+    __slots__ = (
+        "delivered", "failed", "late", "waited", "skipped",
+        "seconds", "max_seconds",
+    )
+
+    def __init__(self):
+        self.delivered = 0
+        self.failed = 0
+        self.late = 0           # finished after the timeout
+        self.waited = 0         # dispatch blocked on a full pool
+        self.skipped = 0        # shed by admission tier
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        runs = self.delivered + self.failed
+        stats["mean_seconds"] = self.seconds / runs if runs else 0.0
+        return stats
+
+
+class _Fanout:
+    # One dispatch: sinks still running, and those waiting for them
+    __slots__ = ("interaction", "submitted", "running", "last")
+
+    def __init__(self, interaction, submitted: float, running: int, last: list):
+        self.interaction = interaction
+        self.submitted = submitted
+        self.running = running
+        self.last = last
+
+
+class SinkDispatcher:
+    def __init__(self, workers: int = POOL_WORKERS, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self._sinks = {}
+        self._metrics = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sink")
+        self._cond = threading.Condition()
+        self._pending = 0
+
+    def register(self, sink: Sink):
+        with self._cond:
+            self._sinks[sink.name] = sink
+            self._metrics.setdefault(sink.name, SinkMetrics())
+
+    def dispatch(self, interaction: Interaction, knowledge_version: str = None):
+        """
+        Hand the interaction to every sink that applies to it. Returns
+        immediately unless MAX_PENDING deliveries are already queued.
+        The verdict is serialized here, once, and the bytes are shared
+        by every sink.
+        """
+        if interaction.verdict is not None and interaction.verdict_json is None:
+            interaction.verdict_json = verdict_json.verdict(interaction.verdict, knowledge_version)
+        analyzed = interaction.facts is not None
+
+        first, last = [], []
+        with self._cond:
+            for sink in self._sinks.values():
+                if sink.analyzed_only and not analyzed:
+                    continue
+                if sink.feature and not admission.allows(interaction.tier, sink.feature):
+                    self._metrics[sink.name].skipped += 1
+                    continue
+                (last if sink.last else first).append(sink)
+            count = len(first) + len(last)
+            if not count:
+                return
+
+            # Reserve room for the whole fan-out up front, so `last`
+            # sinks can be submitted from a pool thread without waiting
+            room = lambda: self._pending + count <= self.max_pending or not self._pending
+            if not room():
+                for sink in first + last:
+                    self._metrics[sink.name].waited += 1
+                self._cond.wait_for(room)
+            self._pending += count
+
+        fanout = _Fanout(interaction, time.monotonic(), len(first), last)
+        if not first:
+            self._submit_last(fanout)
+        for sink in first:
+            self._pool.submit(self._deliver, sink, fanout)
+
+    def _submit_last(self, fanout: _Fanout):
+        for sink in fanout.last:
+            self._pool.submit(self._deliver, sink, fanout)
+
+    def _deliver(self, sink: Sink, fanout: _Fanout):
+        interaction = fanout.interaction
+        start = time.monotonic()
+        try:
+            sink.deliver(interaction)
+            outcome = "delivered"
+        except Exception:
+            outcome = "failed"
+            print(f"❌ Sink {sink.name} failed")
+            traceback.print_exc()
+        finished = time.monotonic()
+        elapsed = finished - start
+        if sink.span is not None:
+            interaction.recorder.add(sink.span, elapsed)
+
+        release_last = False
+        with self._cond:
+            metrics = self._metrics[sink.name]
+            setattr(metrics, outcome, getattr(metrics, outcome) + 1)
+            if finished - fanout.submitted > sink.timeout:
+                metrics.late += 1
+            metrics.seconds += elapsed
+            metrics.max_seconds = max(metrics.max_seconds, elapsed)
+
+            if not sink.last:
+                fanout.running -= 1
+                release_last = not fanout.running
+            self._pending -= 1
+            self._cond.notify_all()
+        if release_last:
+            self._submit_last(fanout)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every dispatched delivery has finished.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {name: m.as_dict() for name, m in self._metrics.items()}
+
+
+# =====================================================
+# Default sinks
+# =====================================================
+
+def _deliver_audit_log(interaction: Interaction):
+    record_audit_trail(interaction)
+
+
+def _deliver_chat_history(interaction: Interaction):
+    save_chat(
+        interaction.user_input,
+        interaction.facts,
+        interaction.verdict,
+        query_id=interaction.query_id,
+        payload=interaction.verdict_json,
+    )
+
+
+def _deliver_google_sheets(interaction: Interaction):
+    # Outbox insert (one fsync); the query_id makes re-sends idempotent
+    enqueue(
+        SHEETS_SINK,
+        build_row(interaction.user_input, interaction.facts, interaction.verdict),
+        idempotency_key=interaction.query_id,
+    )
+
+
+DEFAULT_SINKS = (
+    Sink(
+        "audit_log", _deliver_audit_log, AUDIT_LOG_TIMEOUT,
+        analyzed_only=False, last=True,
+    ),
+    Sink(
+        "chat_history", _deliver_chat_history, CHAT_HISTORY_TIMEOUT,
+        admission.CHAT_HISTORY, span=spans.SINK_CHAT_HISTORY,
+    ),
+    Sink(
+        "google_sheets", _deliver_google_sheets, GOOGLE_SHEETS_TIMEOUT,
+        admission.SHEETS, span=spans.SINK_GOOGLE_SHEETS,
+    ),
+)
+
+
+def _build_dispatcher() -> SinkDispatcher:
+    dispatcher = SinkDispatcher()
+    for sink in DEFAULT_SINKS:
+        dispatcher.register(sink)
+    return dispatcher
+
+
+# Pool threads do not exist in a forked child
+_dispatcher = ProcessSingleton(_build_dispatcher)
+
+
+def get_dispatcher() -> SinkDispatcher:
+    return _dispatcher.get()
+
+
+def dispatch(interaction: Interaction, knowledge_version: str = None):
+    get_dispatcher().dispatch(interaction, knowledge_version)
+
+
+def flush_sinks(timeout: float = None) -> bool:
+    return get_dispatcher().flush(timeout)
+
+
+def sink_stats() -> dict:
+    return get_dispatcher().stats()
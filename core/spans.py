@@ -0,0 +1,78 @@
+# core/spans.py
+
+import time
+from typing import Tuple
+
+# =====================================================
+# Stage timing
+# =====================================================
+#
+# One recorder per interaction. Stages are fixed integer slots into
+# preallocated lists, so recording a span is two perf_counter() calls
+# and two list stores: no per-span objects or dicts.
+
+STAGES = (
+    "validation",
+    "extraction",
+    "evaluation",
+    "rendering",
+    "sink.google_sheets",
+    "sink.chat_history",
+    "coalesced_wait",       # waiting on an identical in-flight analysis
+    "admission_wait",       # waiting for an analysis slot
+)
+
+(
+    VALIDATION,
+    EXTRACTION,
+    EVALUATION,
+    RENDERING,
+    SINK_GOOGLE_SHEETS,
+    SINK_CHAT_HISTORY,
+    COALESCED_WAIT,
+    ADMISSION_WAIT,
+) = range(len(STAGES))
+
+_NOT_RUN = -1.0
+
+
+class SpanRecorder:
+    """
+    Monotonic per-stage timings. A stage started several times
+    accumulates its elapsed time.
+    """
+
+    __slots__ = ("stages", "_starts", "_elapsed", "_order")
+
+    def __init__(self, stages: Tuple[str, ...] = STAGES):
+        self.stages = stages
+        self._starts = [0.0] * len(stages)
+        self._elapsed = [_NOT_RUN] * len(stages)
+        self._order = []            # slots in first-start order
+
+    def start(self, slot: int):
+        if self._elapsed[slot] == _NOT_RUN:
+            self._elapsed[slot] = 0.0
+            self._order.append(slot)
+        self._starts[slot] = time.perf_counter()
+
+    def stop(self, slot: int):
+        self._elapsed[slot] += time.perf_counter() - self._starts[slot]
+
+    def add(self, slot: int, seconds: float):
+        """
+        Record a duration measured elsewhere.
+        """
+        if self._elapsed[slot] == _NOT_RUN:
+            self._elapsed[slot] = 0.0
+            self._order.append(slot)
+        self._elapsed[slot] += seconds
+
+    def elapsed(self, slot: int) -> float:
+        """
+        Seconds spent in slot, or 0.0 if it never ran.
+        """
+        return max(self._elapsed[slot], 0.0)
+
+    def timings(self) -> Tuple[Tuple[str, float], ...]:
+        return tuple((self.stages[s], self._elapsed[s]) for s in self._order)
@@ -0,0 +1,183 @@
+# core/verdict_json.py
+
+import copy
+import json
+import threading
+
+# =====================================================
+# Canonical verdict JSON
+# =====================================================
+#
+# Verdicts are built from a small, fixed set of items (rights, duties,
+# procedural remedies) and interned proof steps. Each item and step is
+# serialized to canonical JSON bytes once per knowledge version; a
+# verdict payload is then a byte join of cached fragments, shared by
+# every sink (core/sinks.py) and by the HTTP API.
+#
+# Entries are found by id but only used for an equal value: the text
+# of an item lives in core/rights_evaluator.py, not in the knowledge
+# version, and legacy rows carry their own wording under the same ids.
+# Only values made of strings are cached, so equality (where True,
+# 1 and 1.0 compare equal) implies identical bytes.
+#
+# Canonical form: keys sorted, no insignificant whitespace, UTF-8
+# (not \u escapes). The same verdict always yields the same bytes,
+# so payloads can be hashed and compared directly.
+
+# Verdict keys whose value is a list of items with an "id"
+ITEM_SECTIONS = ("primary_violations", "imc_duties", "procedural_remedies", "sources")
+PROOF = "proof"
+
+MAX_FRAGMENTS = 4096      # items, steps and whole verdicts kept
+
+_fragments = {}
+_fragments_version = None
+_fragments_lock = threading.Lock()
+
+
+def canonical(value) -> bytes:
+    """
+    Canonical JSON bytes for any JSON-serializable value.
+    """
+    return json.dumps(
+        value, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def strings_only(value) -> bool:
+    """
+    True if value is built of dicts, lists and strings only. Equality
+    of such values means equal content; elsewhere True == 1 == 1.0.
+    """
+    if isinstance(value, str):
+        return True
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and strings_only(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return all(strings_only(v) for v in value)
+    return False
+
+
+def _lookup(key, value, version):
+    if version is None or _fragments_version == version:
+        entry = _fragments.get(key)
+        if entry is not None and entry[0] == value:
+            return entry[1]
+    return None
+
+
+def _store(key, value, encoded, version):
+    global _fragments_version
+    if not strings_only(value):
+        return
+    # A private copy: the caller may mutate value afterwards
+    value = copy.deepcopy(value)
+    with _fragments_lock:
+        if version is not None and _fragments_version != version:
+            _fragments.clear()
+            _fragments_version = version
+        if len(_fragments) >= MAX_FRAGMENTS:
+            _fragments.clear()
+        _fragments[key] = (value, encoded)
+
+
+def _cached(key, value, version):
+    cached = _lookup(key, value, version)
+    if cached is None:
+        cached = canonical(value)
+        _store(key, value, cached, version)
+    return cached
+
+
+def fragment(item, version: str = None) -> bytes:
+    """
+    Cached bytes for one verdict item. A new knowledge version drops
+    every cached fragment. Items without an id are serialized each
+    time.
+    """
+    item_id = item.get("id") if isinstance(item, dict) else None
+    if not isinstance(item_id, str):
+        return canonical(item)
+    return _cached(("item", item_id), item, version)
+
+
+def section(items, version: str = None) -> bytes:
+    return b"[" + b",".join(fragment(item, version) for item in items or ()) + b"]"
+
+
+def proof(steps, version: str = None) -> bytes:
+    # Steps are interned (core/proof.py): one fragment per step id
+    return b"[" + b",".join(_cached(("proof", s[0]), s, version) for s in steps or ()) + b"]"
+
+
+def obj(members: dict) -> bytes:
+    """
+    A JSON object from already encoded member values, keys sorted.
+    """
+    return b"{" + b",".join(
+        canonical(key) + b":" + members[key] for key in sorted(members)
+    ) + b"}"
+
+
+def _signature(v: dict):
+    """
+    Hashable cache key for a verdict: item and step ids in place of
+    the items, strings as they are, other scalars with their type.
+    None if the verdict holds anything else.
+    """
+    key = []
+    for name, value in v.items():
+        if not isinstance(name, str):
+            return None
+        if isinstance(value, (list, tuple)):
+            if name in ITEM_SECTIONS:
+                ids = tuple(item.get("id") if isinstance(item, dict) else None for item in value)
+            elif name == PROOF:
+                ids = tuple(s[0] if isinstance(s, (list, tuple)) and s else None for s in value)
+            else:
+                ids = tuple(value)
+            if not all(isinstance(i, str) for i in ids):
+                return None
+            value = (name in ITEM_SECTIONS or name == PROOF, ids)
+        elif not isinstance(value, str):
+            if value is not None and not isinstance(value, (int, float)):
+                return None
+            value = (type(value), value)
+        key.append((name, value))
+    return ("verdict", tuple(sorted(key, key=lambda pair: pair[0])))
+
+
+def verdict(v: dict, version: str = None) -> bytes:
+    """
+    Canonical bytes for a whole verdict, assembled from fragments.
+    Equal verdicts are assembled once.
+    """
+    signature = _signature(v)
+    if signature is not None:
+        cached = _lookup(signature, v, version)
+        if cached is not None:
+            return cached
+
+    assembled = _assemble(v, version)
+    if signature is not None:
+        _store(signature, v, assembled, version)
+    return assembled
+
+
+def _assemble(v: dict, version: str = None) -> bytes:
+    members = {}
+    for key, value in v.items():
+        if key in ITEM_SECTIONS and isinstance(value, (list, tuple)):
+            members[key] = section(value, version)
+        elif key == PROOF and isinstance(value, (list, tuple)):
+            members[key] = proof(value, version)
+        else:
+            members[key] = canonical(value)
+    return obj(members)
+
+
+def analysis(facts: dict, v: dict, version: str = None) -> bytes:
+    """
+    {"facts": ..., "verdict": ...} as returned by the HTTP API.
+    """
+    return obj({"facts": canonical(facts), "verdict": verdict(v, version)})
@@ -1,16 +1,168 @@
-def build_prompt(expl_input: ExplanationInput) -> str:
-    return f"""
+# explanation/prompt_builder.py
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from explanation.input_contract import ExplanationInput
+
+# =====================================================
+# Template compilation
+# =====================================================
+
+# Slots use the same {{name}} syntax as explanation_template.json
+SLOT_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_.]*)\s*\}\}")
+
+DEFAULT_TEMPLATE_ID = "EXPLANATION_PROMPT"
+
+
+def encode_proof_steps(proof_steps) -> str:
+    """
+    Canonical text encoding of proof steps.
+    One numbered step per line, internal whitespace collapsed,
+    so identical proofs always produce identical bytes.
+    """
+    return "\n".join(
+        f"{i}. {' '.join(str(step).split())}"
+        for i, step in enumerate(proof_steps, start=1)
+    )
+
+
+# Slot name -> how the value is read from an ExplanationInput
+SLOT_RENDERERS = {
+    "verdict_status": lambda e: e.verdict_status,
+    "conclusion_symbol": lambda e: e.conclusion_symbol,
+    "proof_steps": lambda e: encode_proof_steps(e.proof_steps),
+}
+
+
+class CompiledTemplate:
+    """
+    A template split once into static segments and slot names.
+    Rendering is a single join, with no re-parsing of the source.
+
+    segments always has len(slots) + 1 entries:
+        segments[0] slot[0] segments[1] slot[1] ... segments[-1]
+    """
+
+    __slots__ = ("template_id", "version", "segments", "slots")
+
+    def __init__(self, template_id: str, version: int, source: str):
+        segments = []
+        slots = []
+        pos = 0
+        for match in SLOT_PATTERN.finditer(source):
+            segments.append(source[pos:match.start()])
+            slots.append(match.group(1))
+            pos = match.end()
+        segments.append(source[pos:])
+
+        self.template_id = template_id
+        self.version = version
+        self.segments = tuple(segments)
+        self.slots = tuple(slots)
+
+    def render(self, values: Dict[str, str]) -> str:
+        segments = self.segments
+        parts = [segments[0]]
+        for i, slot in enumerate(self.slots):
+            parts.append(values[slot])
+            parts.append(segments[i + 1])
+        return "".join(parts)
+
+
+# =====================================================
+# Versioned template registry
+# =====================================================
+
+_REGISTRY: Dict[Tuple[str, int], CompiledTemplate] = {}
+_LATEST: Dict[str, int] = {}
+
+
+def register_template(template_id: str, version: int, source: str) -> CompiledTemplate:
+    """
+    Compile and register a prompt template.
+    A registered (template_id, version) is immutable: prompts built
+    from it must stay byte-stable, so re-registering is refused.
+    """
+    key = (template_id, version)
+    if key in _REGISTRY:
+        raise ValueError(f"Template already registered: {template_id} v{version}")
+
+    compiled = CompiledTemplate(template_id, version, source)
+    unknown = [s for s in compiled.slots if s not in SLOT_RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown template slots: {unknown}")
+
+    _REGISTRY[key] = compiled
+    if version > _LATEST.get(template_id, 0):
+        _LATEST[template_id] = version
+    return compiled
+
+
+def get_template(template_id: str = DEFAULT_TEMPLATE_ID, version: int = None) -> CompiledTemplate:
+    if version is None:
+        version = _LATEST.get(template_id)
+    try:
+        return _REGISTRY[(template_id, version)]
+    except KeyError:
+        raise KeyError(f"Unknown template: {template_id} v{version}") from None
+
+
+register_template(DEFAULT_TEMPLATE_ID, 1, """
 You are explaining a mechanically proven legal result.
 
 CONCLUSION SYMBOL:
-{expl_input.conclusion_symbol}
+{{conclusion_symbol}}
 
 PROOF STEPS:
-{expl_input.proof_steps}
+{{proof_steps}}
 
 STRICT RULES:
 - Do NOT infer legality, rights, or permissions
 - Do NOT add conditions
 - Do NOT use words like legal, illegal, allowed, permitted
 - Explain only what was checked and found true
-"""
+""")
+
+# =====================================================
+# Public API
+# =====================================================
+
+def build_prompt(
+    expl_input: ExplanationInput,
+    template_id: str = DEFAULT_TEMPLATE_ID,
+    version: int = None,
+) -> str:
+    template = get_template(template_id, version)
+    return template.render({
+        slot: SLOT_RENDERERS[slot](expl_input) for slot in template.slots
+    })
+
+
+def build_prompts(
+    expl_inputs: Iterable[ExplanationInput],
+    template_id: str = DEFAULT_TEMPLATE_ID,
+    version: int = None,
+) -> List[str]:
+    """
+    Build prompts for many inputs against one template.
+    The template is resolved once, and proof step encodings are
+    reused across inputs that share the same proof.
+    """
+    template = get_template(template_id, version)
+    renderers = [(slot, SLOT_RENDERERS[slot]) for slot in template.slots]
+    encoded_steps: Dict[tuple, str] = {}
+
+    prompts = []
+    for expl_input in expl_inputs:
+        values = {}
+        for slot, renderer in renderers:
+            if slot == "proof_steps":
+                key = tuple(expl_input.proof_steps)
+                if key not in encoded_steps:
+                    encoded_steps[key] = encode_proof_steps(key)
+                values[slot] = encoded_steps[key]
+            else:
+                values[slot] = renderer(expl_input)
+        prompts.append(template.render(values))
+    return prompts
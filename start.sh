@@ -1,2 +1,4 @@
 #!/usr/bin/env bash
-streamlit run ui_chat.py --server.port $PORT --server.address 0.0.0.0
+set -e
+python -m core.engine
+exec streamlit run ui_chat.py --server.port $PORT --server.address 0.0.0.0
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_tiers_follow_queue_occupancy():
+    code = """
+import threading, time
+from core import admission
+
+controller = admission.AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+held = controller.acquire()
+tiers = []
+
+def waiter():
+    with controller.admit() as ticket:
+        tiers.append(admission.TIER_NAMES[ticket.tier])
+
+threads = []
+for n in range(4):
+    threads.append(threading.Thread(target=waiter))
+    threads[-1].start()
+    while controller.stats()["waiting"] <= n:
+        time.sleep(0.01)
+
+try:
+    controller.acquire()
+except admission.Busy as busy:
+    print(busy.verdict())
+
+controller.release()
+for thread in threads:
+    thread.join()
+stats = controller.stats()
+print(admission.TIER_NAMES[held.tier], sorted(tiers), stats["admitted"], stats["rejected_queue_full"], stats["active"])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "{'verdict_type': 'BUSY', 'reason': 'QUEUE_FULL', 'retry_after_s': 1.0}",
+        "FULL ['ESSENTIAL', 'FULL', 'REDUCED', 'REDUCED'] "
+        "{'FULL': 2, 'REDUCED': 2, 'ESSENTIAL': 1} 1 0",
+    ], err
+
+def test_queue_deadline_and_shedding():
+    code = """
+from core import admission
+
+controller = admission.AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+controller.acquire()
+try:
+    controller.acquire()
+except admission.Busy as busy:
+    print(busy.reason, controller.stats()["rejected_timeout"], controller.stats()["waiting"])
+
+for tier in range(3):
+    print([admission.allows(tier, feature) for feature in (admission.SHEETS, admission.CHAT_HISTORY, admission.EXPLANATIONS, "audit")])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "QUEUE_TIMEOUT 1 0",
+        "[True, True, True, True]",
+        "[False, True, True, True]",
+        "[False, False, False, True]",
+    ], err
+
+def test_rejected_analysis_gets_a_busy_verdict():
+    code = """
+from core import admission, engine
+from core.interaction import analyze
+
+controller = admission.AdmissionController(max_concurrent=1, max_queue=0)
+args = ("The doctor was drunk.", engine.get_extractor(), engine.get_evaluator())
+
+with controller.admit():
+    busy = analyze(*args, controller=controller)
+admitted = analyze(*args, controller=controller)
+print(busy.verdict["verdict_type"], busy.facts)
+print(admitted.verdict["verdict_type"], admission.TIER_NAMES[admitted.tier], controller.stats()["active"])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == ["BUSY None", "PROVABLE FULL 0"], err
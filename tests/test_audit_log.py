@@ -0,0 +1,85 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_proof_steps_defined_until_a_trail_is_written(tmp_path):
+    code = """
+import json, os
+from core import engine, logger
+from core.interaction import analyze, record_audit_trail
+
+path = %r
+interaction = analyze("The doctor was drunk.", engine.get_extractor(), engine.get_evaluator())
+
+def trail_steps():
+    logger.get_writer().flush(5)
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    return len(events[-1]["payload"]["proof_steps"])
+
+# A dropped trail does not count as announcing its steps
+closed = logger.AuditLogWriter(path=path, queue_full_policy="drop")
+closed.close()
+logger._writer.replace(closed)
+record_audit_trail(interaction)
+print(closed.dropped)
+
+logger._writer.replace(logger.AuditLogWriter(path=path))
+record_audit_trail(interaction)
+first = trail_steps()
+record_audit_trail(interaction)
+second = trail_steps()
+
+# A lost batch may have held definitions: they are sent again
+logger.get_writer().dropped += 1
+record_audit_trail(interaction)
+print(first > 0, second, trail_steps() == first)
+""" % str(tmp_path / "audit.log")
+    out, err = run_code(code)
+    assert out.splitlines() == ["1", "True 0 True"], err
+
+def test_rotation_sealing_and_read_events(tmp_path):
+    code = """
+import json, os, time
+from core import audit_log, logger
+
+log_dir = %r
+audit_log.BLOCK_BYTES = 200          # several gzip members per sealed segment
+
+writer = logger.AuditLogWriter(path=os.path.join(log_dir, "audit.log"), rotate_max_bytes=400)
+for ts in range(100, 130):
+    event_type = "AUDIT_TRAIL" if ts %% 3 else "SAFETY_BLOCK"
+    writer.write(json.dumps({"timestamp": ts, "event_type": event_type, "payload": {"n": ts}}) + "\\n")
+    writer.flush(5)
+writer.close()
+
+deadline = time.monotonic() + 10
+while audit_log.closed_segments(log_dir) and time.monotonic() < deadline:
+    time.sleep(0.05)
+print(len(audit_log.sealed_segments(log_dir)) > 1, audit_log.closed_segments(log_dir))
+
+def ns(**kwargs):
+    return [e["payload"]["n"] for e in audit_log.read_events(log_dir=log_dir, **kwargs)]
+
+print(ns() == list(range(100, 130)))
+print(ns(event_type="SAFETY_BLOCK"))
+print(ns(event_type=["SAFETY_BLOCK", "AUDIT_TRAIL"], since=110, until=114))
+print(ns(event_type="AUDIT_TRAIL", since=125))
+print(ns(event_type="OTHER"), ns(since=200))
+""" % str(tmp_path)
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True []",
+        "True",
+        "[102, 105, 108, 111, 114, 117, 120, 123, 126, 129]",
+        "[110, 111, 112, 113]",
+        "[125, 127, 128]",
+        "[] []",
+    ], err
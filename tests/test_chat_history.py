@@ -0,0 +1,183 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_legacy_import_round_trip(tmp_path):
+    code = """
+import io, json
+from core.chat_export import export_chats, import_legacy_json
+
+legacy = %r
+db = %r
+entries = [
+    {
+        "timestamp": "2026-01-17T05:54:37.666684",
+        "user_input": "doctor refused to admit my brother after an accident",
+        "extracted_facts": {"emergency_case": "yes", "admission_denied": "yes", "doctor_involved": "yes"},
+        "verdict": {"verdict_type": "PROVABLE", "primary_violations": [{"id": "RIGHT_TO_EMERGENCY_MEDICAL_CARE"}]},
+    },
+    {
+        "timestamp": "2026-01-18T10:00:00",
+        "user_input": "nothing happened",
+        "extracted_facts": {"emergency_case": "unknown"},
+        "system_verdict": {"verdict_type": "NOT_PROVABLE", "reasons": ["No legally decidable right or duty applies."]},
+    },
+]
+with open(legacy, "w", encoding="utf-8") as f:
+    json.dump(entries, f)
+
+print(import_legacy_json(legacy, db))
+print(import_legacy_json(legacy, db))
+
+out = io.StringIO()
+export_chats(out, db_path=db)
+rows = [json.loads(line) for line in out.getvalue().splitlines()]
+print(len(rows))
+for entry, row in zip(entries, rows):
+    assert row["timestamp"] == entry["timestamp"]
+    assert row["user_input"] == entry["user_input"]
+    assert row["extracted_facts"] == entry["extracted_facts"]
+    assert row["verdict"] == entry.get("verdict", entry.get("system_verdict"))
+print("PASS")
+""" % (str(tmp_path / "chat_history.json"), str(tmp_path / "chat.db"))
+    out, err = run_code(code)
+    assert out.splitlines() == ["2", "0", "2", "PASS"], err
+
+def test_incremental_csv_export_writes_one_header(tmp_path):
+    code = """
+import csv, json
+from core.chat_export import CSV_COLUMNS, import_legacy_json, main
+
+db, out, mark = %r, %r, %r
+
+def add(name, timestamp):
+    path = db + "." + name + ".json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{
+            "timestamp": timestamp,
+            "user_input": "entry " + name,
+            "extracted_facts": {"emergency_case": "unknown"},
+            "verdict": {"verdict_type": "NOT_PROVABLE"},
+        }], f)
+    import_legacy_json(path, db)
+
+export = ["export", "--format", "csv", "--out", out, "--watermark", mark, "--db", db]
+add("a", "2026-01-01T00:00:00")
+main(export)
+add("b", "2026-01-02T00:00:00")
+main(export)
+main(export)
+
+with open(out, newline="", encoding="utf-8") as f:
+    rows = list(csv.reader(f))
+print(sum(row == CSV_COLUMNS for row in rows), [row[2] for row in rows[1:]])
+""" % (str(tmp_path / "chat.db"), str(tmp_path / "out.csv"), str(tmp_path / "mark.json"))
+    out, err = run_code(code)
+    assert out == "1 ['entry a', 'entry b']", err
+
+def test_baseline_database_migrates_and_pages(tmp_path):
+    code = """
+import json, sqlite3
+from core import chat_history
+from core.chat_query import query_chats
+
+db = %r
+
+# The table as the first release created it, before any migration
+conn = sqlite3.connect(db)
+conn.execute(
+    "CREATE TABLE chat_history (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, "
+    "user_input TEXT NOT NULL, extracted_facts TEXT NOT NULL, verdict TEXT NOT NULL)"
+)
+provable = {"verdict_type": "PROVABLE", "primary_violations": [{"id": "RIGHT_TO_EMERGENCY_MEDICAL_CARE"}]}
+not_provable = {"verdict_type": "NOT_PROVABLE"}
+facts = {"emergency_case": "yes", "admission_denied": "yes"}
+for day in range(1, 6):
+    verdict = provable if day %% 2 else not_provable
+    conn.execute(
+        "INSERT INTO chat_history (timestamp, user_input, extracted_facts, verdict) VALUES (?, ?, ?, ?)",
+        (f"2026-01-0{day}T00:00:00", f"chat {day}", json.dumps(facts), json.dumps(verdict)),
+    )
+conn.commit()
+conn.close()
+
+conn = chat_history.connect(db)
+print(conn.execute("PRAGMA user_version").fetchone()[0] == len(chat_history.MIGRATIONS))
+conn.close()
+
+pages = []
+after = None
+while True:
+    page = query_chats(after=after, limit=2, db_path=db)
+    pages.append([r.user_input for r in page.records])
+    if page.next_cursor is None:
+        break
+    after = page.next_cursor
+print(pages)
+
+records = query_chats(db_path=db).records
+print(records[0].facts == facts, records[0].verdict == provable, records[1].verdict_type)
+print([r.id for r in query_chats(verdict_type="PROVABLE", db_path=db).records])
+print([r.id for r in query_chats(item_id="RIGHT_TO_EMERGENCY_MEDICAL_CARE", since="2026-01-02", until="2026-01-05", db_path=db).records])
+print(query_chats(item_id="NO_SUCH_ITEM", db_path=db).records)
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True",
+        "[['chat 1', 'chat 2'], ['chat 3', 'chat 4'], ['chat 5']]",
+        "True True NOT_PROVABLE",
+        "[1, 3, 5]",
+        "[3]",
+        "[]",
+    ], err
+
+def test_items_sharing_an_id_keep_their_own_text(tmp_path):
+    code = """
+import copy, io, json
+from core import engine, verdict_json
+from core.chat_export import export_chats, import_legacy_json
+
+legacy, db = %r, %r
+
+def entry(day, explanation):
+    return {
+        "timestamp": f"2026-01-0{day}T00:00:00",
+        "user_input": "doctor refused to admit my brother after an accident",
+        "extracted_facts": {"emergency_case": "yes", "admission_denied": "yes"},
+        "verdict": {
+            "verdict_type": "PROVABLE",
+            "primary_violations": [{"id": "RIGHT_TO_EMERGENCY_MEDICAL_CARE", "explanation": [explanation]}],
+        },
+    }
+
+# The current evaluator's wording is cached first
+facts = engine.get_extractor().extract("The doctor refused to admit my brother after an accident.")
+current = engine.get_evaluator().evaluate(facts)
+verdict_json.verdict(current, engine.get_knowledge().version)
+
+entries = [entry(1, "Refusal of treatment or admission in an emergency."), entry(2, "Another wording.")]
+with open(legacy, "w", encoding="utf-8") as f:
+    json.dump(entries, f)
+import_legacy_json(legacy, db)
+
+out = io.StringIO()
+export_chats(out, db_path=db)
+rows = [json.loads(line) for line in out.getvalue().splitlines()]
+print([row["verdict"] == e["verdict"] for row, e in zip(rows, entries)])
+
+# Mutating a verdict after it was serialized does not change the cached bytes
+changed = copy.deepcopy(current)
+verdict_json.verdict(changed)
+changed["primary_violations"][0]["explanation"].append("Edited.")
+print(verdict_json.verdict(changed) == verdict_json.canonical(changed))
+print(verdict_json.verdict(current) == verdict_json.canonical(current))
+""" % (str(tmp_path / "chat_history.json"), str(tmp_path / "chat.db"))
+    out, err = run_code(code)
+    assert out.splitlines() == ["[True, True]", "True", "True"], err
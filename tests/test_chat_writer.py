@@ -0,0 +1,61 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_rows_are_committed_in_batches(tmp_path):
+    code = """
+import sqlite3
+from core.chat_history import ChatHistoryWriter, ChatRow
+
+db = %r
+writer = ChatHistoryWriter(db, batch_size=100, max_latency=60)
+row = ChatRow("2026-03-01T10:00:00", "text", {"emergency_case": "yes"}, {"verdict_type": "NOT_PROVABLE"})
+
+# Queued, not yet committed: neither batch size nor latency reached
+writer.save(row)
+writer.save(row)
+count = lambda: sqlite3.connect(db).execute("SELECT COUNT(*) FROM chat_history").fetchone()[0]
+print(count(), writer.stats()["written"])
+
+print(writer.flush(5), count(), writer.stats())
+
+# A row that cannot be stored fails its batch without stopping the writer
+writer.save(row._replace(verdict={"verdict_type": object()}))
+writer.flush(5)
+writer.save(row)
+writer.close()
+print(count(), writer.stats(), writer.flush())
+print(sqlite3.connect(db).execute("PRAGMA journal_mode").fetchone()[0])
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "0 0",
+        "True 2 {'written': 2, 'failed': 0, 'queued': 0}",
+        "3 {'written': 3, 'failed': 1, 'queued': 0} True",
+        "wal",
+    ], err
+
+def test_save_chat_redacts_and_links_the_audit_trail(tmp_path):
+    code = """
+from core import chat_history
+from core.chat_query import query_chats
+
+db = %r
+chat_history._writer.replace(chat_history.ChatHistoryWriter(db))
+chat_history.save_chat("  Call me on 9876543210  ", {}, {"verdict_type": "NOT_PROVABLE"}, query_id="q1")
+print(chat_history.flush_chats(5))
+record, = query_chats(db_path=db).records
+print(record.user_input, record.query_id, record.verdict)
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True",
+        "Call me on [PHONE] q1 {'verdict_type': 'NOT_PROVABLE'}",
+    ], err
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+BATCH = """
+from core import engine
+from core.dedup import analyze_batch, cluster_texts
+
+base = (
+    "I went to the city hospital last month with severe stomach pain and waited for many hours "
+    "in the crowded corridor before anyone came to see me. The nurse took my details and asked "
+    "me to sit in the general ward while the staff finished their shift change and paperwork. "
+    "Later a senior consultant examined me, ordered some blood tests and an ultrasound scan, and "
+    "told my family that I would need to stay overnight for observation. It was an emergency. "
+)
+refused = base + "The doctor refused admission."
+gave = base + "The doctor gave admission."
+drunk = refused + " The doctor was drunk."
+texts = [refused, gave, drunk, refused.upper(), gave]
+
+extractor, evaluator = engine.get_extractor(), engine.get_evaluator()
+
+def alone(text):
+    return evaluator.evaluate(extractor.extract(text))
+
+def ids(verdict):
+    return sorted(item["id"] for key in ("primary_violations", "imc_duties") for item in verdict.get(key, []))
+"""
+
+def test_near_duplicates_keep_their_own_verdict():
+    code = BATCH + """
+print(cluster_texts(texts))
+results, stats = analyze_batch(texts, extractor, evaluator)
+print([verdict == alone(text) for text, (_, verdict) in zip(texts, results)])
+print(results[0][1]["verdict_type"], results[1][1]["verdict_type"])
+print("DUTY_NOT_TO_PRACTICE_UNDER_INFLUENCE" in ids(results[2][1]))
+print(results[3] is results[0], results[4] is results[1])
+print(stats.clusters, stats.exact_duplicates, stats.near_duplicates, stats.verified, stats.mismatches)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "[0, 0, 0, 0, 0]",
+        "[True, True, True, True, True]",
+        "PROVABLE NOT_PROVABLE",
+        "True",
+        "True True",
+        "1 2 2 2 2",
+    ], err
+
+def test_unverified_batch_trusts_the_clusters():
+    code = BATCH + """
+results, stats = analyze_batch(texts, extractor, evaluator, verify=False)
+print(results[1] is results[0], stats.verified, stats.mismatches)
+"""
+    out, err = run_code(code)
+    assert out == "True 0 0", err
@@ -0,0 +1,72 @@
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_code(code, cwd=None):
+    completed = subprocess.run(
+        [sys.executable, "-B", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=cwd
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_reload_picks_up_edited_rules(tmp_path):
+    for name in ("core", "knowledge", "explanation"):
+        shutil.copytree(os.path.join(ROOT, name), tmp_path / name,
+                        ignore=shutil.ignore_patterns("__pycache__"))
+
+    code = """
+from core import engine
+
+def wording():
+    facts = engine.get_extractor().extract("The hospital refused admission in an emergency.")
+    return engine.get_evaluator().evaluate(facts)["primary_violations"][0]["explanation"][0]
+
+def edit(old, new):
+    path = "core/rights_evaluator.py"
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source.replace(old, new))
+
+before = wording()
+evaluator = engine.get_evaluator()
+edit("Emergency medical care must not be delayed or denied.", "Edited wording.")
+print(before != "Edited wording.", wording() == before)
+engine.reload()
+print(wording(), engine.get_evaluator() is not evaluator)
+
+# A broken edit is refused and the running engine stays
+evaluator = engine.get_evaluator()
+edit("class RightsEvaluator:", "class RightsEvaluator(")
+try:
+    engine.reload()
+except SyntaxError:
+    print("SyntaxError", engine.get_evaluator() is evaluator, wording())
+"""
+    out, err = run_code(code, cwd=tmp_path)
+    assert out.splitlines() == [
+        "True True",
+        "Edited wording. True",
+        "SyntaxError True Edited wording.",
+    ], err
+
+def test_main_migrates_and_warms_up_without_sinks(tmp_path):
+    db = str(tmp_path / "chat_history.db")
+    code = """
+import sqlite3, threading
+from core import engine
+
+engine.main(["--db", %r])
+print(engine._extractor.peek() is not None, engine._sinks_started.peek())
+print(sqlite3.connect(%r).execute("PRAGMA user_version").fetchone()[0] > 0)
+print(threading.active_count())
+""" % (db, db)
+    out, err = run_code(code)
+    lines = out.splitlines()
+    assert lines[0].startswith("Engine ready: construct")
+    assert lines[1:] == ["True None", "True", "1"], err
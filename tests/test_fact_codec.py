@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_packed_round_trip():
+    code = """
+from core import engine, fact_codec
+
+facts = engine.get_extractor().extract("The doctor refused to admit my brother after an accident.")
+blob = fact_codec.encode(facts)
+print(blob[0] == fact_codec.VERSION, len(blob) == 1 + fact_codec.PACKED_BYTES)
+print(fact_codec.decode(blob) == facts)
+
+partial = {"emergency_case": "yes", "discrimination_basis": "caste", "records_issue": {"denied": "no"}}
+print(fact_codec.decode(fact_codec.encode(partial)) == partial)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == ["True True", "True", "True"], err
+
+def test_raw_json_fallback():
+    code = """
+from core import fact_codec
+
+cases = [
+    {"emergency_case": "yes", "new_key": "yes"},                  # key outside the slot table
+    {"emergency_case": "maybe"},                                  # value outside the vocabulary
+    {"records_issue": {"requested": "yes", "extra": "no"}},       # unknown nested key
+    {"records_issue": "yes"},                                     # nested key that is not a dict
+    ["not", "a", "dict"],
+]
+for facts in cases:
+    blob = fact_codec.encode(facts)
+    print(blob[0] == fact_codec.RAW_JSON, fact_codec.decode(blob) == facts)
+
+try:
+    fact_codec.decode(bytes([99]))
+except ValueError as e:
+    print("ValueError")
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == ["True True"] * 5 + ["ValueError"], err
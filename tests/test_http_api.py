@@ -0,0 +1,163 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_batch_does_not_share_near_duplicate_verdicts():
+    code = """
+import json
+from core import http_api
+
+base = (
+    "I went to the city hospital last month with severe stomach pain and waited for many hours "
+    "in the crowded corridor before anyone came to see me. The nurse took my details and asked "
+    "me to sit in the general ward while the staff finished their shift change and paperwork. "
+    "Later a senior consultant examined me, ordered some blood tests and an ultrasound scan, and "
+    "told my family that I would need to stay overnight for observation. "
+)
+drunk = base + "The doctor was drunk."
+polite = base + "The doctor was polite."
+
+status, body = http_api.dispatch("POST", "/analyze/batch", json.dumps({"texts": [drunk, polite]}).encode())
+batch = json.loads(body)["results"]
+_, alone = http_api.dispatch("POST", "/analyze", json.dumps({"text": polite}).encode())
+alone = json.loads(alone)
+
+print(status)
+print(batch[0]["verdict"]["verdict_type"])
+print(batch[1]["verdict"]["verdict_type"], batch[1]["facts"]["doctor_under_influence"])
+print(batch[1] == alone)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == ["200", "PROVABLE", "NOT_PROVABLE no", "True"], err
+
+def test_batch_collapses_identical_texts():
+    code = """
+import json
+from core import http_api
+
+texts = ["The doctor was drunk.", "THE DOCTOR WAS DRUNK.", "", "Nothing happened."]
+status, body = http_api.dispatch("POST", "/analyze/batch", json.dumps({"texts": texts}).encode())
+results = json.loads(body)["results"]
+print(status, results[0] == results[1], results[2], results[3]["verdict"]["verdict_type"])
+"""
+    out, err = run_code(code)
+    assert out == "200 True {'error': 'EMPTY_INPUT'} NOT_PROVABLE", err
+
+PROTOCOL_HARNESS = """
+import json
+from core import http_api
+
+class Transport:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+    def writelines(self, chunks):
+        self.data += b"".join(chunks)
+    def close(self):
+        self.closed = True
+
+def connect():
+    protocol = http_api.HTTPProtocol()
+    transport = Transport()
+    protocol.connection_made(transport)
+    return protocol, transport
+
+def request(method, path, body=b"", headers=""):
+    return (
+        f"{method} {path} HTTP/1.1\\r\\nContent-Length: {len(body)}\\r\\n{headers}\\r\\n"
+    ).encode() + body
+
+def responses(data):
+    out = []
+    while data:
+        head, _, rest = data.partition(b"\\r\\n\\r\\n")
+        lines = head.decode().split("\\r\\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        length = int(headers["Content-Length"])
+        out.append((int(lines[0].split()[1]), json.loads(rest[:length]), headers.get("Connection")))
+        data = rest[length:]
+    return out
+"""
+
+def test_pipelined_requests_answered_in_order():
+    code = PROTOCOL_HARNESS + """
+protocol, transport = connect()
+drunk = json.dumps({"text": "The doctor was drunk."}).encode()
+stream = (
+    request("POST", "/analyze", drunk)
+    + request("GET", "/health")
+    + request("POST", "/analyze", b'{"text": "Nothing happened."}')
+)
+# Split mid-header and mid-body: only complete requests are answered
+protocol.data_received(stream[:10])
+print(transport.data)
+protocol.data_received(stream[10:-5])
+print([status for status, _, _ in responses(transport.data)])
+protocol.data_received(stream[-5:])
+
+answers = responses(transport.data)
+print([status for status, _, _ in answers], transport.closed)
+print(answers[0][1]["verdict"]["verdict_type"], "pid" in answers[1][1], answers[2][1]["verdict"]["verdict_type"])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "b''",
+        "[200, 200]",
+        "[200, 200, 200] False",
+        "PROVABLE True NOT_PROVABLE",
+    ], err
+
+def test_error_paths():
+    code = PROTOCOL_HARNESS + """
+protocol, transport = connect()
+protocol.data_received(
+    request("GET", "/nowhere")
+    + request("GET", "/analyze")
+    + request("POST", "/analyze", b"{not json")
+    + request("POST", "/analyze", b"[1]")
+    + request("POST", "/analyze", b'{"text": ""}')
+    + request("POST", "/analyze/batch", b'{"texts": "one"}')
+)
+for status, body, _ in responses(transport.data):
+    print(status, body["error"])
+print(transport.closed)
+
+# Oversized bodies are refused before they are read, and the connection closed
+protocol, transport = connect()
+protocol.data_received(
+    f"POST /analyze HTTP/1.1\\r\\nContent-Length: {http_api.MAX_BODY_BYTES + 1}\\r\\n\\r\\n".encode()
+    + request("GET", "/health")
+)
+print(responses(transport.data), transport.closed)
+
+for head in ("BROKEN\\r\\n\\r\\n", "POST /analyze HTTP/1.1\\r\\nTransfer-Encoding: chunked\\r\\n\\r\\n"):
+    protocol, transport = connect()
+    protocol.data_received(head.encode())
+    print(responses(transport.data), transport.closed)
+
+# Connection: close is honoured after the response
+protocol, transport = connect()
+protocol.data_received(request("GET", "/health", headers="Connection: close\\r\\n") + request("GET", "/health"))
+print([(status, connection) for status, _, connection in responses(transport.data)], transport.closed)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "404 NOT_FOUND",
+        "405 METHOD_NOT_ALLOWED",
+        "400 INVALID_JSON",
+        "400 EXPECTED_JSON_OBJECT",
+        "422 EMPTY_INPUT",
+        "400 EXPECTED_TEXTS_LIST",
+        "False",
+        "[(413, {'error': 'BODY_TOO_LARGE'}, 'close')] True",
+        "[(400, {'error': 'BAD_REQUEST_LINE'}, 'close')] True",
+        "[(501, {'error': 'CHUNKED_NOT_SUPPORTED'}, 'close')] True",
+        "[(200, 'close')] True",
+    ], err
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_failed_rows_back_off_then_dead_letter_and_requeue(tmp_path):
+    code = """
+from core.outbox import Outbox
+
+box = Outbox(%r)
+key = box.enqueue("sink", {"n": 1}, idempotency_key="k1")
+box.enqueue("sink", {"n": 1}, idempotency_key="k1")      # duplicate key: no-op
+print(key, box.stats())
+
+(row_id, _, sink, payload, attempts), = box.claim()
+print(sink, payload, attempts, box.claim())             # leased: not claimable twice
+
+# A failure below the attempt budget backs off: not due yet
+box.mark_failed([(row_id, attempts)], "boom", max_attempts=2)
+print(box.stats(), box.claim())
+
+box._conn.execute("UPDATE outbox SET next_attempt_at = 0")
+(row_id, _, _, _, attempts), = box.claim()
+box.mark_failed([(row_id, attempts)], "boom again", max_attempts=2)
+print(attempts, box.stats(), box.claim())
+
+print(box.requeue_dead("other"), box.requeue_dead("sink"))
+(row_id, _, _, _, attempts), = box.claim()
+box.mark_delivered([row_id])
+print(attempts, box.stats())
+""" % str(tmp_path / "outbox.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "k1 {'sink': {'PENDING': 1}}",
+        "sink {'n': 1} 1 []",
+        "{'sink': {'PENDING': 1}} []",
+        "2 {'sink': {'DEAD': 1}} []",
+        "0 1",
+        "1 {'sink': {'DELIVERED': 1}}",
+    ], err
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    code = """
+from core.outbox import Outbox
+
+box = Outbox(%r)
+box.enqueue("sink", {"n": 1})
+print([row[4] for row in box.claim(lease=0)])           # worker died mid-delivery
+print([row[4] for row in box.claim()])
+""" % str(tmp_path / "outbox.db")
+    out, err = run_code(code)
+    assert out.splitlines() == ["[1]", "[2]"], err
+
+def test_sheets_sink_leaves_retries_to_the_outbox(tmp_path):
+    code = """
+import time
+from core import sheets_logger
+from core.outbox import Outbox, OutboxDispatcher
+
+backend = sheets_logger.FakeSheetsBackend(quota_failures=1)
+sheets_logger.set_sheets_backend(backend, backoff_base=10.0)
+
+box = Outbox(%r)
+box.enqueue(sheets_logger.SHEETS_SINK, ["row"], idempotency_key="k1")
+dispatcher = OutboxDispatcher(box, {sheets_logger.SHEETS_SINK: sheets_logger.deliver_outbox_rows})
+
+# A quota error costs one attempt and no sleep in the dispatcher thread
+started = time.monotonic()
+print(dispatcher.run_once(), time.monotonic() - started < 1.0, box.stats())
+
+box._conn.execute("UPDATE outbox SET next_attempt_at = 0")
+print(dispatcher.run_once(), box.stats(), backend.rows, backend.calls)
+""" % str(tmp_path / "outbox.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "1 True {'google_sheets': {'PENDING': 1}}",
+        "1 {'google_sheets': {'DELIVERED': 1}} [['row', 'k1']] 2",
+    ], err
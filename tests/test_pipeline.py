@@ -125,10 +125,47 @@ def test_forbidden_words():
     for w in forbidden:
         assert w not in lowered, f"Forbidden word detected: {w}"
 
+def test_run_many_matches_run_pipeline():
+    code = """
+from core.pipeline import load_pipeline, run_pipeline
+from core.refusal import Refusal
+import json
+
+def load(p):
+    with open(p) as f: return json.load(f)
+
+documents = (
+    load("queries/query_schema.json"),
+    load("rules/rules.json"),
+    load("verdict/verdict_engine.json"),
+    load("explanation/explanation_template.json")
+)
+good = {"pregnancy_weeks": 20, "medical_practitioner_involved": True, "emergency_context": False}
+empty = {"pregnancy_weeks": 1, "medical_practitioner_involved": False, "emergency_context": False}
+missing = {"pregnancy_weeks": 20}
+
+results = load_pipeline().run_many([good, missing, empty, good])
+
+# One bad query refuses only its own slot
+print(isinstance(results[1], Refusal))
+print(results[0] == run_pipeline(good, *documents), results[2] == run_pipeline(empty, *documents))
+
+# Cached evaluations are not shared between results
+results[0]["proof"]["steps"].append("tampered")
+print(results[3] == run_pipeline(good, *documents))
+"""
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    ).stdout.strip()
+    assert out.splitlines() == ["True", "True True", "True"], "run_many differs from run_pipeline"
+
 if __name__ == "__main__":
     test_determinism_repeat()
     test_missing_field()
     test_unknown_field()
     test_empty_symbols()
     test_forbidden_words()
+    test_run_many_matches_run_pipeline()
     print("ALL TESTS PASSED")
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_forked_child_rebuilds_all_but_inherited_singletons():
+    code = """
+import os
+from core import admission, chat_query, engine
+
+extractor = engine.get_extractor()
+controller = admission.get_controller()
+pool = chat_query.get_read_pool("unused.db")
+
+pid = os.fork()
+if pid == 0:
+    print(engine.get_extractor() is extractor, admission.get_controller() is controller,
+          chat_query.get_read_pool("unused.db") is pool)
+    os._exit(0)
+os.waitpid(pid, 0)
+print(admission.get_controller() is controller, chat_query.get_read_pool("unused.db") is pool)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == ["True False False", "True True"], err
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_prompt_text_and_batch_agree():
+    code = """
+from explanation.input_contract import ExplanationInput
+from explanation.prompt_builder import build_prompt, build_prompts, get_template
+
+a = ExplanationInput("PROVABLE", "SYM_A", ["step  one", "step\\ntwo"])
+b = ExplanationInput("PROVABLE", "SYM_B", ["only step"])
+prompt = build_prompt(a)
+print("CONCLUSION SYMBOL:\\nSYM_A\\n" in prompt, "PROOF STEPS:\\n1. step one\\n2. step two\\n" in prompt)
+print(build_prompts([a, b, a]) == [prompt, build_prompt(b), prompt])
+
+template = get_template()
+print(template.version, template.slots, len(template.segments) == len(template.slots) + 1)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True True",
+        "True",
+        "1 ('conclusion_symbol', 'proof_steps') True",
+    ], err
+
+def test_registry_versions_are_immutable():
+    code = """
+from explanation.input_contract import ExplanationInput
+from explanation.prompt_builder import build_prompt, register_template
+
+register_template("T", 1, "v1 {{ conclusion_symbol }}")
+register_template("T", 2, "v2 {{conclusion_symbol}} / {{verdict_status}}")
+expl = ExplanationInput("PROVABLE", "SYM", [])
+print(build_prompt(expl, "T"), "|", build_prompt(expl, "T", version=1))
+
+for args in [("T", 1, "again"), ("U", 1, "{{unknown_slot}}")]:
+    try:
+        register_template(*args)
+    except ValueError as e:
+        print(e)
+try:
+    build_prompt(expl, "T", version=3)
+except KeyError as e:
+    print(e)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "v2 SYM / PROVABLE | v1 SYM",
+        "Template already registered: T v1",
+        "Unknown template slots: ['unknown_slot']",
+        "'Unknown template: T v3'",
+    ], err
@@ -0,0 +1,90 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_one_read_only_connection_per_thread(tmp_path):
+    code = """
+import sqlite3, threading
+from core.chat_query import ReadPool
+
+pool = ReadPool(%r)
+conn = pool.connection()
+print(conn is pool.connection(), pool.stats())
+
+# The schema is migrated before the pool goes read-only
+print(conn.execute("SELECT COUNT(*) FROM chat_history").fetchone()[0])
+try:
+    conn.execute("DELETE FROM chat_history")
+except sqlite3.Error as e:
+    print(type(e).__name__)
+
+others = []
+thread = threading.Thread(target=lambda: others.append(pool.connection()))
+thread.start()
+thread.join()
+print(others[0] is not conn, pool.stats()["open"])
+
+pool.release()
+print(pool.stats()["open"], pool.connection() is not conn)
+pool.close_all()
+print(pool.stats()["open"])
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True {'open': 1, 'max': 8}",
+        "0",
+        "OperationalError",
+        "True 2",
+        "1 True",
+        "0",
+    ], err
+
+def test_slots_are_bounded_and_reclaimed(tmp_path):
+    code = """
+import sqlite3, threading
+from core import chat_query
+from core.chat_query import ReadPool
+
+chat_query.ACQUIRE_TIMEOUT = 0.2
+pool = ReadPool(%r, max_connections=1, health_check_interval=0)
+
+def in_thread(fn):
+    result = []
+    def run():
+        try:
+            result.append(fn())
+        except RuntimeError as e:
+            result.append(str(e))
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return result[0]
+
+# The slot of a thread that has exited is reclaimed
+in_thread(pool.connection)
+print(pool.stats()["open"])
+conn = pool.connection()
+print(pool.stats()["open"])
+
+# A live thread holding the only slot: others time out
+print(in_thread(pool.connection))
+
+# A broken connection fails its health check and is replaced
+conn.close()
+replaced = pool.connection()
+print(replaced is not conn, replaced.execute("SELECT 1").fetchone())
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "1",
+        "1",
+        "Chat history read pool exhausted",
+        "True (1,)",
+    ], err
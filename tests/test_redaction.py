@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_masks_each_kind_in_one_scan():
+    code = """
+from core import redaction
+
+redaction.set_names(["Ram", "Ramesh Kumar", "Sita"])
+for text in [
+    "Call me on +91 98765 43210 or 09876543210, mail ram.k@example.co.in",
+    "Aadhaar 2345 6789 0123 and 234567890123",
+    "Dr. RAMESH KUMAR saw Ram and Sita but not Ramu or Sitara",
+]:
+    result = redaction.redact(text)
+    print(result.text, [(span.kind, text[span.start:span.end]) for span in result.spans])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "Call me on [PHONE] or [PHONE], mail [EMAIL] "
+        "[('PHONE', '+91 98765 43210'), ('PHONE', '09876543210'), ('EMAIL', 'ram.k@example.co.in')]",
+        "Aadhaar [AADHAAR] and [AADHAAR] [('AADHAAR', '2345 6789 0123'), ('AADHAAR', '234567890123')]",
+        "Dr. [NAME] saw [NAME] and [NAME] but not Ramu or Sitara "
+        "[('NAME', 'RAMESH KUMAR'), ('NAME', 'Ram'), ('NAME', 'Sita')]",
+    ], err
+
+def test_leaves_other_numbers_and_counts_calls():
+    code = """
+from core import redaction
+from core.sheets_logger import build_row
+
+redaction.set_names([])
+for text in ["Bill no 12345, ward 1234567890123, amount 98765", "ID 1234 5678 9012", "Ram was there"]:
+    result = redaction.redact(text)
+    print(result.text == text, result.spans)
+
+# Sinks only ever see the redacted text
+row = build_row("Reach me at 9876543210", {}, {"verdict_type": "NOT_PROVABLE"})
+print(row[1], redaction.redaction_stats()["calls"])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True ()",
+        "True ()",
+        "True ()",
+        "Reach me at [PHONE] 4",
+    ], err
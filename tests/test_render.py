@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_fragments_are_cached_per_item_content():
+    code = """
+import copy
+from core import render
+
+item = {
+    "id": "RIGHT_TO_EMERGENCY_MEDICAL_CARE",
+    "source": "NHRC_2019",
+    "citation": "Clause 3",
+    "explanation": ["Care must not be <denied>."],
+}
+first = render.fragment(render.RIGHT, item, "v1")
+print(render.fragment(render.RIGHT, copy.deepcopy(item), "v1") is first)
+print("&lt;denied&gt;" in first, "<h3>RIGHT_TO_EMERGENCY_MEDICAL_CARE</h3>" in first)
+
+# Same id, edited wording (a changed evaluator, a legacy row): its own text
+edited = dict(item, explanation=["Edited wording."])
+print("Edited wording." in render.fragment(render.RIGHT, edited, "v1"))
+print("Edited wording." in render.fragment(render.RIGHT, item, "v1"))
+
+# Mutating an item after rendering does not change its cached fragment
+item["explanation"].append("Appended.")
+print("Appended." in render.fragment(render.RIGHT, item, "v1"))
+
+# Load shedding: title and source only
+print("<ul>" in render.fragment(render.RIGHT, item, "v1", explanations=False))
+
+section = render.section(render.DUTY, [item, edited], "v2", header="Duties & more")
+print(section.startswith("<hr><h3>Duties &amp; more</h3>"), section.count("<h3>"))
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "True",
+        "True True",
+        "True",
+        "False",
+        "True",
+        "False",
+        "True 3",
+    ], err
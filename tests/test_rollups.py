@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_rollups_follow_inserts_and_match_a_rebuild(tmp_path):
+    code = """
+from core import chat_history
+from core.chat_history import ChatHistoryWriter, ChatRow
+from core.chat_query import item_series, verdict_series
+
+db = %r
+emergency = {
+    "verdict_type": "PROVABLE",
+    "primary_violations": [{"id": "RIGHT_TO_EMERGENCY_MEDICAL_CARE"}],
+    "imc_duties": [{"id": "DUTY_TO_PROVIDE_EMERGENCY_CARE"}],
+}
+influence = {"verdict_type": "PROVABLE", "imc_duties": [{"id": "DUTY_NOT_TO_PRACTICE_UNDER_INFLUENCE"}]}
+nothing = {"verdict_type": "NOT_PROVABLE"}
+
+def save(writer, day, verdict):
+    writer.save(ChatRow(f"2026-03-0{day}T10:00:00", "text", {}, verdict))
+
+# Two writer batches: the second upserts into existing rollup rows
+writer = ChatHistoryWriter(db, batch_size=2)
+for day, verdict in [(1, emergency), (1, nothing), (2, emergency)]:
+    save(writer, day, verdict)
+writer.flush(5)
+for day, verdict in [(1, emergency), (2, influence), (3, nothing)]:
+    save(writer, day, verdict)
+writer.close()
+
+def snapshot():
+    return (
+        verdict_series(db_path=db),
+        item_series(db_path=db),
+        item_series(kind="DUTY", since="2026-03-02", db_path=db),
+        verdict_series(since="2026-03-02", until="2026-03-03", db_path=db),
+    )
+
+incremental = snapshot()
+for series in incremental:
+    print(sorted(series.items()))
+chat_history.rebuild_rollups(db)
+print(snapshot() == incremental)
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "[('NOT_PROVABLE', [('2026-03-01', 1), ('2026-03-03', 1)]), "
+        "('PROVABLE', [('2026-03-01', 2), ('2026-03-02', 2)])]",
+        "[('DUTY_NOT_TO_PRACTICE_UNDER_INFLUENCE', [('2026-03-02', 1)]), "
+        "('DUTY_TO_PROVIDE_EMERGENCY_CARE', [('2026-03-01', 2), ('2026-03-02', 1)]), "
+        "('RIGHT_TO_EMERGENCY_MEDICAL_CARE', [('2026-03-01', 2), ('2026-03-02', 1)])]",
+        "[('DUTY_NOT_TO_PRACTICE_UNDER_INFLUENCE', [('2026-03-02', 1)]), ('DUTY_TO_PROVIDE_EMERGENCY_CARE', [('2026-03-02', 1)])]",
+        "[('PROVABLE', [('2026-03-02', 2)])]",
+        "True",
+    ], err
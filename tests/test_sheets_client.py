@@ -0,0 +1,118 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+HARNESS = """
+import time
+from core.exceptions import PartialDeliveryError, SinkRetryableError
+from core.sheets_logger import FakeSheetsBackend, SheetsClient
+
+class FailingCall(FakeSheetsBackend):
+    # Fails the given (1-based) calls with a non-retryable error
+    def __init__(self, *failing):
+        super().__init__()
+        self.failing = set(failing)
+
+    def append_rows(self, rows):
+        self.calls += 1
+        if self.calls in self.failing:
+            raise RuntimeError(f"call {self.calls} failed")
+        self.rows.extend(rows)
+"""
+
+def test_rows_are_sent_in_batches():
+    code = HARNESS + """
+backend = FakeSheetsBackend(quota_failures=2)
+client = SheetsClient(backend, batch_size=3, flush_interval=0.1, backoff_base=0.01)
+for n in range(7):
+    client.append([n])
+
+deadline = time.monotonic() + 5
+while len(backend.rows) < 7 and time.monotonic() < deadline:
+    time.sleep(0.01)
+client.close()
+print(backend.rows == [[n] for n in range(7)], backend.calls, client.stats())
+"""
+    out, err = run_code(code)
+    assert out == "True 5 {'sent': 7, 'dropped': 0, 'retries': 2, 'pending': 0}", err
+
+def test_overflow_drops_the_oldest_rows():
+    code = HARNESS + """
+backend = FakeSheetsBackend()
+client = SheetsClient(backend, batch_size=100, flush_interval=60, max_pending=3)
+for n in range(5):
+    client.append([n])
+client.flush()
+client.close()
+print(backend.rows, client.stats())
+"""
+    out, err = run_code(code)
+    assert out.splitlines()[-1] == "[[2], [3], [4]] {'sent': 3, 'dropped': 2, 'retries': 0, 'pending': 0}", err
+    assert "buffer full (3 rows)" in out and "2 rows dropped so far" in out, err
+
+def test_close_gives_up_after_its_timeout():
+    code = HARNESS + """
+backend = FakeSheetsBackend(latency=2.0)
+client = SheetsClient(backend, batch_size=100, flush_interval=60)
+client.append([1])
+started = time.monotonic()
+client.close(timeout=0.2)
+print(time.monotonic() - started < 1.0)
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "❌ Google Sheets client did not stop within 0.2s; pending rows abandoned",
+        "True",
+    ], err
+
+def test_partial_failure_counts_only_unsent_rows():
+    code = HARNESS + """
+backend = FailingCall(2)
+client = SheetsClient(backend, batch_size=2, flush_interval=60)
+try:
+    client.send([[n] for n in range(5)], retry=False)
+except PartialDeliveryError as e:
+    print(e.sent, repr(e.__cause__))
+
+backend = FailingCall(2)
+client = SheetsClient(backend, batch_size=2, flush_interval=60)
+for n in range(5):
+    client.append([n])
+client.flush()
+client.close()
+print(backend.rows, client.stats()["dropped"])
+"""
+    out, err = run_code(code)
+    assert out.splitlines()[0] == "2 RuntimeError('call 2 failed')", err
+    assert out.splitlines()[-1] == "[[0], [1]] 3", err
+
+def test_outbox_resends_only_the_undelivered_rows(tmp_path):
+    code = HARNESS + """
+from core import sheets_logger
+from core.outbox import Outbox, OutboxDispatcher
+
+backend = FailingCall(2)
+sheets_logger.set_sheets_backend(backend, batch_size=2)
+box = Outbox(%r)
+for n in range(5):
+    box.enqueue(sheets_logger.SHEETS_SINK, [n], idempotency_key=f"k{n}")
+dispatcher = OutboxDispatcher(box, {sheets_logger.SHEETS_SINK: sheets_logger.deliver_outbox_rows})
+
+dispatcher.run_once()
+print(box.stats())
+box._conn.execute("UPDATE outbox SET next_attempt_at = 0")
+dispatcher.run_once()
+print(box.stats(), [row[1] for row in backend.rows])
+""" % str(tmp_path / "outbox.db")
+    out, err = run_code(code)
+    assert out.splitlines()[-2:] == [
+        "{'google_sheets': {'DELIVERED': 2, 'PENDING': 3}}",
+        "{'google_sheets': {'DELIVERED': 5}} ['k0', 'k1', 'k2', 'k3', 'k4']",
+    ], err
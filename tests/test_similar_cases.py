@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+def test_similar_chats_ranked_by_fact_pattern(tmp_path):
+    code = """
+import sqlite3
+from core.chat_history import ChatHistoryWriter, ChatRow
+from core.chat_query import similar_chats
+
+db = %r
+a = {"emergency_case": "yes", "admission_denied": "yes", "doctor_involved": "yes"}
+patterns = {
+    "same": a,
+    "fewer": {"emergency_case": "yes", "admission_denied": "yes", "doctor_involved": "no"},
+    "more": dict(a, payment_demanded="yes"),
+    "other": {"privacy_breached": "yes"},
+}
+writer = ChatHistoryWriter(db)
+for name in ["same", "fewer", "more", "other", "same"]:
+    writer.save(ChatRow("2026-03-01T10:00:00", name, patterns[name], {"verdict_type": "NOT_PROVABLE"}))
+writer.close()
+
+def show(results):
+    return [(round(similarity, 2), record.id, record.user_input) for similarity, record in results]
+
+print(show(similar_chats(a, db_path=db)))
+print(show(similar_chats(a, k=2, exclude_id=5, db_path=db)))
+print(show(similar_chats(a, min_similarity=0.7, db_path=db)))
+
+# Chats are indexed by pattern: one fact_pattern row per distinct pattern
+conn = sqlite3.connect(db)
+print(conn.execute("SELECT COUNT(*), SUM(chats) FROM fact_pattern").fetchone())
+""" % str(tmp_path / "chat.db")
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "[(1.0, 5, 'same'), (1.0, 1, 'same'), (0.75, 3, 'more'), (0.67, 2, 'fewer')]",
+        "[(1.0, 1, 'same'), (0.75, 3, 'more')]",
+        "[(1.0, 5, 'same'), (1.0, 1, 'same'), (0.75, 3, 'more')]",
+        "(4, 5)",
+    ], err
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+HARNESS = """
+import threading, time
+from core.singleflight import SingleFlight
+
+flight = SingleFlight()
+release = threading.Event()
+calls = []
+
+def slow(value):
+    calls.append(value)
+    release.wait(5)
+    if value == "boom":
+        raise ValueError(value)
+    return [value]
+
+def start(key, value, results):
+    def run():
+        try:
+            results.append(flight.do(key, slow, value))
+        except ValueError as e:
+            results.append(repr(e))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def wait_for(executed, coalesced):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        stats = flight.stats()
+        if stats["executed"] >= executed and stats["coalesced"] >= coalesced:
+            break
+        time.sleep(0.01)
+"""
+
+def test_overlapping_calls_share_one_execution():
+    code = HARNESS + """
+results, other = [], []
+threads = [start("a", "a", results)]
+while not calls:
+    time.sleep(0.01)
+threads += [start("a", "a", results) for _ in range(4)]
+threads.append(start("b", "b", other))
+wait_for(2, 4)
+print(flight.stats())
+release.set()
+for thread in threads:
+    thread.join()
+
+print(calls.count("a"), sorted(shared for _, shared in results), other)
+print(all(result is results[0][0] for result, _ in results))
+
+# Finished calls are forgotten: this is not a cache
+print(flight.do("a", slow, "a"), flight.stats())
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == [
+        "{'executed': 2, 'coalesced': 4, 'in_flight': 2}",
+        "1 [False, True, True, True, True] [(['b'], False)]",
+        "True",
+        "(['a'], False) {'executed': 3, 'coalesced': 4, 'in_flight': 0}",
+    ], err
+
+def test_waiters_get_the_leaders_exception():
+    code = HARNESS + """
+results = []
+threads = [start("k", "boom", results)]
+while not calls:
+    time.sleep(0.01)
+threads += [start("k", "boom", results) for _ in range(2)]
+wait_for(1, 2)
+release.set()
+for thread in threads:
+    thread.join()
+print(results, calls, flight.stats()["in_flight"])
+"""
+    out, err = run_code(code)
+    assert out == "[\"ValueError('boom')\", \"ValueError('boom')\", \"ValueError('boom')\"] ['boom'] 0", err
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+
+def run_code(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True
+    )
+    return completed.stdout.strip(), completed.stderr.strip()
+
+HARNESS = """
+import threading, time
+from core import admission, engine, spans
+from core.interaction import analyze
+from core.sinks import Sink, SinkDispatcher
+
+events = []
+lock = threading.Lock()
+
+def recording(name, seconds=0.0, fail=False):
+    def deliver(interaction):
+        time.sleep(seconds)
+        with lock:
+            events.append((name, interaction.user_input, interaction.verdict_json is not None))
+        if fail:
+            raise RuntimeError(name)
+    return deliver
+
+def interaction(text="The doctor was drunk.", tier=admission.FULL):
+    result = analyze(text, engine.get_extractor(), engine.get_evaluator())
+    result.tier = tier
+    return result
+"""
+
+def test_fan_out_isolation_and_last_sinks():
+    code = HARNESS + """
+dispatcher = SinkDispatcher(workers=4)
+dispatcher.register(Sink("slow", recording("slow", 0.2), 0.05, span=spans.SINK_CHAT_HISTORY))
+dispatcher.register(Sink("broken", recording("broken", fail=True), 1.0))
+dispatcher.register(Sink("trail", recording("trail"), 1.0, analyzed_only=False, last=True))
+dispatcher.register(Sink("sheets", recording("sheets"), 1.0, admission.SHEETS))
+
+analyzed = interaction()
+dispatcher.dispatch(analyzed)
+dispatcher.dispatch(interaction("The doctor was intoxicated.", tier=admission.REDUCED))
+dispatcher.dispatch(interaction(""))          # refused: only the trail
+print(dispatcher.flush(5))
+
+# The trail of each interaction runs after its other sinks
+for text in ("The doctor was drunk.", "The doctor was intoxicated."):
+    print([name for name, t, _ in events if t == text][-1], end=" ")
+print(events[0][2])
+print([name for name, text, _ in events if text == ""])
+print(analyzed.recorder.elapsed(spans.SINK_CHAT_HISTORY) >= 0.2)
+
+stats = dispatcher.stats()
+print(stats["slow"]["delivered"], stats["slow"]["late"], stats["broken"]["failed"])
+print(stats["sheets"]["delivered"], stats["sheets"]["skipped"], stats["trail"]["delivered"])
+"""
+    out, err = run_code(code)
+    lines = out.splitlines()
+    assert lines.count("❌ Sink broken failed") == 2, err
+    assert [line for line in lines if not line.startswith("❌")] == [
+        "True",
+        "trail trail True",
+        "['trail']",
+        "True",
+        "2 2 2",
+        "1 1 3",
+    ], err
+    assert "RuntimeError: broken" in err
+
+def test_dispatch_waits_for_room_instead_of_dropping():
+    code = HARNESS + """
+dispatcher = SinkDispatcher(workers=1, max_pending=1)
+dispatcher.register(Sink("slow", recording("slow", 0.1), 5.0))
+
+started = time.monotonic()
+for _ in range(3):
+    dispatcher.dispatch(interaction())
+print(time.monotonic() - started >= 0.2)
+dispatcher.flush(5)
+stats = dispatcher.stats()["slow"]
+print(len(events), stats["delivered"], stats["waited"])
+"""
+    out, err = run_code(code)
+    assert out.splitlines() == ["True", "3 3 2"], err
@@ -2,9 +2,8 @@
 
 import streamlit as st
 
-from core.fact_extractor import FactExtractor
-from core.rights_evaluator import RightsEvaluator
-from core.sheets_logger import log_to_google_sheets
+from core import admission, engine, render, sinks, spans
+from core.interaction import analyze
 
 # -------------------------------------------------
 # Page config (MUST be first Streamlit call)
@@ -30,9 +29,23 @@ st.markdown("""
     color: #2ecc71;
     margin-top: 0;
 }
+""" + render.CSS + """
 </style>
 """, unsafe_allow_html=True)
 
+# -------------------------------------------------
+# Process-wide engine, built and warmed up on the first page load of
+# each server process (Streamlit re-runs this script on every
+# interaction). start.sh applies the migrations before serving.
+# -------------------------------------------------
+@st.cache_resource
+def load_engine():
+    engine.warm_up()
+    return engine.get_extractor(), engine.get_evaluator()
+
+
+extractor, evaluator = load_engine()
+
 # -------------------------------------------------
 # Title & Description
 # -------------------------------------------------
@@ -71,35 +84,35 @@ analyze_clicked = st.button("🔍 Analyze")
 # -------------------------------------------------
 if analyze_clicked and user_input.strip():
 
-    extractor = FactExtractor()
-    evaluator = RightsEvaluator()
-
     # ----------------------------
-    # 1. Extract facts (INTERNAL)
+    # 1-2. Validate, extract facts (INTERNAL), evaluate rights & duties
     # ----------------------------
-    facts = extractor.extract(user_input)
+    interaction = analyze(user_input, extractor, evaluator, admission.get_controller())
+    recorder = interaction.recorder
+
+    if interaction.refusal is not None:
+        sinks.dispatch(interaction)
+        st.error(f"❌ Input not accepted: {interaction.refusal.reason}")
+        st.stop()
+
+    if interaction.verdict.get("verdict_type") == admission.BUSY:
+        sinks.dispatch(interaction)
+        st.warning(
+            "⏳ **The system is handling many requests right now.**\n\n"
+            f"Please try again in about {interaction.verdict['retry_after_s']:g} seconds."
+        )
+        st.stop()
 
-    # ----------------------------
-    # 2. Evaluate rights & duties
-    # ----------------------------
-    verdict = evaluator.evaluate(facts)
+    facts = interaction.facts
+    verdict = interaction.verdict
 
-    # ----------------------------
-    # 3. Logging (silent)
-    # ----------------------------
-    try:
-        log_to_google_sheets(
-            user_input=user_input,
-            extracted_facts=facts,
-            verdict=verdict
-        )
-    except Exception:
-        import traceback
-        traceback.print_exc()
+    # Under load, optional work is skipped (core/admission.py)
+    explanations = admission.allows(interaction.tier, admission.EXPLANATIONS)
 
     # -------------------------------------------------
     # USER SAFE OUTPUT
     # -------------------------------------------------
+    recorder.start(spans.RENDERING)
     st.markdown("---")
     st.subheader("⚖️ System Verdict")
 
@@ -109,52 +122,47 @@ if analyze_clicked and user_input.strip():
     imc_duties = verdict.get("imc_duties", [])
     procedural_items = verdict.get("procedural_remedies", [])
 
+    # One st.markdown call per section, built from cached fragments
+    knowledge_version = engine.get_knowledge().version
+
     # =================================================
     # PROVABLE RIGHTS (NHRC)
     # =================================================
     if verdict_type == "PROVABLE":
 
-        for right in provable_rights:
-            explanation_html = "".join(
-                [f"<li>{line}</li>" for line in right.get("explanation", [])]
-            )
-
-            st.markdown(f"""
-            <div class="proven-right">
-                <h3>{right['id']}</h3>
-                <p><b>Source:</b> {right['source']} — {right['citation']}</p>
-                <p><b>What this right guarantees:</b></p>
-                <ul>
-                    {explanation_html}
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(
+            render.section(
+                render.RIGHT, provable_rights, knowledge_version,
+                explanations=explanations,
+            ),
+            unsafe_allow_html=True,
+        )
 
         # -------------------------------------------------
         # IMC DUTIES (Determinative, Parallel)
         # -------------------------------------------------
         if imc_duties:
-            st.markdown("---")
-            st.subheader("🩺 Relevant Doctor Duties (IMC)")
-
-            for duty in imc_duties:
-                st.markdown(f"### {duty['id']}")
-                st.caption(f"Source: {duty['source']} — {duty['citation']}")
-                st.markdown("**What this duty requires:**")
-                for line in duty.get("explanation", []):
-                    st.markdown(f"- {line}")
+            st.markdown(
+                render.section(
+                    render.DUTY, imc_duties, knowledge_version,
+                    header="🩺 Relevant Doctor Duties (IMC)",
+                    explanations=explanations,
+                ),
+                unsafe_allow_html=True,
+            )
 
         # -------------------------------------------------
         # ETHICAL / PROFESSIONAL CONCERNS (NON-DETERMINATIVE)
         # -------------------------------------------------
         if procedural_items:
-            st.markdown("---")
-            st.subheader("⚠️ Professional Conduct Concern (Ethical – Non-Determinative)")
-
-            for item in procedural_items:
-                st.caption(f"Source: {item['source']} — {item['citation']}")
-                for line in item.get("explanation", []):
-                    st.markdown(f"- {line}")
+            st.markdown(
+                render.section(
+                    render.PROCEDURAL, procedural_items, knowledge_version,
+                    header="⚠️ Professional Conduct Concern (Ethical – Non-Determinative)",
+                    explanations=explanations,
+                ),
+                unsafe_allow_html=True,
+            )
 
             st.info(
                 "ℹ️ This section reflects ethical standards referenced in official regulations. "
@@ -169,12 +177,13 @@ if analyze_clicked and user_input.strip():
 
         st.warning("⚠️ **Procedural / Ethical Concerns Identified**")
 
-        for item in procedural_items:
-            st.markdown(f"### {item['id']}")
-            st.caption(f"Source: {item['source']} — {item['citation']}")
-            st.markdown("**What this means:**")
-            for line in item.get("explanation", []):
-                st.markdown(f"- {line}")
+        st.markdown(
+            render.section(
+                render.PROCEDURAL_TITLED, procedural_items, knowledge_version,
+                explanations=explanations,
+            ),
+            unsafe_allow_html=True,
+        )
 
         st.info(
             "ℹ️ **Scope Limitation**\n\n"
@@ -202,4 +211,14 @@ if analyze_clicked and user_input.strip():
 The system will never guess or assume.
 """)
 
+    if not explanations:
+        st.caption("ℹ️ Detailed explanations are omitted while the system is under heavy load.")
+
     st.caption("📝 This interaction has been securely logged for audit and academic evaluation.")
+    recorder.stop(spans.RENDERING)
+
+    # ----------------------------
+    # 3. Logging (silent): audit log, chat history and Google Sheets,
+    #    delivered concurrently in the background (core/sinks.py)
+    # ----------------------------
+    sinks.dispatch(interaction, knowledge_version)